@@ -0,0 +1,79 @@
+"""
+FinBERT embedding store: append throughput and daily mean-pooling through
+the memory maps vs. pooling an in-memory DataFrame of the same vectors.
+
+Usage:
+    python -m benchmarks.bench_feature_store --posts 100000 --dim 768 --days 365
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.feature_store import EmbeddingStore
+
+
+def traced(fn):
+    """Run fn, returning its result, wall time and peak traced allocation in MB (memory maps excluded)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def pool_in_memory(path):
+    """Load every embedding into a DataFrame and group it by date."""
+    store = EmbeddingStore(path)
+    frame = pd.DataFrame(np.array(store.embeddings()))
+    frame["date"] = store.index()["date"].to_numpy()
+    return frame.groupby("date").mean()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--block", type=int, default=4096, help="posts per append, as in analyze_finbert_sentiment")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    created = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(
+        np.sort(rng.integers(0, args.days * 86400, args.posts)), unit="s")
+    probs = rng.dirichlet(np.ones(3), args.posts)
+    embeddings = rng.standard_normal((args.posts, args.dim), dtype=np.float32)
+    ids = np.array([f"p{i}" for i in range(args.posts)], dtype=object)
+    root = tempfile.mkdtemp()
+    path = os.path.join(root, "store")
+    try:
+        store = EmbeddingStore(path, model_id="bench")
+        start = time.perf_counter()
+        for i in range(0, args.posts, args.block):
+            j = min(i + args.block, args.posts)
+            store.append(ids[i:j], created[i:j].date, created[i:j], probs[i:j], embeddings[i:j])
+        t_append = time.perf_counter() - start
+        size_mb = os.path.getsize(os.path.join(path, "embeddings.f32")) / 2**20
+        del embeddings
+
+        (days, _, pooled, _), t_pool, mem_pool = traced(lambda: EmbeddingStore(path).daily_mean())
+        reference, t_frame, mem_frame = traced(lambda: pool_in_memory(path))
+
+        np.testing.assert_allclose(pooled, reference.to_numpy(), rtol=1e-4, atol=1e-6)
+        print(f"{args.posts:,} posts x {args.dim} dims ({size_mb:,.0f} MB of embeddings), {len(days)} days")
+        print(f"  append ({args.block}/block)   {t_append:7.2f}s  {args.posts / t_append:12,.0f} posts/s")
+        print(f"  daily_mean (memmap)    {t_pool:7.2f}s  peak allocations {mem_pool:8.0f} MB")
+        print(f"  DataFrame groupby      {t_frame:7.2f}s  peak allocations {mem_frame:8.0f} MB")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
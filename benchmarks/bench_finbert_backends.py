@@ -0,0 +1,74 @@
+"""
+Parity, latency and memory report for the FinBERT CPU backends.
+
+Every backend runs in a fresh process so its peak RSS is measured in isolation.
+
+Usage:
+    python -m benchmarks.bench_finbert_backends --posts 512 --backends torch int8 onnx
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_finbert_batching import synthetic_texts
+from src.finbert_backends import BACKENDS, parity_report
+from src.finbert_sentiment import load_finbert_pipeline, predict_sentiment_batched
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def run_backend(backend, texts, batch_size):
+    start = time.perf_counter()
+    pipe = load_finbert_pipeline(backend=backend)
+    load_time = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+
+    predict_sentiment_batched(pipe, texts[:batch_size], batch_size=batch_size, progress=False)  # warm-up
+    start = time.perf_counter()
+    probs = predict_sentiment_batched(pipe, texts, batch_size=batch_size, progress=False)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "probs": probs,
+        "id2label": dict(pipe.model.config.id2label),
+        "load_s": load_time,
+        "posts_per_s": len(texts) / elapsed,
+        "ms_per_batch": 1000 * elapsed / -(-len(texts) // batch_size),
+        "rss_load_mb": rss_after_load,
+        "rss_peak_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=512)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.posts, seed=args.seed)
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+
+    results = {}
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+            results[backend] = pool.submit(run_backend, backend, texts, args.batch_size).result()
+
+    reference = results["torch"]
+    print(f"{'backend':<8}{'load s':>8}{'posts/s':>10}{'ms/batch':>10}{'RSS load':>10}{'RSS peak':>10}"
+          f"{'label diff':>12}{'score drift':>13}{'max drift':>11}")
+    for backend, r in results.items():
+        parity = parity_report(reference["probs"], r["probs"], reference["id2label"])
+        print(f"{backend:<8}{r['load_s']:>8.1f}{r['posts_per_s']:>10.1f}{r['ms_per_batch']:>10.1f}"
+              f"{r['rss_load_mb']:>9.0f}M{r['rss_peak_mb']:>9.0f}M"
+              f"{parity['label_disagreement']:>12.2%}{parity['score_drift_mean']:>13.4f}"
+              f"{parity['score_drift_max']:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Posts-per-second benchmark: per-post pipeline loop vs. batched FinBERT inference.
+
+Usage:
+    python -m benchmarks.bench_finbert_batching --posts 512 --batch-sizes 8 32 64
+"""
+import argparse
+import random
+import time
+
+from src.finbert_sentiment import (
+    load_finbert_pipeline,
+    predict_sentiment_batched,
+    probs_to_labels,
+)
+
+WORDS = ("tesla", "stock", "delivery", "earnings", "model", "cybertruck", "robotaxi",
+         "price", "cut", "record", "quarter", "guidance", "margin", "recall", "update",
+         "elon", "fsd", "factory", "demand", "battery", "great", "bad", "missed", "beat")
+
+
+def synthetic_texts(n, seed=0):
+    """Mix of short titles and long selftexts, similar to r/teslamotors posts."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        title = " ".join(rng.choices(WORDS, k=rng.randint(4, 14)))
+        body = " ".join(rng.choices(WORDS, k=rng.choice([0, 0, 20, 80, 300])))
+        texts.append((title + " " + body)[:512])
+    return texts
+
+
+def time_loop(pipe, texts):
+    start = time.perf_counter()
+    results = [pipe(t)[0] for t in texts]
+    return time.perf_counter() - start, [r['label'] for r in results]
+
+
+def time_batched(pipe, texts, batch_size):
+    start = time.perf_counter()
+    probs = predict_sentiment_batched(pipe, texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    labels, _ = probs_to_labels(probs, pipe.model.config.id2label)
+    return elapsed, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.posts, seed=args.seed)
+    pipe = load_finbert_pipeline()
+    pipe(texts[0])  # warm-up
+
+    loop_time, loop_labels = time_loop(pipe, texts)
+    print(f"{'mode':<16}{'posts/s':>10}{'speedup':>10}{'label match':>14}")
+    print(f"{'loop':<16}{len(texts) / loop_time:>10.1f}{1.0:>10.2f}{'-':>14}")
+
+    for batch_size in args.batch_sizes:
+        elapsed, labels = time_batched(pipe, texts, batch_size)
+        match = sum(a == b for a, b in zip(labels, loop_labels)) / len(texts)
+        print(f"{'batch=' + str(batch_size):<16}{len(texts) / elapsed:>10.1f}"
+              f"{loop_time / elapsed:>10.2f}{match:>14.1%}")
+
+
+if __name__ == "__main__":
+    main()
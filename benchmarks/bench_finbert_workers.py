@@ -0,0 +1,44 @@
+"""
+Scaling benchmark for multi-process FinBERT scoring.
+
+Usage:
+    python -m benchmarks.bench_finbert_workers --posts 2048 --workers 1 2 4 8
+"""
+import argparse
+import time
+
+from benchmarks.bench_finbert_batching import synthetic_texts
+from src.cpu import available_cores
+from src.finbert_sentiment import predict_sentiment_sharded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=2048)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.posts, seed=args.seed)
+    n_cores = len(available_cores())
+    print(f"{len(texts)} posts, {n_cores} usable cores")
+    print(f"{'workers':<10}{'posts/s':>10}{'speedup':>10}{'efficiency':>12}")
+
+    # Speedup and efficiency are relative to one worker, so it is always measured first.
+    baseline = None
+    for workers in sorted(set(args.workers) | {1}):
+        if workers > n_cores:
+            print(f"{workers:<10}{'skipped (not enough cores)':>32}")
+            continue
+        # Timing includes pool start-up and model loading, as in a real run.
+        start = time.perf_counter()
+        predict_sentiment_sharded(texts, workers, batch_size=args.batch_size)
+        rate = len(texts) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        speedup = rate / baseline
+        print(f"{workers:<10}{rate:>10.1f}{speedup:>10.2f}{speedup / workers:>12.1%}")
+
+
+if __name__ == "__main__":
+    main()
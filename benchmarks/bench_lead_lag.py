@@ -0,0 +1,103 @@
+"""
+Batched lead/lag engine vs. per-pair pandas .corr and per-feature OLS loops.
+
+The naive side computes each (ticker, feature, lag) correlation with
+Series.corr, its bootstrap with one .corr per resample, and each Granger
+test with two np.linalg.lstsq fits. It runs with --naive-boot resamples and
+its bootstrap time is scaled up linearly to --boot.
+
+Usage:
+    python -m benchmarks.bench_lead_lag --tickers 20 --features 30 --days 250 --boot 1000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.lead_lag import block_bootstrap_indices, lead_lag_analysis
+
+
+def synthetic_panel(tickers, features, days, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for t in range(tickers):
+        X = rng.normal(size=(days, features)).cumsum(axis=0) * 0.1 + rng.normal(size=(days, features))
+        y = 0.3 * np.r_[0, X[:-1, 0]] + rng.normal(size=days)
+        X[rng.random(X.shape) < 0.02] = np.nan
+        frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(features)])
+        frame["daily_return"] = y
+        frame["date"] = pd.date_range("2024-01-01", periods=days).date
+        frame["ticker"] = f"T{t:03d}"
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def naive(df, features, max_lag, granger_lags, n_boot, block_size, seed=0):
+    rng = np.random.default_rng(seed)
+    t_corr = t_boot = t_granger = 0.0
+    for _, part in df.groupby("ticker"):
+        part = part.sort_values("date").reset_index(drop=True)
+        y = part["daily_return"]
+        for feature in features:
+            x = part[feature]
+            for lag in range(-max_lag, max_lag + 1):
+                start = time.perf_counter()
+                x.corr(y.shift(-lag))
+                t_corr += time.perf_counter() - start
+
+                start = time.perf_counter()
+                shifted = y.shift(-lag)
+                for idx in block_bootstrap_indices(len(part), n_boot, block_size, rng):
+                    x.iloc[idx].reset_index(drop=True).corr(shifted.iloc[idx].reset_index(drop=True))
+                t_boot += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for dep, cause in ((y.to_numpy(), x.to_numpy()), (x.to_numpy(), y.to_numpy())):
+                for p in range(1, granger_lags + 1):
+                    rows = np.column_stack([dep[p:], np.ones(len(dep) - p)]
+                                           + [dep[p - j:len(dep) - j] for j in range(1, p + 1)]
+                                           + [cause[p - j:len(cause) - j] for j in range(1, p + 1)])
+                    rows = rows[np.isfinite(rows).all(axis=1)]
+                    for cols in (p + 1, 2 * p + 1):
+                        np.linalg.lstsq(rows[:, 1:1 + cols], rows[:, 0], rcond=None)
+            t_granger += time.perf_counter() - start
+    return t_corr, t_boot, t_granger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--features", type=int, default=30)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--max-lag", type=int, default=5)
+    parser.add_argument("--granger-lags", type=int, default=5)
+    parser.add_argument("--boot", type=int, default=1000)
+    parser.add_argument("--naive-boot", type=int, default=5, help="resamples actually run by the naive loop")
+    parser.add_argument("--naive-tickers", type=int, default=2, help="tickers actually run by the naive loop")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    df = synthetic_panel(args.tickers, args.features, args.days)
+    features = [f"f{i}" for i in range(args.features)]
+    pairs = args.tickers * args.features * (2 * args.max_lag + 1)
+    print(f"{args.tickers} tickers x {args.features} features x {2 * args.max_lag + 1} lags = {pairs:,} pairs, "
+          f"{args.days} days, {args.boot} bootstrap resamples")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        lead_lag_analysis(df, features, by="ticker", max_lag=args.max_lag, granger_lags=args.granger_lags,
+                          n_boot=args.boot, workers=workers)
+        print(f"  engine, {workers} worker(s): {time.perf_counter() - start:8.2f} s")
+
+    subset = df[df["ticker"].isin(sorted(df["ticker"].unique())[:args.naive_tickers])]
+    t_corr, t_boot, t_granger = naive(subset, features, args.max_lag, args.granger_lags, args.naive_boot, 5)
+    scale = args.tickers / args.naive_tickers
+    estimate = (t_corr + t_boot * args.boot / args.naive_boot + t_granger) * scale
+    print(f"  naive (extrapolated from {args.naive_tickers} tickers, {args.naive_boot} resamples): "
+          f"{estimate:8.1f} s  (corr {t_corr * scale:.1f} s, bootstrap {t_boot * scale * args.boot / args.naive_boot:.1f} s, "
+          f"granger {t_granger * scale:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
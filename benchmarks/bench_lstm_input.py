@@ -0,0 +1,66 @@
+"""
+LSTM training throughput: in-memory arrays vs. the tf.data shard pipeline, across batch sizes.
+
+Usage:
+    python -m benchmarks.bench_lstm_input --rows 200000 --batch-sizes 16 256 1024
+"""
+import argparse
+import tempfile
+
+import numpy as np
+
+from src.lstm_data import count_windows, shard_dataset, write_feature_shards
+from src.lstm_model import build_lstm_model, train_lstm_dataset, train_lstm_model
+from src.sequences import create_sequences
+
+
+def synthetic_features(n, features=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, features), dtype=np.float32)
+    y = (X[:, :1] * 0.5 + rng.random((n, 1), dtype=np.float32) * 0.1).astype(np.float32)
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 256, 1024])
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--rows-per-shard", type=int, default=50_000)
+    args = parser.parse_args()
+
+    X, y = synthetic_features(args.rows)
+    split = int(len(X) * 0.8)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        train_paths = write_feature_shards(X[:split], y[:split], f"{tmp}/train", rows_per_shard=args.rows_per_shard,
+                                           window_size=args.window)
+        val_paths = write_feature_shards(X[split:], y[split:], f"{tmp}/val", rows_per_shard=args.rows_per_shard,
+                                         window_size=args.window)
+        n_train = count_windows(train_paths, args.window)
+
+        for batch_size in args.batch_sizes:
+            X_train, y_train = create_sequences(X[:split], y[:split], args.window, copy=True)
+            X_val, y_val = create_sequences(X[split:], y[split:], args.window, copy=True)
+            model = build_lstm_model((args.window, X.shape[1]))
+            history = train_lstm_model(model, X_train, y_train, X_val, y_val, epochs=args.epochs,
+                                       batch_size=batch_size)
+            results.append(("numpy arrays", batch_size, history.throughput))
+            del X_train, y_train, X_val, y_val
+
+            for cache in (None, "memory"):
+                train_ds = shard_dataset(train_paths, args.window, batch_size, shuffle=True, cache=cache, seed=0)
+                val_ds = shard_dataset(val_paths, args.window, batch_size, cache=cache)
+                model = build_lstm_model((args.window, X.shape[1]))
+                history = train_lstm_dataset(model, train_ds, val_ds, epochs=args.epochs,
+                                             samples_per_epoch=n_train)
+                results.append((f"tf.data shards{' + cache' if cache else ''}", batch_size, history.throughput))
+
+    print(f"\n{'input':<24}{'batch':>7}{'epoch s':>10}{'samples/s':>12}")
+    for name, batch_size, t in results:
+        print(f"{name:<24}{batch_size:>7}{t['mean_epoch_s']:>10.2f}{t['samples_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
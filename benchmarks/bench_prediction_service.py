@@ -0,0 +1,78 @@
+"""
+Prediction latency under concurrent load: one model.predict per request vs. the micro-batching service.
+
+Usage:
+    python -m benchmarks.bench_prediction_service --clients 1 8 32 --requests 200
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from src.backtest import FEATURES, TARGET
+from src.lstm_model import build_lstm_model
+from src.model_artifact import load_model_artifact, save_model_artifact
+from src.prediction_service import PredictionService
+
+
+def make_artifact(root, window_size=10, seed=0):
+    """An untrained model with fitted scalers; latency does not depend on the weights."""
+    rng = np.random.default_rng(seed)
+    X = rng.random((500, len(FEATURES)))
+    model = build_lstm_model((window_size, len(FEATURES)))
+    save_model_artifact(model, MinMaxScaler().fit(X), MinMaxScaler().fit(X[:, :1]), FEATURES, TARGET, window_size,
+                        name="bench", root=root)
+    return load_model_artifact("bench", root=root)
+
+
+def naive_predict(artifact, window):
+    """What a caller does without the service: scale, model.predict, inverse-scale."""
+    X = artifact.scaler_X.transform(window)[None].astype(np.float32)
+    return float(artifact.scaler_y.inverse_transform(artifact.model.predict(X, verbose=0))[0, 0])
+
+
+def run_load(fn, windows, clients):
+    latencies = []
+
+    def call(window):
+        start = time.perf_counter()
+        fn(window)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(call, windows))
+    wall = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99), len(windows) / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        artifact = make_artifact(root)
+        rng = np.random.default_rng(1)
+        windows = [rng.random((artifact.window_size, len(artifact.features))) for _ in range(args.requests)]
+        naive_predict(artifact, windows[0])  # warm-up
+
+        print(f"{'clients':>8}  {'path':<22}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}{'batch':>7}")
+        for clients in args.clients:
+            p50, p99, rps = run_load(lambda w: naive_predict(artifact, w), windows, clients)
+            print(f"{clients:>8}  {'model.predict':<22}{p50:>9.2f}{p99:>9.2f}{rps:>9.0f}{1:>7}")
+            with PredictionService(artifact, args.max_batch, args.max_wait_ms) as service:
+                p50, p99, rps = run_load(service.predict, windows, clients)
+                batch = service.stats()["mean_batch"]
+            print(f"{clients:>8}  {'micro-batching service':<22}{p50:>9.2f}{p99:>9.2f}{rps:>9.0f}{batch:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Collection throughput of the async Reddit collector against a local fake server.
+
+Compares fetching every (subreddit, listing) pair one after another with
+fetching them all concurrently under the shared token bucket.
+
+Usage:
+    python -m benchmarks.bench_reddit_collect --subreddits 4 --limit 600 --latency 0.05
+"""
+import argparse
+import asyncio
+
+from benchmarks.fake_reddit import FakeReddit, client_kwargs, serve
+from src.reddit_async import AsyncRedditClient, TokenBucket, collect_posts_async
+
+
+async def run(args):
+    subreddits = [f"sub{i}" for i in range(args.subreddits)]
+    fake = FakeReddit(posts_per_listing=args.limit, latency=args.latency, quota=args.quota)
+
+    async with serve(fake) as (_, base_url):
+        bucket = TokenBucket(rate=args.qpm / 60, capacity=args.burst)
+        async with AsyncRedditClient(bucket=bucket, **client_kwargs(base_url)) as client:
+            sequential = 0.0
+            for sub in subreddits:
+                for sort in ("new", "hot", "top"):
+                    _, stats = await collect_posts_async(sub, days=None, limit=args.limit, sorts=(sort,),
+                                                         client=client)
+                    sequential += stats["seconds"]
+            seq_requests = client.requests
+
+        bucket = TokenBucket(rate=args.qpm / 60, capacity=args.burst)
+        async with AsyncRedditClient(bucket=bucket, **client_kwargs(base_url)) as client:
+            _, stats = await collect_posts_async(subreddits, days=None, limit=args.limit * 3, client=client)
+
+    print()
+    print(f"{'mode':<12}{'seconds':>10}{'requests':>10}{'posts/s':>10}")
+    total_posts = stats["raw_posts"]
+    print(f"{'sequential':<12}{sequential:>10.2f}{seq_requests:>10}{total_posts / sequential:>10.1f}")
+    print(f"{'concurrent':<12}{stats['seconds']:>10.2f}{stats['requests']:>10}{stats['posts_per_s']:>10.1f}")
+    print(f"speedup: {sequential / stats['seconds']:.2f}x, server 429s: {fake.throttled}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subreddits", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=600, help="posts per listing")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency (s)")
+    parser.add_argument("--qpm", type=float, default=6000, help="client token bucket rate (requests/min)")
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--quota", type=int, default=None, help="server-side quota per minute")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
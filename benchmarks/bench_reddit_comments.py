@@ -0,0 +1,52 @@
+"""
+Comment harvesting throughput against a local fake Reddit server.
+
+Runs the harvester with several worker-pool sizes and compares them with
+the old one-post-at-a-time loop (one request plus a 0.2 s sleep per post).
+
+Usage:
+    python -m benchmarks.bench_reddit_comments --posts 200 --workers 1 4 16 --latency 0.05
+"""
+import argparse
+import asyncio
+
+from benchmarks.fake_reddit import FakeReddit, client_kwargs, serve
+from src.reddit_async import AsyncRedditClient, DataFrameSink, TokenBucket, harvest_comments_async
+
+
+async def run(args):
+    post_ids = [f"p{i:05d}" for i in range(args.posts)]
+    fake = FakeReddit(latency=args.latency)
+    rows = []
+
+    async with serve(fake) as (_, base_url):
+        for workers in args.workers:
+            bucket = TokenBucket(rate=args.qpm / 60, capacity=args.burst)
+            async with AsyncRedditClient(bucket=bucket, **client_kwargs(base_url)) as client:
+                sink, stats = await harvest_comments_async(post_ids, workers=workers,
+                                                           replace_more=args.replace_more,
+                                                           sink=DataFrameSink(), client=client)
+            rows.append((workers, stats, len(sink.result())))
+
+    old_loop = args.posts * (args.latency + 0.2)
+    print()
+    print(f"{'workers':<10}{'seconds':>10}{'requests':>10}{'posts/s':>10}{'comments/s':>12}{'vs old loop':>13}")
+    print(f"{'old loop':<10}{old_loop:>10.2f}{args.posts:>10}{args.posts / old_loop:>10.1f}{'-':>12}{1.0:>12.1f}x")
+    for workers, stats, _ in rows:
+        print(f"{workers:<10}{stats['seconds']:>10.2f}{stats['requests']:>10}{stats['posts_per_s']:>10.1f}"
+              f"{stats['comments_per_s']:>12.1f}{old_loop / stats['seconds']:>12.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--replace-more", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency (s)")
+    parser.add_argument("--qpm", type=float, default=60000, help="client token bucket rate (requests/min)")
+    parser.add_argument("--burst", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
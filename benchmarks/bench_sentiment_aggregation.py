@@ -0,0 +1,93 @@
+"""
+Single-pass daily sentiment aggregation vs. the original groupby/merge chain.
+
+Usage:
+    python -m benchmarks.bench_sentiment_aggregation --rows 1000000 5000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.sentiment_aggregation import LABELS, aggregate_daily_sentiment
+
+
+def synthetic_scored_posts(n, days=365, subreddits=8, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, days, n), unit="D")
+    return pd.DataFrame({
+        "date": dates.date,
+        "subreddit": pd.Categorical.from_codes(rng.integers(0, subreddits, n),
+                                               [f"sub{i}" for i in range(subreddits)]),
+        "label": pd.Categorical.from_codes(rng.integers(0, 3, n), list(LABELS)),
+        "finbert_score": rng.random(n),
+    })
+
+
+def legacy_daily_stats(sentiment_df):
+    """Phase 2 of main.py before the aggregation module (kept for comparison)."""
+    sentiment_df = sentiment_df.copy()
+    sentiment_mapping = {'positive': 1, 'neutral': 0, 'negative': -1}
+    sentiment_df['sentiment_score'] = sentiment_df['label'].astype(str).map(sentiment_mapping)
+    grouped = sentiment_df.groupby('date')
+
+    sentiment_avg = grouped['sentiment_score'].mean().reset_index()
+    sentiment_std = grouped['sentiment_score'].std().reset_index()
+    post_count = grouped['sentiment_score'].count().reset_index()
+    finbert_confidence_mean = grouped['finbert_score'].mean().reset_index()
+
+    daily_stats = sentiment_avg.rename(columns={'sentiment_score': 'sentiment_avg'})
+    daily_stats = daily_stats.merge(sentiment_std.rename(columns={'sentiment_score': 'sentiment_std'}), on='date', how='left')
+    daily_stats = daily_stats.merge(post_count.rename(columns={'sentiment_score': 'post_count'}), on='date', how='left')
+    daily_stats = daily_stats.merge(finbert_confidence_mean.rename(columns={'finbert_score': 'finbert_confidence'}), on='date', how='left')
+
+    sentiment_counts = sentiment_df.groupby('date')['label'].value_counts().unstack(fill_value=0)
+    sentiment_counts = sentiment_counts.reindex(columns=['positive', 'negative', 'neutral'], fill_value=0)
+    daily_stats = daily_stats.merge(sentiment_counts.reset_index(), on='date', how='left')
+    daily_stats = daily_stats.rename(columns={'positive': 'positive_count', 'negative': 'negative_count',
+                                              'neutral': 'neutral_count'})
+
+    daily_stats['total_posts'] = daily_stats['post_count']
+    daily_stats['%pos'] = daily_stats['positive_count'] / daily_stats['total_posts']
+    daily_stats['%neg'] = daily_stats['negative_count'] / daily_stats['total_posts']
+    daily_stats['%neu'] = daily_stats['neutral_count'] / daily_stats['total_posts']
+    daily_stats = daily_stats.sort_values('date')
+    daily_stats['sentiment_momentum'] = daily_stats['sentiment_avg'].diff()
+    daily_stats['sentiment_std'] = daily_stats['sentiment_std'].fillna(0)
+    return daily_stats
+
+
+def measure(fn, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'engine':<22}{'seconds':>9}{'peak MiB':>10}{'max abs diff':>14}")
+    for n in args.rows:
+        posts = synthetic_scored_posts(n, seed=args.seed)
+        legacy, t_legacy, m_legacy = measure(legacy_daily_stats, posts)
+        new, t_new, m_new = measure(aggregate_daily_sentiment, posts)
+        _, t_sub, m_sub = measure(aggregate_daily_sentiment, posts, keys=('subreddit', 'date'))
+
+        columns = [c for c in new.columns if c != 'date']
+        diff = np.nanmax(np.abs(legacy[columns].to_numpy(float) - new[columns].to_numpy(float)))
+        print(f"{n:>10}  {'legacy groupby+merge':<22}{t_legacy:>9.3f}{m_legacy:>10.1f}{'-':>14}")
+        print(f"{n:>10}  {'single pass (date)':<22}{t_new:>9.3f}{m_new:>10.1f}{diff:>14.2e}")
+        print(f"{n:>10}  {'single pass (sub,date)':<22}{t_sub:>9.3f}{m_sub:>10.1f}{'-':>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+LSTM window building: the original append loop vs. the strided view in src.sequences.
+
+Usage:
+    python -m benchmarks.bench_sequences --rows 10000 100000 1000000 --windows 10 30 60
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.sequences import create_sequences, iter_sequence_batches
+
+
+def legacy_create_sequences(X, y, window_size=10):
+    """run_lstm.create_sequences before the sequences module (kept for comparison)."""
+    Xs, ys = [], []
+    for i in range(len(X) - window_size):
+        Xs.append(X[i:i+window_size])
+        ys.append(y[i+window_size])
+    return np.array(Xs), np.array(ys)
+
+
+def consume_batches(X, y, window_size, batch_size=256):
+    n = 0
+    for X_batch, _ in iter_sequence_batches(X, y, window_size, batch_size):
+        n += len(X_batch)
+    return n
+
+
+def measure(fn, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--features", type=int, default=8)
+    parser.add_argument("--max-legacy-mb", type=float, default=2048,
+                        help="skip the loop when its output would exceed this size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'rows':>10}{'window':>8}  {'builder':<18}{'seconds':>9}{'peak MiB':>10}")
+    for n in args.rows:
+        X = rng.random((n, args.features))
+        y = rng.random((n, 1))
+        for w in args.windows:
+            out_mb = (n - w) * w * args.features * 8 / 2**20
+            if out_mb <= args.max_legacy_mb:
+                _, t, m = measure(legacy_create_sequences, X, y, w)
+                print(f"{n:>10}{w:>8}  {'legacy loop':<18}{t:>9.3f}{m:>10.1f}")
+            else:
+                print(f"{n:>10}{w:>8}  {'legacy loop':<18}{'skipped':>9}{out_mb:>10.0f}")
+            _, t, m = measure(create_sequences, X, y, w)
+            print(f"{n:>10}{w:>8}  {'view':<18}{t:>9.4f}{m:>10.1f}")
+            if out_mb <= args.max_legacy_mb:
+                _, t, m = measure(create_sequences, X, y, w, copy=True)
+                print(f"{n:>10}{w:>8}  {'view + copy':<18}{t:>9.3f}{m:>10.1f}")
+            _, t, m = measure(consume_batches, X, y, w)
+            print(f"{n:>10}{w:>8}  {'lazy batches':<18}{t:>9.3f}{m:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Trading-session alignment vs. the calendar-date inner join with the stock bars.
+
+Synthetic posts spread uniformly over two years are aggregated per day and
+joined to one bar per NYSE session. The date join (the old merge) loses
+every weekend/holiday post; the session alignment (np.searchsorted against
+the session closes, and pd.merge_asof for reference) keeps them all.
+
+Usage:
+    python -m benchmarks.bench_session_alignment --posts 100000 1000000 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.market_calendar import assign_sessions, trading_sessions
+from src.sentiment_aggregation import LABELS, aggregate_daily_sentiment, aggregate_session_sentiment
+
+
+def synthetic_posts(n, days=730, seed=0):
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp("2023-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s")
+    return pd.DataFrame({
+        "created_utc": created,
+        "label": np.array(LABELS)[rng.integers(0, 3, n)],
+        "finbert_score": rng.uniform(0.34, 1.0, n),
+    })
+
+
+def date_join(posts, stock):
+    posts = posts.assign(date=posts["created_utc"].dt.date)
+    daily = aggregate_daily_sentiment(posts, keys=('date',))
+    return daily.merge(stock, on='date', how='inner')
+
+
+def session_join(posts, stock):
+    daily = aggregate_session_sentiment(posts, cutoff="close")
+    return daily.merge(stock, on='date', how='inner')
+
+
+def merge_asof_sessions(posts, sessions):
+    """The same alignment through pd.merge_asof (needs the posts sorted)."""
+    left = posts[["created_utc"]].sort_values("created_utc")
+    right = sessions[["close", "session"]].rename(columns={"close": "created_utc"})
+    return pd.merge_asof(left, right, on="created_utc", direction="forward", allow_exact_matches=False)["session"]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    sessions = trading_sessions("2022-12-25", "2025-01-15")
+    stock = pd.DataFrame({"date": pd.DatetimeIndex(sessions["session"]).date, "Close": 1.0})
+
+    for n in args.posts:
+        posts = synthetic_posts(n)
+        by_date, t_date = timed(date_join, posts, stock)
+        by_session, t_session = timed(session_join, posts, stock)
+        searched, t_search = timed(assign_sessions, posts["created_utc"], sessions)
+        asof, t_asof = timed(merge_asof_sessions, posts, sessions)
+
+        # Same assignment either way.
+        order = np.argsort(posts["created_utc"].to_numpy(), kind="stable")
+        np.testing.assert_array_equal(searched[order], asof.to_numpy("datetime64[ns]"))
+
+        print(f"{n:,} posts")
+        print(f"  date join      {t_date:8.3f}s  posts kept {by_date['post_count'].sum() / n:7.2%}"
+              f"  sessions {len(by_date)}")
+        print(f"  session join   {t_session:8.3f}s  posts kept {by_session['post_count'].sum() / n:7.2%}"
+              f"  sessions {len(by_session)}")
+        print(f"  searchsorted   {t_search:8.3f}s  ({t_search / n * 1e9:6.1f} ns/post)")
+        print(f"  merge_asof     {t_asof:8.3f}s  (includes sorting the posts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Startup cost of the CLI entry points, from `python -X importtime` in fresh interpreters.
+
+For each target the import tree is parsed, the slowest modules are listed
+and heavy frameworks that should only load inside a command are flagged.
+Exits with status 1 when a target imports one of them or exceeds --max-ms,
+so it can run as a regression check.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --top 15 --max-ms 800
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each short job pays before doing any work.
+TARGETS = {
+    "import main": ["-c", "import main"],
+    "main.py --help": ["main.py", "--help"],
+    "main.py train --help": ["main.py", "train", "--help"],
+    "import src.stages": ["-c", "import src.stages"],
+    "import src.fanout": ["-c", "import src.fanout"],
+    "import src.reddit_scraper": ["-c", "import src.reddit_scraper"],
+}
+
+HEAVY = ("torch", "transformers", "tensorflow", "keras", "matplotlib", "seaborn", "scipy", "praw", "yfinance")
+
+
+def importtime(args):
+    """Wall time of one run and its import tree as {module: (self_us, cumulative_us)}."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, "PYTHONPATH": ROOT})
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per target; the median wall time is reported")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules listed per target")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail when a target's median wall time is above")
+    args = parser.parse_args()
+
+    baseline = statistics.median(importtime(["-c", "pass"])[0] for _ in range(args.repeat))
+    print(f"bare interpreter: {baseline * 1e3:.0f} ms")
+
+    failures = []
+    for target in args.targets:
+        runs = [importtime(TARGETS[target]) for _ in range(args.repeat)]
+        wall = statistics.median(r[0] for r in runs)
+        modules = runs[-1][1]
+        heavy = sorted({name.split(".")[0] for name in modules if name.split(".")[0] in HEAVY})
+        imports_ms = sum(self_us for self_us, _ in modules.values()) / 1e3
+
+        print(f"\n{target}: {wall * 1e3:.0f} ms wall ({(wall - baseline) * 1e3:+.0f} ms over bare), "
+              f"{len(modules)} modules, {imports_ms:.0f} ms importing")
+        for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: -m[1][1])[:args.top]:
+            print(f"  {cumulative_us / 1e3:8.1f} ms cumulative {self_us / 1e3:7.1f} ms self  {name}")
+        if heavy:
+            print(f"  HEAVY imports: {', '.join(heavy)}")
+            failures.append(f"{target} imports {', '.join(heavy)}")
+        if args.max_ms is not None and wall * 1e3 > args.max_ms:
+            failures.append(f"{target} took {wall * 1e3:.0f} ms > {args.max_ms:.0f} ms")
+
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nOK: no heavy framework is imported at startup")
+
+
+if __name__ == "__main__":
+    main()
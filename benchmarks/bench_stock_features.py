@@ -0,0 +1,107 @@
+"""
+Stock features for thousands of tickers: per-ticker pandas, the wide NumPy
+layout, and one appended day through the incremental tail state, both on
+its own and end to end through incremental_stock_features (cache read,
+revision checks, appended Parquet part and state file), for the whole
+history and for the trailing --lookback days the pipeline asks for.
+
+Usage:
+    python -m benchmarks.bench_stock_features --tickers 1000 5000 --days 750
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.stock_features import STOCK_FEATURES, StockFeatureState, compute_stock_features, incremental_stock_features
+
+
+def synthetic_bars(n_tickers, days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=days)
+    n = n_tickers * days
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_tickers, days)), axis=1)).ravel()
+    open_ = close * (1 + rng.normal(0, 0.01, n))
+    return pd.DataFrame({
+        "ticker": np.repeat([f"T{i:05d}" for i in range(n_tickers)], days),
+        "date": np.tile(dates.values, n_tickers),
+        "Open": open_,
+        "Close": close,
+        "High": np.maximum(open_, close) * 1.01,
+        "Low": np.minimum(open_, close) * 0.99,
+        "Volume": rng.integers(1_000, 1_000_000, n).astype(np.float64),
+    })
+
+
+def pandas_features(bars, window):
+    """The old path: add_stock_metrics-style pandas ops, one ticker at a time."""
+    frames = []
+    for _, df in bars.groupby("ticker", sort=True):
+        df = df.sort_values("date").copy()
+        df["daily_return"] = (df["Close"] - df["Open"]) / df["Open"]
+        df["volatility"] = abs(df["High"] - df["Low"]) / df["Open"]
+        df["price_change"] = df["Close"].pct_change()
+        df["volume_ma"] = df["Volume"].rolling(window=window).mean()
+        df["volume_spike"] = df["Volume"] / df["volume_ma"]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--lookback", type=int, default=30, help="Sessions requested by the windowed incremental run")
+    args = parser.parse_args()
+
+    for n_tickers in args.tickers:
+        bars = synthetic_bars(n_tickers, args.days + 1)
+        last_day = bars["date"].max()
+        history, today = bars[bars["date"] < last_day], bars[bars["date"] == last_day]
+
+        reference, t_pandas = timed(pandas_features, bars, args.window)
+        wide, t_wide = timed(compute_stock_features, bars, args.window)
+        state, t_state = timed(StockFeatureState.from_history, history, args.window)
+        appended, t_append = timed(state.update, today)
+        _, t_recompute = timed(compute_stock_features, bars, args.window)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            _, t_cold = timed(incremental_stock_features, history, cache_dir, args.window)
+            cached, t_cached = timed(incremental_stock_features, bars, cache_dir, args.window)
+        recent = bars["date"] >= np.sort(bars["date"].unique())[-args.lookback]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            incremental_stock_features(history, cache_dir, args.window)
+            windowed, t_windowed = timed(incremental_stock_features, bars[recent], cache_dir, args.window)
+
+        np.testing.assert_allclose(wide[STOCK_FEATURES].to_numpy(), reference[STOCK_FEATURES].to_numpy(),
+                                   rtol=1e-12, equal_nan=True)
+        expected = wide[wide["date"] == last_day].sort_values("ticker")
+        np.testing.assert_allclose(appended.sort_values("ticker")[STOCK_FEATURES].to_numpy(),
+                                   expected[STOCK_FEATURES].to_numpy(), rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(cached[STOCK_FEATURES].to_numpy(), wide[STOCK_FEATURES].to_numpy(),
+                                   rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(windowed[STOCK_FEATURES].to_numpy(), wide[recent][STOCK_FEATURES].to_numpy(),
+                                   rtol=1e-9, equal_nan=True)
+
+        print(f"{n_tickers:,} tickers x {args.days + 1} days ({len(bars):,} bars), volume window {args.window}")
+        print(f"  full, per-ticker pandas   {t_pandas:8.3f}s")
+        print(f"  full, wide NumPy          {t_wide:8.3f}s  ({t_pandas / t_wide:5.1f}x)")
+        print(f"  state from history        {t_state:8.3f}s  (once)")
+        print(f"  append one day            {t_append * 1e3:8.3f} ms  vs full recompute {t_recompute:.3f}s "
+              f"({t_recompute / t_append:,.0f}x)")
+        print(f"  incremental, cold cache   {t_cold:8.3f}s  (full compute + cache rewrite)")
+        print(f"  incremental, append day   {t_cached:8.3f}s  vs cold cache ({t_cold / t_cached:4.1f}x)")
+        print(f"  same, last {args.lookback:>3} sessions   {t_windowed:8.3f}s  vs cold cache "
+              f"({t_cold / t_windowed:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
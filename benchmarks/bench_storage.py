@@ -0,0 +1,123 @@
+"""
+Load time and peak RSS of the scored-post artifact: CSV vs. Parquet vs. memory-mapped Arrow.
+
+Every load runs in a fresh process, so peak RSS is that load's own.
+
+Usage:
+    python -m benchmarks.bench_storage --rows 100000 1000000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.sentiment_aggregation import LABELS
+from src.storage import read_arrow, read_table, write_arrow, write_table
+
+AGG_COLUMNS = ['date', 'label', 'finbert_score']
+WORDS = np.array("tesla deliveries beat estimates model delivery stock earnings margin robotaxi "
+                 "cybertruck recall guidance shares factory battery price cut demand".split())
+
+
+def synthetic_sentiment_posts(n, days=100, seed=0):
+    """Scored posts in the score stage's layout, with realistic-length selftext."""
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s")
+    lengths = rng.integers(0, 120, n)
+    words = WORDS[rng.integers(0, len(WORDS), int(lengths.sum()))]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    selftext = [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(n)]
+    return pd.DataFrame({
+        "id": [f"p{i:08d}" for i in range(n)],
+        "title": [" ".join(WORDS[rng.integers(0, len(WORDS), 8)]) for _ in range(n)],
+        "selftext": selftext,
+        "score": rng.integers(0, 5000, n),
+        "num_comments": rng.integers(0, 500, n),
+        "created_utc": created,
+        "subreddit": "teslamotors",
+        "date": created.date,
+        "label": rng.choice(list(LABELS), n),
+        "finbert_score": rng.random(n),
+    })
+
+
+def _size_mb(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 2**20
+    return os.path.getsize(path) / 2**20
+
+
+def _load(case, paths, since):
+    if case == "csv (full)":
+        return pd.read_csv(paths["csv"], parse_dates=["created_utc", "date"])
+    if case == "csv (usecols)":
+        return pd.read_csv(paths["csv"], usecols=["date", "label", "finbert_score"], parse_dates=["date"])
+    if case == "parquet (full)":
+        return read_table(paths["parquet"])
+    if case == "parquet (projected)":
+        return read_table(paths["parquet"], columns=AGG_COLUMNS)
+    if case == "parquet (proj+last 7d)":
+        return read_table(paths["parquet"], columns=AGG_COLUMNS, filters=[("date", ">=", since)])
+    if case == "arrow mmap (projected)":
+        return read_arrow(paths["arrow"], columns=AGG_COLUMNS)
+    raise ValueError(case)
+
+
+def _peak_rss_mb():
+    # ru_maxrss survives the exec of a spawned worker and would report the
+    # parent's peak; VmHWM belongs to the new address space.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _timed_load(case, paths, since):
+    base = _peak_rss_mb()
+    start = time.perf_counter()
+    rows = len(_load(case, paths, since))
+    elapsed = time.perf_counter() - start
+    return elapsed, _peak_rss_mb() - base, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cases = ["csv (full)", "csv (usecols)", "parquet (full)", "parquet (projected)",
+             "parquet (proj+last 7d)", "arrow mmap (projected)"]
+    ctx = mp.get_context("spawn")
+
+    print(f"{'rows':>10}  {'load':<24}{'seconds':>9}{'RSS +MiB':>10}{'rows read':>11}{'disk MiB':>10}")
+    for n in args.rows:
+        posts = synthetic_sentiment_posts(n, seed=args.seed)
+        since = posts["date"].max() - timedelta(days=6)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {"csv": os.path.join(tmp, "sentiment.csv"),
+                     "parquet": os.path.join(tmp, "sentiment.parquet"),
+                     "arrow": os.path.join(tmp, "sentiment.arrow")}
+            write_table(posts, paths["parquet"], partition_cols=["date"], csv_path=paths["csv"])
+            write_arrow(posts, paths["arrow"])
+            del posts
+
+            for case in cases:
+                fmt = case.split()[0]
+                with ctx.Pool(1, maxtasksperchild=1) as pool:
+                    elapsed, rss, rows = pool.apply(_timed_load, (case, paths, since))
+                print(f"{n:>10}  {case:<24}{elapsed:>9.3f}{rss:>10.1f}{rows:>11}{_size_mb(paths[fmt]):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
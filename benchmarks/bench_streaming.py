@@ -0,0 +1,79 @@
+"""
+Incremental rolling sentiment vs. re-aggregating every post after each micro-batch.
+
+Both sides see the same pre-labelled posts arriving in batches; FinBERT is
+left out so only the aggregation cost is measured.
+
+Usage:
+    python -m benchmarks.bench_streaming --posts 20000 100000 --batch 32
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.sentiment_aggregation import LABELS, aggregate_daily_sentiment
+from src.streaming import RollingSentiment
+
+
+def synthetic_stream(n, days=100, seed=0):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, days * 86400, n))
+    created = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(seconds, unit="s")
+    return pd.DataFrame({
+        "created_utc": created,
+        "date": created.date,
+        "label": np.array(LABELS)[rng.integers(0, 3, n)],
+        "finbert_score": rng.uniform(0.34, 1.0, n),
+    })
+
+
+def run_incremental(posts, batch):
+    daily = RollingSentiment("D")
+    latencies = []
+    records = list(zip(posts["created_utc"], posts["label"], posts["finbert_score"]))
+    for i in range(0, len(records), batch):
+        start = time.perf_counter()
+        for created, label, score in records[i:i + batch]:
+            daily.update(created, label, score)
+        daily.current()
+        latencies.append(time.perf_counter() - start)
+    return daily, np.array(latencies)
+
+
+def run_recompute(posts, batch):
+    latencies = []
+    for i in range(batch, len(posts) + batch, batch):
+        start = time.perf_counter()
+        result = aggregate_daily_sentiment(posts.iloc[:i])
+        latencies.append(time.perf_counter() - start)
+    return result, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    for n in args.posts:
+        posts = synthetic_stream(n)
+        daily, inc = run_incremental(posts, args.batch)
+        full, rec = run_recompute(posts, args.batch)
+
+        # Same numbers as the batch aggregation.
+        streamed = daily.buckets()
+        np.testing.assert_allclose(streamed["sentiment_avg"], full["sentiment_avg"])
+        np.testing.assert_allclose(streamed["sentiment_std"], full["sentiment_std"], atol=1e-9)
+        np.testing.assert_allclose(streamed["%pos"], full["%pos"])
+        np.testing.assert_allclose(streamed["sentiment_momentum"].iloc[1:], full["sentiment_momentum"].iloc[1:])
+
+        print(f"{n:,} posts, {len(inc)} batches of {args.batch}")
+        for name, lat in (("incremental", inc), ("recompute", rec)):
+            print(f"  {name:11s} total {lat.sum():8.3f}s  per batch p50 {np.percentile(lat, 50) * 1e3:8.3f} ms"
+                  f"  p99 {np.percentile(lat, 99) * 1e3:8.3f} ms  last {lat[-1] * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Local fake of the Reddit OAuth JSON API for collector benchmarks.
+
+Serves deterministic synthetic listings with configurable latency and
+X-Ratelimit headers, so the async collector can be exercised without
+network access or credentials.
+
+Usage:
+    python -m benchmarks.fake_reddit --port 8765
+"""
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+WORDS = ("tesla", "stock", "delivery", "earnings", "model", "robotaxi", "price",
+         "quarter", "guidance", "margin", "recall", "update", "fsd", "battery")
+
+
+class FakeReddit:
+    """
+    Args:
+        posts_per_listing: Number of posts available in every listing
+        latency: Seconds of simulated server latency per request
+        quota: Requests allowed per window before answering 429 (None disables)
+        window: Quota window in seconds
+        seed: Seed for the synthetic content
+    """
+
+    def __init__(self, posts_per_listing=1000, latency=0.05, quota=None, window=60.0, seed=0):
+        self.posts_per_listing = posts_per_listing
+        self.latency = latency
+        self.quota = quota
+        self.window = window
+        self.seed = seed
+        self.requests = 0
+        self.throttled = 0
+        self._window_start = time.monotonic()
+        self._window_used = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/api/v1/access_token", self.token)
+        app.router.add_get("/r/{subreddit}/search", self.listing)
+        app.router.add_get("/r/{subreddit}/{sort}", self.listing)
+        app.router.add_get("/comments/{post_id}", self.comments)
+        app.router.add_get("/api/morechildren", self.morechildren)
+        return app
+
+    async def token(self, request):
+        return web.json_response({"access_token": "fake-token", "token_type": "bearer", "expires_in": 3600})
+
+    def _ratelimit(self):
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start, self._window_used = now, 0
+        self._window_used += 1
+        self.requests += 1
+        if self.quota is None:
+            return {}, False
+        reset = self.window - (now - self._window_start)
+        headers = {
+            "X-Ratelimit-Used": str(self._window_used),
+            "X-Ratelimit-Remaining": str(max(0, self.quota - self._window_used)),
+            "X-Ratelimit-Reset": f"{reset:.0f}",
+        }
+        return headers, self._window_used > self.quota
+
+    def post(self, subreddit, sort, index):
+        rng = random.Random(f"{self.seed}:{subreddit}:{sort}:{index}")
+        # Listings overlap (same id space per subreddit) like real new/hot/top pages do.
+        post_index = index if sort in ("new", "search") else rng.randrange(self.posts_per_listing)
+        rng = random.Random(f"{self.seed}:{subreddit}:{post_index}")
+        return {
+            "id": f"{subreddit}{post_index:06x}",
+            "created_utc": time.time() - post_index * 600,
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(4, 12))),
+            "selftext": " ".join(rng.choices(WORDS, k=rng.choice([0, 20, 120]))),
+            "score": rng.randint(0, 5000),
+            "upvote_ratio": round(rng.random(), 2),
+            "num_comments": rng.randint(0, 300),
+            "url": f"https://example.invalid/{post_index}",
+            "permalink": f"/r/{subreddit}/comments/{post_index:06x}/",
+        }
+
+    async def listing(self, request):
+        headers, throttled = self._ratelimit()
+        await asyncio.sleep(self.latency)
+        if throttled:
+            self.throttled += 1
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers=headers)
+
+        subreddit = request.match_info["subreddit"]
+        sort = request.match_info.get("sort", "search")
+        limit = int(request.query.get("limit", 25))
+        after = request.query.get("after")
+        start = int(after.split("_")[-1]) + 1 if after else 0
+        stop = min(start + limit, self.posts_per_listing)
+
+        children = [{"kind": "t3", "data": self.post(subreddit, sort, i)} for i in range(start, stop)]
+        next_after = f"t3_{stop - 1}" if stop < self.posts_per_listing else None
+        return web.json_response({"kind": "Listing", "data": {"children": children, "after": next_after}},
+                                 headers=headers)
+
+    def comment(self, post_id, index, parent):
+        rng = random.Random(f"{self.seed}:comment:{post_id}:{index}")
+        return {"kind": "t1", "data": {
+            "id": f"{post_id}c{index}",
+            "body": " ".join(rng.choices(WORDS, k=rng.randint(3, 30))),
+            "score": rng.randint(-5, 500),
+            "created_utc": time.time() - rng.randint(0, 86400),
+            "parent_id": parent,
+            "replies": "",
+        }}
+
+    def comment_count(self, post_id):
+        return random.Random(f"{self.seed}:comments:{post_id}").randint(0, 60)
+
+    async def comments(self, request):
+        headers, throttled = self._ratelimit()
+        await asyncio.sleep(self.latency)
+        if throttled:
+            self.throttled += 1
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers=headers)
+
+        # The first 20 comments are returned inline (every fifth with one nested
+        # reply); the rest sit behind a 'more' stub, as on real threads.
+        post_id = request.match_info["post_id"]
+        total = self.comment_count(post_id)
+        inline = min(total, 20)
+        children = []
+        i = 0
+        while i < inline:
+            top = self.comment(post_id, i, f"t3_{post_id}")
+            if i % 5 == 0 and i + 1 < inline:
+                reply = self.comment(post_id, i + 1, f"t1_{post_id}c{i}")
+                top["data"]["replies"] = {"kind": "Listing", "data": {"children": [reply]}}
+                i += 1
+            children.append(top)
+            i += 1
+        if total > inline:
+            children.append({"kind": "more", "data": {
+                "count": total - inline,
+                "children": [f"{post_id}c{j}" for j in range(inline, total)],
+            }})
+
+        post = {"kind": "Listing", "data": {"children": [{"kind": "t3", "data": {"id": post_id}}]}}
+        comments = {"kind": "Listing", "data": {"children": children}}
+        return web.json_response([post, comments], headers=headers)
+
+    async def morechildren(self, request):
+        headers, throttled = self._ratelimit()
+        await asyncio.sleep(self.latency)
+        if throttled:
+            self.throttled += 1
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers=headers)
+
+        post_id = request.query["link_id"].split("_", 1)[1]
+        things = [
+            self.comment(post_id, int(cid.rsplit("c", 1)[1]), f"t3_{post_id}")
+            for cid in request.query["children"].split(",") if cid
+        ]
+        return web.json_response({"json": {"errors": [], "data": {"things": things}}}, headers=headers)
+
+
+@asynccontextmanager
+async def serve(fake=None, host="127.0.0.1", port=0):
+    """Run a FakeReddit app for the duration of the block and yield (fake, base_url)."""
+    fake = fake or FakeReddit()
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    try:
+        yield fake, f"http://{host}:{bound_port}"
+    finally:
+        await runner.cleanup()
+
+
+def client_kwargs(base_url):
+    """AsyncRedditClient keyword arguments that point it at a fake server."""
+    return {
+        "client_id": "fake",
+        "client_secret": "fake",
+        "base_url": base_url,
+        "auth_url": f"{base_url}/api/v1/access_token",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--quota", type=int, default=None)
+    args = parser.parse_args()
+    fake = FakeReddit(latency=args.latency, quota=args.quota)
+    web.run_app(fake.app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
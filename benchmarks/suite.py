@@ -0,0 +1,398 @@
+"""
+End-to-end benchmark suite on seeded synthetic data, with regression gates.
+
+Times every pipeline stage (scraping against the fake Reddit server, FinBERT
+scoring with a tiny local model, session aggregation, stock features and
+merge, window batching, one LSTM epoch) at each size. The synthetic inputs
+are generated in one process and the stage runs in a fresh one that only
+loads them, so the memory figure gated is what the stage itself adds.
+Results are compared with a JSON baseline; the exit status is 1 when a
+stage got slower or bigger than the tolerances allow.
+
+Usage:
+    python -m benchmarks.suite --sizes 1k 100k 10m --update-baseline   # record a baseline
+    python -m benchmarks.suite --sizes 1k 100k                         # gate against it
+    python -m benchmarks.suite --stages aggregate merge --time-tolerance 0.5
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import WORDS, synthetic_ohlcv, synthetic_posts
+from src.storage import read_table, write_table
+
+BASELINE = "benchmarks/baseline.json"
+SIZES = ("1k", "100k", "10m")
+WINDOW_SIZE = 10
+N_FEATURES = 8
+POSTS_PER_DAY = 400
+BARS_PER_TICKER = 2500
+
+
+class Skip(Exception):
+    """A case that cannot run here (missing framework, size above the stage's cap)."""
+
+
+def parse_size(size):
+    """'1k' -> 1000, '10m' -> 10_000_000."""
+    size = str(size).lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(size[-1], 1)
+    return int(float(size[:-1] if scale > 1 else size) * scale)
+
+
+def _require(*modules):
+    import importlib.util
+    missing = [m for m in modules if importlib.util.find_spec(m) is None]
+    if missing:
+        raise Skip(f"{', '.join(missing)} not installed")
+
+
+# Every stage is (setup(rows, workdir), load(rows, workdir) -> state, run(state) -> rows processed).
+# setup runs in its own process and writes the synthetic inputs to workdir; the measured
+# process only loads them (and imports the stage's framework), so the generators' memory
+# never shows up in the stage's numbers. Only run() is timed.
+
+def setup_scrape(rows, workdir):
+    _require("aiohttp")
+
+
+def load_scrape(rows, workdir):
+    import benchmarks.fake_reddit  # noqa: F401  (aiohttp)
+    return rows
+
+
+def run_scrape(rows):
+    from benchmarks.fake_reddit import FakeReddit, client_kwargs, serve
+    from src.reddit_async import TokenBucket, collect_posts_async
+
+    async def collect():
+        fake = FakeReddit(posts_per_listing=rows, latency=0.0)
+        async with serve(fake) as (_, base_url):
+            bucket = TokenBucket(rate=1e6, capacity=1000)
+            df, _ = await collect_posts_async("teslamotors", days=None, limit=rows, sorts=("new",), bucket=bucket,
+                                              **client_kwargs(base_url))
+        return len(df)
+
+    return asyncio.run(collect())
+
+
+def tiny_finbert(path):
+    """Save a randomly initialized 2-layer BERT with FinBERT's labels and a vocabulary of WORDS to path."""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+
+    torch.manual_seed(0)
+    os.makedirs(path, exist_ok=True)
+    vocab = os.path.join(path, "vocab.txt")
+    with open(vocab, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *WORDS]) + "\n")
+    BertTokenizer(vocab).save_pretrained(path)
+    config = BertConfig(vocab_size=len(WORDS) + 5, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64, num_labels=3,
+                        id2label={0: "positive", 1: "negative", 2: "neutral"},
+                        label2id={"positive": 0, "negative": 1, "neutral": 2})
+    BertForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+def setup_finbert(rows, workdir):
+    _require("torch", "transformers")
+    write_table(synthetic_posts(rows), os.path.join(workdir, "posts.parquet"))
+    tiny_finbert(os.path.join(workdir, "tiny-finbert"))
+
+
+def load_finbert(rows, workdir):
+    import src.finbert_sentiment  # noqa: F401  (torch, transformers)
+    return read_table(os.path.join(workdir, "posts.parquet")), os.path.join(workdir, "tiny-finbert")
+
+
+def run_finbert(state):
+    from src.finbert_sentiment import analyze_finbert_sentiment
+    posts, model = state
+    return len(analyze_finbert_sentiment(posts, model_name=model))
+
+
+def setup_aggregate(rows, workdir):
+    posts = synthetic_posts(rows, days=max(rows // POSTS_PER_DAY, 30), text=False, scored=True)
+    write_table(posts, os.path.join(workdir, "posts.parquet"))
+
+
+def load_aggregate(rows, workdir):
+    return read_table(os.path.join(workdir, "posts.parquet"), columns=["date", "created_utc", "label", "finbert_score"])
+
+
+def run_aggregate(posts):
+    from src.sentiment_aggregation import aggregate_session_sentiment
+    aggregate_session_sentiment(posts)
+    return len(posts)
+
+
+def setup_merge(rows, workdir):
+    days = min(rows, BARS_PER_TICKER)
+    bars = synthetic_ohlcv(days, tickers=max(rows // days, 1))
+    rng = np.random.default_rng(1)
+    daily = bars[["ticker", "date"]].assign(sentiment_score=rng.uniform(-1, 1, len(bars)),
+                                            post_count=rng.integers(1, 500, len(bars)))
+    write_table(bars, os.path.join(workdir, "bars.parquet"))
+    write_table(daily, os.path.join(workdir, "daily.parquet"))
+
+
+def load_merge(rows, workdir):
+    return read_table(os.path.join(workdir, "bars.parquet")), read_table(os.path.join(workdir, "daily.parquet"))
+
+
+def run_merge(state):
+    from src.stock_features import compute_stock_features
+    bars, daily = state
+    return len(pd.merge(daily, compute_stock_features(bars), on=["ticker", "date"], how="inner"))
+
+
+def setup_sequences(rows, workdir):
+    rng = np.random.default_rng(0)
+    np.save(os.path.join(workdir, "X.npy"), rng.standard_normal((rows + WINDOW_SIZE, N_FEATURES), dtype=np.float32))
+    np.save(os.path.join(workdir, "y.npy"), rng.standard_normal(rows + WINDOW_SIZE, dtype=np.float32))
+
+
+def load_sequences(rows, workdir):
+    return np.load(os.path.join(workdir, "X.npy")), np.load(os.path.join(workdir, "y.npy"))
+
+
+def run_sequences(state):
+    from src.sequences import iter_sequence_batches
+    X, y = state
+    windows = 0
+    for X_batch, _ in iter_sequence_batches(X, y, WINDOW_SIZE, batch_size=4096):
+        windows += len(X_batch)
+    return windows
+
+
+def setup_lstm(rows, workdir):
+    _require("tensorflow")
+    setup_sequences(rows, workdir)
+
+
+def load_lstm(rows, workdir):
+    from src.lstm_model import build_lstm_model
+    from src.sequences import create_sequences
+    X_seq, y_seq = create_sequences(*load_sequences(rows, workdir), WINDOW_SIZE, copy=True)
+    return build_lstm_model((WINDOW_SIZE, N_FEATURES)), X_seq, y_seq
+
+
+def run_lstm(state):
+    model, X_seq, y_seq = state
+    model.fit(X_seq, y_seq, epochs=1, batch_size=256, verbose=0)
+    return len(X_seq)
+
+
+# name -> (setup, load, run, largest size it runs at by default)
+STAGES = {
+    "scrape": (setup_scrape, load_scrape, run_scrape, 100_000),
+    "finbert": (setup_finbert, load_finbert, run_finbert, 100_000),
+    "aggregate": (setup_aggregate, load_aggregate, run_aggregate, None),
+    "merge": (setup_merge, load_merge, run_merge, None),
+    "sequences": (setup_sequences, load_sequences, run_sequences, None),
+    "lstm": (setup_lstm, load_lstm, run_lstm, 100_000),
+}
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def _proc_status_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS mark (VmHWM) to the current RSS; False where that is unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(stage, rows, workdir, repeat):
+    """
+    Load a case's inputs from workdir and run it in this process.
+
+    Returns:
+        Best-of-`repeat` wall time, throughput, the process's peak RSS and
+        run_rss_mb, the peak RSS during run() above the RSS it started with
+        (the figure the RSS gate uses). On Linux the peak mark is reset after
+        loading; elsewhere run_rss_mb only counts growth past the load's peak.
+    """
+    _, load, run, _ = STAGES[stage]
+    state = load(rows, workdir)
+    gc.collect()
+    if _reset_peak_rss():
+        before, peak_during_run = _proc_status_mb("VmRSS"), lambda: _proc_status_mb("VmHWM")
+    else:
+        before, peak_during_run = _peak_rss_mb(), _peak_rss_mb
+    best, processed = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processed = run(state)
+        best = min(best, time.perf_counter() - start)
+    run_rss = peak_during_run() - before
+    return {"rows": processed, "seconds": best, "rows_per_s": processed / best if best else 0.0,
+            "peak_rss_mb": _peak_rss_mb(), "run_rss_mb": max(run_rss, 0.0)}
+
+
+def _setup_isolated(stage, rows, workdir):
+    try:
+        STAGES[stage][0](rows, workdir)
+    except Skip as e:
+        return str(e)
+    return None
+
+
+def run_case(stage, rows, repeat):
+    """setup() and measure() each in a fresh spawned process, so only the case's own peak RSS counts."""
+    ctx = get_context("spawn")
+    workdir = tempfile.mkdtemp(prefix=f"bench-{stage}-")
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            skipped = pool.submit(_setup_isolated, stage, rows, workdir).result()
+        if skipped:
+            return {"skipped": skipped}
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            return pool.submit(measure, stage, rows, workdir, repeat).result()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__, "commit": commit}
+
+
+def compare(results, baseline, time_tolerance, rss_tolerance, min_seconds, min_rss_mb):
+    """
+    Regressions of `results` against `baseline` (both {case: measurement}).
+
+    A case regresses when its time exceeds the baseline's by more than
+    time_tolerance (cases where both are under min_seconds are timer noise and
+    only checked for memory), or the memory its run() added (run_rss_mb) by
+    more than rss_tolerance (unless both are under min_rss_mb).
+
+    Returns:
+        List of human-readable regression messages
+    """
+    failures = []
+    for case, current in results.items():
+        base = baseline.get(case)
+        if not base or "skipped" in current or "skipped" in base:
+            continue
+        if max(current["seconds"], base["seconds"]) >= min_seconds:
+            ratio = current["seconds"] / base["seconds"]
+            if ratio > 1 + time_tolerance:
+                failures.append(f"{case}: {current['seconds']:.3f}s vs {base['seconds']:.3f}s baseline "
+                                f"({ratio:.2f}x, tolerance {1 + time_tolerance:.2f}x)")
+        if "run_rss_mb" not in base:
+            continue  # recorded before run() memory was measured separately
+        grown, base_grown = current["run_rss_mb"], base["run_rss_mb"]
+        if max(grown, base_grown) >= min_rss_mb and grown > base_grown * (1 + rss_tolerance):
+            failures.append(f"{case}: run() added {grown:.0f} MB of RSS vs {base_grown:.0f} MB baseline "
+                            f"(tolerance {1 + rss_tolerance:.2f}x)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), help="row counts, e.g. 1k 100k 10m")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is kept")
+    parser.add_argument("--no-caps", action="store_true",
+                        help="also run scrape/finbert/lstm above 100k rows")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = +25%%")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25,
+                        help="allowed growth of the RSS a stage's run adds")
+    parser.add_argument("--min-rss-mb", type=float, default=16,
+                        help="cases adding less RSS than this are not gated on memory")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="cases faster than this are not gated on time")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<20}{'rows':>12}{'seconds':>10}{'rows/s':>14}{'peak RSS':>12}{'run RSS':>12}")
+    for size in args.sizes:
+        rows = parse_size(size)
+        for stage in args.stages:
+            case = f"{stage}@{size.lower()}"
+            cap = STAGES[stage][3]
+            if cap is not None and rows > cap and not args.no_caps:
+                result = {"skipped": f"above the {cap:,}-row cap (--no-caps runs it)"}
+            else:
+                result = run_case(stage, rows, args.repeat)
+            results[case] = result
+            if "skipped" in result:
+                print(f"{case:<20}  skipped: {result['skipped']}")
+            else:
+                print(f"{case:<20}{result['rows']:>12,}{result['seconds']:>10.3f}{result['rows_per_s']:>14,.0f}"
+                      f"{result['peak_rss_mb']:>9.0f} MB{result['run_rss_mb']:>9.0f} MB")
+
+    report = {"environment": environment(), "created": pd.Timestamp.now(tz="UTC").isoformat(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f)["results"]
+        report["results"] = {**previous, **results}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    env, base_env = report["environment"], baseline.get("environment", {})
+    changed = [k for k in ("python", "platform", "cpus") if env.get(k) != base_env.get(k)]
+    if changed:
+        print(f"WARNING: baseline was recorded on a different machine ({', '.join(changed)} differ)")
+    failures = compare(results, baseline["results"], args.time_tolerance, args.rss_tolerance, args.min_seconds,
+                       args.min_rss_mb)
+    if failures:
+        print(f"{len(failures)} regression(s) against {args.baseline} (commit {base_env.get('commit')}):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Seeded synthetic inputs for the benchmark suite: Reddit posts in the
+get_reddit_posts schema and OHLCV bars in the get_stock_data schema.
+"""
+import numpy as np
+import pandas as pd
+
+from src.market_calendar import trading_sessions
+from src.sentiment_aggregation import LABELS
+
+WORDS = np.array(["tesla", "stock", "delivery", "earnings", "model", "robotaxi", "price", "quarter", "guidance",
+                  "margin", "recall", "update", "fsd", "battery", "bullish", "bearish", "short", "calls", "puts",
+                  "elon", "cybertruck", "factory", "demand", "china", "production", "record", "miss", "beat"])
+
+
+def _texts(rng, n, min_words, max_words):
+    lengths = rng.integers(min_words, max_words + 1, n)
+    words = WORDS[rng.integers(0, len(WORDS), lengths.sum())]
+    ends = np.cumsum(lengths)
+    return [" ".join(words[end - length:end]) for end, length in zip(ends, lengths)]
+
+
+def synthetic_posts(n, days=365, subreddit="teslamotors", start="2024-01-01", seed=0, text=True, scored=False):
+    """
+    Posts with the columns of get_reddit_posts (id, date, created_utc, title, selftext, score, ...).
+
+    Args:
+        n: Number of posts
+        days: Span of created_utc, starting at `start`
+        text: Generate title/selftext (skip for aggregation-only runs at large n)
+        scored: Add FinBERT's 'label' and 'finbert_score' as in the score
+            stage's output
+
+    Returns:
+        DataFrame sorted by created_utc descending, like get_reddit_posts
+        ('date' holds datetime.date objects up to 1M posts and datetime64[D]
+        above, where building the objects would dominate the setup)
+    """
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp(start, tz="UTC") + pd.to_timedelta(np.sort(rng.integers(0, days * 86400, n))[::-1],
+                                                              unit="s")
+    df = pd.DataFrame({
+        "id": np.char.add("t", np.arange(n).astype(str)),
+        "date": created.date if n <= 1_000_000 else created.normalize().tz_localize(None).values.astype("M8[D]"),
+        "created_utc": created,
+        "score": rng.integers(0, 5000, n),
+        "upvote_ratio": rng.random(n).round(2),
+        "num_comments": rng.integers(0, 300, n),
+        "subreddit": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [subreddit]),
+    })
+    if text:
+        df["title"] = _texts(rng, n, 4, 12)
+        df["selftext"] = np.where(rng.random(n) < 0.4, "", np.array(_texts(rng, n, 0, 120), dtype=object))
+        df["url"] = np.char.add("https://example.invalid/", df["id"].to_numpy().astype(str))
+        df["permalink"] = np.char.add(f"/r/{subreddit}/comments/", df["id"].to_numpy().astype(str))
+    df["query"] = None
+    if scored:
+        df["label"] = pd.Categorical.from_codes(rng.integers(0, 3, n), categories=list(LABELS))
+        df["finbert_score"] = rng.uniform(0.34, 1.0, n)
+    return df
+
+
+def synthetic_ohlcv(days=250, tickers=None, start="2020-01-02", seed=0):
+    """
+    Daily bars on NYSE sessions with the columns of get_stock_data (date, Open, Close, High, Low, Volume).
+
+    Args:
+        days: Sessions per ticker
+        tickers: None for one ticker's frame (as get_stock_data returns), or a
+            number of tickers for a long frame with a 'ticker' column
+
+    Returns:
+        DataFrame of bars, sorted by (ticker,) date
+    """
+    rng = np.random.default_rng(seed)
+    sessions = trading_sessions(start, pd.Timestamp(start) + pd.Timedelta(days=int(days * 1.5) + 10))["session"]
+    dates = pd.DatetimeIndex(sessions[:days]).date
+    n_tickers = 1 if tickers is None else tickers
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_tickers, days)), axis=1)).ravel()
+    open_ = close * (1 + rng.normal(0, 0.01, close.size))
+    df = pd.DataFrame({
+        "date": np.tile(dates, n_tickers),
+        "Open": open_,
+        "Close": close,
+        "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, close.size)),
+        "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, close.size)),
+        "Volume": rng.integers(1_000_000, 50_000_000, close.size),
+    })
+    if tickers is not None:
+        df.insert(0, "ticker", np.repeat([f"T{i:05d}" for i in range(n_tickers)], days))
+    return df
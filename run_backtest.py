@@ -0,0 +1,36 @@
+import argparse
+import os
+
+from src.backtest import FEATURES, TARGET, summarize_backtest, walk_forward_backtest
+from src.storage import read_arrow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the sentiment LSTM")
+    parser.add_argument("--data", default="data/merged/tesla_sentiment_stock_enhanced.arrow")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--mode", choices=["expanding", "rolling"], default="expanding")
+    parser.add_argument("--train-size", type=int, help="training rows per fold in rolling mode")
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--output", default="data/backtest")
+    args = parser.parse_args(argv)
+
+    df = read_arrow(args.data)
+    folds, predictions = walk_forward_backtest(
+        df, FEATURES, TARGET, window_size=args.window, n_folds=args.folds, mode=args.mode,
+        train_size=args.train_size, epochs=args.epochs, batch_size=args.batch_size, workers=args.workers,
+    )
+
+    os.makedirs(args.output, exist_ok=True)
+    folds.to_csv(os.path.join(args.output, "folds.csv"), index=False)
+    predictions.to_csv(os.path.join(args.output, "predictions.csv"), index=False)
+    summary = summarize_backtest(folds)
+    summary.to_csv(os.path.join(args.output, "summary.csv"))
+    print(summary.to_string(float_format=lambda v: f"{v:.6f}"))
+
+
+if __name__ == "__main__":
+    main()
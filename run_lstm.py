@@ -1,21 +1,8 @@
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-from src.lstm_model import build_lstm_model, train_lstm_model
-import matplotlib.pyplot as plt
+import argparse
 import os
+import sys
 
-def create_sequences(X, y, window_size=10):
-    Xs, ys = [], []
-    for i in range(len(X) - window_size):
-        Xs.append(X[i:i+window_size])
-        ys.append(y[i+window_size])
-    return np.array(Xs), np.array(ys)
-
-# Load merged dataset
-df = pd.read_csv("data/merged/tesla_sentiment_stock_enhanced.csv", parse_dates=['date'])
-df = df.sort_values('date').dropna()
+MERGED_ARROW = "data/merged/tesla_sentiment_stock_enhanced.arrow"
 
 # Select features for LSTM input (you can customize)
 features = [
@@ -28,47 +15,204 @@ features = [
     'volume_spike',
     'daily_return'
 ]
-target = 'daily_return' 
-# Normalize features & target
-scaler_X = MinMaxScaler()
-scaler_y = MinMaxScaler()
-
-X_scaled = scaler_X.fit_transform(df[features])
-y_scaled = scaler_y.fit_transform(df[[target]])
-
-# Create sequences
-window_size = 10
-X_seq, y_seq = create_sequences(X_scaled, y_scaled, window_size)
-
-# Walk-forward validation
-train_size = int(len(X_seq) * 0.8)
-X_train, X_val = X_seq[:train_size], X_seq[train_size:]
-y_train, y_val = y_seq[:train_size], y_seq[train_size:]
-
-# Build LSTM model
-model = build_lstm_model(input_shape=(window_size, len(features)))
-
-# Train model
-history = train_lstm_model(model, X_train, y_train, X_val, y_val, epochs=50, batch_size=16)
-
-# Predict on validation set
-y_pred_scaled = model.predict(X_val)
-y_pred = scaler_y.inverse_transform(y_pred_scaled)
-y_true = scaler_y.inverse_transform(y_val)
-
-# Plot predictions vs true
-plt.figure(figsize=(12,6))
-plt.plot(y_true, label='Actual Close Price')
-plt.plot(y_pred, label='Predicted Close Price')
-plt.title('LSTM: Actual vs Predicted Close Price')
-plt.xlabel('Time Step')
-plt.ylabel('Price')
-plt.legend()
-os.makedirs("figures", exist_ok=True)
-plt.savefig("figures/lstm_predictions.png", dpi=300)
-plt.close()
-
-# Print final MSE
-from sklearn.metrics import mean_squared_error
-mse = mean_squared_error(y_true, y_pred)
-print(f"LSTM Model MSE: {mse:.6f}")
\ No newline at end of file
+target = 'daily_return'
+
+
+def load_training_data(data_path=MERGED_ARROW, window_size=10, train_fraction=0.8, feature_store=None,
+                       cutoff="close"):
+    """
+    Scaled training/validation windows of the merged dataset (no TensorFlow needed).
+
+    With a feature_store (src.feature_store.EmbeddingStore directory), the
+    daily mean FinBERT probabilities and embeddings are appended to the
+    features; posts are pooled straight from the store's memory maps.
+
+    Returns:
+        Dict with X_train, y_train, X_val, y_val, scaler_X, scaler_y, the
+        feature names, the row/window counts and the scaled rows the windows
+        are views of (X_rows, y_rows)
+    """
+    import numpy as np
+    from sklearn.preprocessing import MinMaxScaler
+    from src.sequences import create_sequences
+    from src.storage import read_arrow
+
+    # Load merged dataset (memory-mapped Arrow copy written by the merge stage; only the needed columns)
+    df = read_arrow(data_path, columns=['date'] + features)
+    df = df.sort_values('date').dropna()
+
+    X, names = df[features].to_numpy(dtype=np.float64), list(features)
+    if feature_store is not None:
+        from src.feature_store import daily_finbert_features
+        pooled, pooled_names = daily_finbert_features(feature_store, df['date'], cutoff=cutoff)
+        X, names = np.hstack([X, pooled]), names + pooled_names
+
+    # Create sequences
+    n_windows = len(df) - window_size
+    train_size = int(n_windows * train_fraction)
+
+    # Normalize features & target, fitting the scalers on the training rows only
+    # (the first train_size windows and their targets); see run_backtest.py for walk-forward folds
+    scaler_X = MinMaxScaler().fit(X[:train_size + window_size])
+    scaler_y = MinMaxScaler().fit(df[[target]].iloc[:train_size + window_size])
+
+    X_scaled = scaler_X.transform(X)
+    y_scaled = scaler_y.transform(df[[target]])
+
+    X_seq, y_seq = create_sequences(X_scaled, y_scaled, window_size)
+
+    # Walk-forward validation
+    return {
+        "X_train": X_seq[:train_size], "X_val": X_seq[train_size:],
+        "y_train": y_seq[:train_size], "y_val": y_seq[train_size:],
+        "scaler_X": scaler_X, "scaler_y": scaler_y, "features": names,
+        "rows": len(df), "date_range": (df['date'].min(), df['date'].max()),
+        "X_rows": X_scaled, "y_rows": y_scaled, "train_size": train_size,
+    }
+
+
+def prepare_shards(directory, data_path=MERGED_ARROW, window_size=10, feature_store=None, rows_per_shard=100_000):
+    """
+    Write the training and validation rows of load_training_data as feature shards, unless they are current.
+
+    directory/train and directory/val hold the shards (see
+    src.lstm_data.write_feature_shards) and directory/meta.pkl the scalers
+    and feature names the model artifact needs. Shards are rewritten when
+    the data file, window_size or feature_store changed.
+
+    Returns:
+        The meta dict: scaler_X, scaler_y, features, key
+    """
+    import json
+    import pickle
+    import shutil
+    from src.lstm_data import write_feature_shards
+
+    key = json.dumps([os.path.abspath(data_path), os.path.getmtime(data_path), window_size, feature_store])
+    meta_path = os.path.join(directory, "meta.pkl")
+    if os.path.exists(meta_path):
+        with open(meta_path, "rb") as f:
+            meta = pickle.load(f)
+        if meta["key"] == key:
+            return meta
+        shutil.rmtree(directory)
+
+    data = load_training_data(data_path, window_size, feature_store=feature_store)
+    split = data["train_size"] + window_size
+    # Validation windows start at train_size; their rows overlap the training rows by one window.
+    write_feature_shards(data["X_rows"][:split], data["y_rows"][:split], os.path.join(directory, "train"),
+                         rows_per_shard=rows_per_shard, window_size=window_size)
+    write_feature_shards(data["X_rows"][data["train_size"]:], data["y_rows"][data["train_size"]:],
+                         os.path.join(directory, "val"), rows_per_shard=rows_per_shard, window_size=window_size)
+    meta = {"scaler_X": data["scaler_X"], "scaler_y": data["scaler_y"], "features": data["features"], "key": key}
+    with open(meta_path, "wb") as f:
+        pickle.dump(meta, f)
+    print(f"Wrote {len(data['X_train'])} training and {len(data['X_val'])} validation windows to {directory}")
+    return meta
+
+
+def inspect(data_path=MERGED_ARROW, window_size=10, feature_store=None):
+    """Print the training split that train() would use, without loading TensorFlow."""
+    data = load_training_data(data_path, window_size, feature_store=feature_store)
+    print(f"{data['rows']} rows from {data['date_range'][0]} to {data['date_range'][1]}")
+    print(f"window_size={window_size}: {len(data['X_train'])} training and {len(data['X_val'])} validation windows "
+          f"of shape {data['X_train'].shape[1:]}")
+
+
+def train(data_path=MERGED_ARROW, window_size=10, epochs=50, batch_size=16, name="tsla_lstm",
+          figures_dir="figures", feature_store=None, shards=None, rows_per_shard=100_000):
+    """
+    Train the LSTM, plot validation predictions and save a versioned model artifact.
+
+    With `shards` (a directory), the windows are streamed from feature
+    shards through the tf.data pipeline (src.lstm_data.shard_dataset)
+    instead of being held in memory; the shards are written there first
+    when missing or stale (see prepare_shards).
+    """
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from sklearn.metrics import mean_squared_error
+    from src.lstm_model import build_lstm_model, train_lstm_dataset, train_lstm_model
+    from src.model_artifact import save_model_artifact
+
+    if shards is None:
+        data = load_training_data(data_path, window_size, feature_store=feature_store)
+        X_train, X_val, y_train, y_val = data["X_train"], data["X_val"], data["y_train"], data["y_val"]
+    else:
+        from src.lstm_data import count_windows, list_shards, shard_dataset
+        data = prepare_shards(shards, data_path, window_size, feature_store, rows_per_shard)
+        train_ds = shard_dataset(os.path.join(shards, "train"), window_size, batch_size, shuffle=True, seed=0)
+        X_val = shard_dataset(os.path.join(shards, "val"), window_size, batch_size)
+        y_val = np.concatenate([y for _, y in X_val.as_numpy_iterator()])
+    scaler_X, scaler_y = data["scaler_X"], data["scaler_y"]
+
+    # Build LSTM model
+    model = build_lstm_model(input_shape=(window_size, len(data["features"])))
+
+    # Train model
+    if shards is None:
+        history = train_lstm_model(model, X_train, y_train, X_val, y_val, epochs=epochs, batch_size=batch_size)
+    else:
+        history = train_lstm_dataset(model, train_ds, X_val, epochs=epochs,
+                                     samples_per_epoch=count_windows(list_shards(os.path.join(shards, "train")),
+                                                                     window_size))
+
+    # Predict on validation set (arrays or the unshuffled validation pipeline, in the same order as y_val)
+    y_pred_scaled = model.predict(X_val)
+    y_pred = scaler_y.inverse_transform(y_pred_scaled)
+    y_true = scaler_y.inverse_transform(y_val)
+
+    # Plot predictions vs true
+    plt.figure(figsize=(12,6))
+    plt.plot(y_true, label='Actual Close Price')
+    plt.plot(y_pred, label='Predicted Close Price')
+    plt.title('LSTM: Actual vs Predicted Close Price')
+    plt.xlabel('Time Step')
+    plt.ylabel('Price')
+    plt.legend()
+    os.makedirs(figures_dir, exist_ok=True)
+    plt.savefig(os.path.join(figures_dir, "lstm_predictions.png"), dpi=300)
+    plt.close()
+
+    # Print final MSE
+    mse = mean_squared_error(y_true, y_pred)
+    print(f"LSTM Model MSE: {mse:.6f}")
+
+    # Save the model with its scalers for the prediction service
+    artifact_path = save_model_artifact(model, scaler_X, scaler_y, data["features"], target, window_size,
+                                        name=name, metrics={"val_mse": float(mse)})
+    print(f"Model saved to {artifact_path}")
+    return artifact_path
+
+
+def add_train_arguments(parser):
+    parser.add_argument("--data", default=MERGED_ARROW, help="merged Arrow file written by the merge stage")
+    parser.add_argument("--window-size", type=int, default=10)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--name", default="tsla_lstm", help="model artifact name")
+    parser.add_argument("--inspect", action="store_true", help="only report the training split (no TensorFlow)")
+    parser.add_argument("--feature-store", help="FinBERT embedding store to add daily mean probabilities/embeddings "
+                                                "from (written by scoring with --embeddings)")
+    parser.add_argument("--shards", metavar="DIR", help="stream training windows from feature shards in DIR "
+                                                        "(written there from --data when missing or stale)")
+    parser.add_argument("--rows-per-shard", type=int, default=100_000)
+
+
+def run(args):
+    if args.inspect:
+        inspect(args.data, args.window_size, args.feature_store)
+    else:
+        train(args.data, args.window_size, args.epochs, args.batch_size, args.name, feature_store=args.feature_store,
+              shards=args.shards, rows_per_shard=args.rows_per_shard)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the sentiment/stock LSTM")
+    add_train_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
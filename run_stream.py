@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+from src.streaming import STREAM_DIR, RollingSentiment, StreamScorer, praw_submission_stream, replay_source, run_stream
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream Reddit posts into rolling FinBERT sentiment aggregates")
+    parser.add_argument("--subreddit", default="teslamotors")
+    parser.add_argument("--query", default=None, help="tag streamed posts with this query")
+    parser.add_argument("--replay", metavar="PATH", help="replay a saved posts dataset instead of live Reddit")
+    parser.add_argument("--speed", type=float, default=None, help="replay speed vs. real time (default: no pacing)")
+    parser.add_argument("--window", type=int, default=7, help="buckets in the rolling window")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait", type=float, default=2.0, help="seconds a post may wait for its batch")
+    parser.add_argument("--max-posts", type=int, default=None)
+    parser.add_argument("--backend", default="torch", choices=["torch", "int8", "onnx"])
+    parser.add_argument("--cache", default="data/cache/finbert_sentiment.sqlite")
+    parser.add_argument("--dataset-dir", default=STREAM_DIR)
+    parser.add_argument("--snapshot-dir", default="data/reddit/stream_aggregates")
+    parser.add_argument("--snapshot-every", type=float, default=30.0, help="seconds between aggregate snapshots")
+    parser.add_argument("--rollover-rows", type=int, default=5000, help="posts per dataset file")
+    parser.add_argument("--rollover-seconds", type=float, default=300.0,
+                        help="longest time scored posts are buffered before they are written")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        source = replay_source(args.replay, speed=args.speed, pause_every=args.max_batch)
+    else:
+        source = praw_submission_stream(args.subreddit, query=args.query, skip_existing=True)
+    aggregates = {"daily": RollingSentiment("D", window=args.window),
+                  "hourly": RollingSentiment("h", window=args.window * 24, keep=24 * 30)}
+
+    def report(batch, aggregates):
+        daily, hourly = aggregates["daily"].current(), aggregates["hourly"].current()
+        print(f"{len(batch):3d} posts | day {daily['bucket_start']:%Y-%m-%d} avg={daily['sentiment_avg']:+.3f} "
+              f"%pos={daily['%pos']:.2f} %neg={daily['%neg']:.2f} | hour {hourly['bucket_start']:%H:00} "
+              f"avg={hourly['sentiment_avg']:+.3f} momentum={hourly['sentiment_momentum']:+.3f}")
+
+    scorer = StreamScorer(backend=args.backend, cache_path=args.cache)
+    try:
+        result = run_stream(source, scorer, aggregates, max_batch=args.max_batch, max_wait_s=args.max_wait,
+                            dataset_dir=args.dataset_dir, snapshot_dir=args.snapshot_dir,
+                            max_posts=args.max_posts, on_batch=report, rollover_rows=args.rollover_rows,
+                            rollover_s=args.rollover_seconds, snapshot_every_s=args.snapshot_every)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        scorer.close()
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import argparse
+import os
+
+from src.storage import read_arrow
+from src.sweep import DEFAULT_SPACE, SWEEP_DB, sample_trials, successive_halving
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep of the sentiment LSTM with successive halving")
+    parser.add_argument("--data", default="data/merged/tesla_sentiment_stock_enhanced.arrow")
+    parser.add_argument("--sweep", default="lstm", help="sweep name in the results store")
+    parser.add_argument("--trials", type=int, default=27, help="random sample of the grid (default 27)")
+    parser.add_argument("--min-epochs", type=int, default=3)
+    parser.add_argument("--max-epochs", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3, help="keep the best 1/eta trials after each rung")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--store", default=SWEEP_DB)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = read_arrow(args.data)
+    trials = sample_trials(DEFAULT_SPACE, args.trials, seed=args.seed)
+    results = successive_halving(df, args.data, trials, sweep=args.sweep, min_epochs=args.min_epochs,
+                                 max_epochs=args.max_epochs, eta=args.eta, batch_size=args.batch_size,
+                                 workers=args.workers, store_path=args.store)
+
+    print("\nBest trials:")
+    for row in results.head(5).itertuples():
+        print(f"  trial {row.trial}: val_loss={row.val_loss:.4g} after {row.epochs} epochs  {row.params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import sys
+
+from src.model_artifact import MODEL_DIR, load_model_artifact
+from src.prediction_service import PredictionService, serve_http
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve saved LSTM models over HTTP with micro-batching")
+    parser.add_argument("models", nargs="*", default=["tsla_lstm"],
+                        help="model names, optionally pinned as name:version")
+    parser.add_argument("--root", default=MODEL_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    services = {}
+    for spec in args.models:
+        name, _, version = spec.partition(":")
+        artifact = load_model_artifact(name, int(version) if version else None, root=args.root)
+        services[name] = PredictionService(artifact, args.max_batch, args.max_wait_ms).start()
+        print(f"Loaded {artifact}")
+    try:
+        serve_http(services, host=args.host, port=args.port)
+    finally:
+        for service in services.values():
+            service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from src.cpu import core_slices, init_tf_worker
+from src.sequences import create_sequences
+
+FEATURES = ['sentiment_avg', '%pos', '%neg', 'sentiment_momentum', 'finbert_confidence',
+            'volatility', 'volume_spike', 'daily_return']
+TARGET = 'daily_return'
+
+
+def walk_forward_folds(n_rows, n_folds=5, window_size=10, mode="expanding", train_size=None, test_size=None):
+    """
+    Row ranges of walk-forward folds over a time-ordered series.
+
+    The last n_folds * test_size rows are cut into consecutive test blocks.
+    Each fold trains on the rows before its test block: all of them
+    ('expanding') or only the last train_size ('rolling'). test_size
+    defaults to an equal split of the rows into n_folds + 1 blocks.
+
+    Returns:
+        List of (train_start, test_start, test_end) row indices
+    """
+    if mode not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown walk-forward mode '{mode}'. Expected 'expanding' or 'rolling'")
+    if test_size is None:
+        # Without a fixed training length, the first fold trains on as many rows as each fold tests.
+        test_size = (n_rows - train_size) // n_folds if train_size else n_rows // (n_folds + 1)
+    first_test = n_rows - n_folds * test_size
+    if mode == "rolling" and train_size is None:
+        train_size = first_test
+    min_train = min(first_test, train_size) if mode == "rolling" else first_test
+    if test_size < 1 or min_train < 2 * window_size + 1:
+        raise ValueError(f"{n_rows} rows are too few for {n_folds} folds with window_size={window_size}")
+
+    folds = []
+    for k in range(n_folds):
+        test_start = first_test + k * test_size
+        train_start = 0 if mode == "expanding" else max(0, test_start - train_size)
+        folds.append((train_start, test_start, test_start + test_size))
+    return folds
+
+
+def _run_fold(task):
+    """Fit scalers and an LSTM on one fold's training rows and score its test block."""
+    from src.lstm_model import build_lstm_model, train_lstm_model
+
+    X, y = task["X"], task["y"]
+    w = task["window_size"]
+    train_start, test_start, test_end = task["fold"]
+
+    # Scalers see the training rows only; the test block is transformed with them.
+    scaler_X = MinMaxScaler().fit(X[train_start:test_start])
+    scaler_y = MinMaxScaler().fit(y[train_start:test_start])
+    X_scaled = scaler_X.transform(X[train_start:test_end])
+    y_scaled = scaler_y.transform(y[train_start:test_end])
+
+    n_train = test_start - train_start
+    X_seq, y_seq = create_sequences(X_scaled[:n_train], y_scaled[:n_train], w)
+    # Test windows may look back into the training rows, but every target is in the test block.
+    X_test, y_test = create_sequences(X_scaled[n_train - w:], y_scaled[n_train - w:], w)
+
+    # Early stopping watches the last training windows, never the test block.
+    n_val = max(1, int(len(X_seq) * task["val_fraction"]))
+    model = build_lstm_model(input_shape=(w, X.shape[1]))
+    history = train_lstm_model(model, X_seq[:-n_val], y_seq[:-n_val], X_seq[-n_val:], y_seq[-n_val:],
+                               epochs=task["epochs"], batch_size=task["batch_size"])
+
+    y_pred = scaler_y.inverse_transform(model.predict(np.ascontiguousarray(X_test), verbose=0)).ravel()
+    y_true = scaler_y.inverse_transform(y_test).ravel()
+    err = y_pred - y_true
+    return {
+        "ticker": task["ticker"],
+        "fold": task["fold_index"],
+        "train_rows": n_train,
+        "test_rows": len(y_true),
+        "test_start": task["dates"][test_start],
+        "test_end": task["dates"][test_end - 1],
+        "mse": float(np.mean(err ** 2)),
+        "mae": float(np.mean(np.abs(err))),
+        "direction_acc": float(np.mean(np.sign(y_pred) == np.sign(y_true))),
+        "epochs": len(history.history["loss"]),
+        "predictions": pd.DataFrame({"ticker": task["ticker"], "fold": task["fold_index"],
+                                     "date": task["dates"][test_start:test_end],
+                                     "y_true": y_true, "y_pred": y_pred}),
+    }
+
+
+def walk_forward_backtest(df, features=FEATURES, target=TARGET, window_size=10, n_folds=5, mode="expanding",
+                          train_size=None, test_size=None, epochs=50, batch_size=16, val_fraction=0.1,
+                          workers=1):
+    """
+    Walk-forward evaluation of the sentiment LSTM, one model per (ticker, fold).
+
+    Folds train on the past only and are scored on the block that follows;
+    scalers are fitted per fold on its training rows, so no future values
+    leak into training. With workers > 1 the folds run on a spawn process
+    pool, each worker pinned to its own slice of cores with TensorFlow
+    limited to that many threads; callers must then run under an
+    `if __name__ == "__main__":` guard.
+
+    Args:
+        df: Merged sentiment/stock frame with a 'date' column and optionally 'ticker'
+        features: Input columns
+        target: Column predicted one step after each window
+        window_size: Rows per input window
+        n_folds, mode, train_size, test_size: See walk_forward_folds
+        epochs, batch_size: Passed to train_lstm_model
+        val_fraction: Share of each fold's training windows used for early stopping
+        workers: Number of worker processes
+
+    Returns:
+        (folds, predictions): one row per (ticker, fold) with mse, mae and
+        direction_acc, and the out-of-sample predictions of every fold
+    """
+    df = df.dropna(subset=list(features) + [target])
+    groups = df.groupby('ticker', observed=True) if 'ticker' in df.columns else [(None, df)]
+
+    tasks = []
+    for ticker, part in groups:
+        part = part.sort_values('date')
+        X = part[list(features)].to_numpy(dtype=np.float64)
+        y = part[[target]].to_numpy(dtype=np.float64)
+        dates = part['date'].to_numpy()
+        for k, fold in enumerate(walk_forward_folds(len(part), n_folds, window_size, mode, train_size, test_size)):
+            tasks.append({"ticker": ticker, "fold_index": k, "fold": fold, "X": X, "y": y, "dates": dates,
+                          "window_size": window_size, "epochs": epochs, "batch_size": batch_size,
+                          "val_fraction": val_fraction})
+
+    if workers <= 1:
+        results = [_run_fold(task) for task in tasks]
+    else:
+        ctx = mp.get_context("spawn")
+        slice_queue = ctx.Queue()
+        for cores in core_slices(workers):
+            slice_queue.put(cores)
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_tf_worker,
+                                 initargs=(slice_queue,)) as pool:
+            futures = [pool.submit(_run_fold, task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                print(f"[{result['ticker'] or 'series'} fold {result['fold']}] mse={result['mse']:.6f}")
+                results.append(result)
+
+    results.sort(key=lambda r: (str(r["ticker"]), r["fold"]))
+    predictions = pd.concat([r.pop("predictions") for r in results], ignore_index=True)
+    return pd.DataFrame(results), predictions
+
+
+def summarize_backtest(folds):
+    """Mean and spread of the fold metrics per ticker, plus an 'ALL' row."""
+    metrics = ['mse', 'mae', 'direction_acc']
+    folds = folds.assign(ticker=folds['ticker'].fillna('series'))
+    per_ticker = folds.groupby('ticker')[metrics].agg(['mean', 'std'])
+    overall = folds[metrics].agg(['mean', 'std']).unstack().to_frame('ALL').T
+    summary = pd.concat([per_ticker, overall])
+    summary.columns = [f"{metric}_{stat}" for metric, stat in summary.columns]
+    summary['folds'] = list(folds.groupby('ticker').size()) + [len(folds)]
+    return summary
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_slices(workers, cores=None):
+    """Split the usable CPU cores into one contiguous slice per worker."""
+    cores = available_cores() if cores is None else list(cores)
+    if workers > len(cores):
+        raise ValueError(f"workers={workers} exceeds the {len(cores)} available cores")
+    return [[int(c) for c in part] for part in np.array_split(cores, workers)]
+
+
+def pin_to_cores(cores):
+    """Restrict the calling process to `cores` where the platform supports it."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+
+def init_tf_worker(slice_queue):
+    """Process-pool initializer: pin to a core slice and give TensorFlow exactly that many threads."""
+    cores = slice_queue.get()
+    pin_to_cores(cores)
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(len(cores))
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    import tensorflow as tf  # imported only after the thread budget is set
+    tf.config.threading.set_intra_op_parallelism_threads(len(cores))
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def init_blas_worker(slice_queue):
+    """Process-pool initializer: pin to a core slice and cap the BLAS/OpenMP pools at its size."""
+    from threadpoolctl import threadpool_limits
+
+    cores = slice_queue.get()
+    pin_to_cores(cores)
+    threadpool_limits(limits=len(cores))  # stays in effect for the life of the worker
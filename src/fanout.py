@@ -0,0 +1,176 @@
+import json
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.price_store import PRICE_STORE
+from src.sentiment_aggregation import aggregate_session_sentiment
+from src.stock_data import get_stock_data_bulk
+from src.stock_features import VOLUME_WINDOW, incremental_stock_features
+from src.storage import read_table, write_table
+
+# Fan-out of the pipeline over many (ticker, subreddits, query) configurations.
+# Every post is ingested and scored once no matter how many configurations
+# include it; aggregation, stock fetching and merging then run for all
+# configurations together and write ticker-partitioned datasets.
+
+FANOUT_DIR = "data/fanout"
+
+
+def load_fanout_config(path):
+    """
+    Read a fan-out configuration file.
+
+    The file is JSON, either a list of configurations or {"configs": [...]}.
+    Each configuration has a 'ticker', a 'subreddits' list and optionally a
+    search 'query' and a 'name' (default: TICKER-sub1+sub2[-query]).
+
+    Returns:
+        List of dicts with keys name, ticker, subreddits and query
+    """
+    with open(path) as f:
+        raw = json.load(f)
+    raw = raw["configs"] if isinstance(raw, dict) else raw
+
+    configs, names = [], set()
+    for entry in raw:
+        if "ticker" not in entry or not entry.get("subreddits"):
+            raise ValueError(f"Fan-out configuration needs a 'ticker' and 'subreddits': {entry}")
+        subreddits = [entry["subreddits"]] if isinstance(entry["subreddits"], str) else list(entry["subreddits"])
+        ticker = entry["ticker"].upper()
+        query = entry.get("query") or None
+        name = entry.get("name") or "-".join(filter(None, [ticker, "+".join(subreddits), query]))
+        if name in names:
+            raise ValueError(f"Duplicate fan-out configuration name '{name}'")
+        names.add(name)
+        configs.append({"name": name, "ticker": ticker, "subreddits": subreddits, "query": query})
+    return configs
+
+
+def fanout_sources(configs):
+    """Distinct (subreddit, query) sources across all configurations."""
+    return sorted({(sub, c["query"]) for c in configs for sub in c["subreddits"]}, key=lambda s: (s[0], s[1] or ""))
+
+
+def _config_sources(configs):
+    """One row per (config, subreddit, query); a missing query is stored as ''."""
+    return pd.DataFrame([{"config": c["name"], "subreddit": sub, "query": c["query"] or ""}
+                         for c in configs for sub in c["subreddits"]])
+
+
+def collect_sources(configs, days, output, max_posts=1000, lookback_hours=24):
+    """Ingest every distinct source once and write one row per (post, source) to `output`."""
+    from src.reddit_incremental import get_reddit_posts_sources, load_posts_dataset
+
+    sources = fanout_sources(configs)
+    print(f"Ingesting {len(sources)} source(s) for {len(configs)} configuration(s)...")
+    try:
+        get_reddit_posts_sources(sources, initial_days=days, lookback_hours=lookback_hours, max_posts=max_posts)
+    except Exception as e:
+        print(f"Incremental Reddit ingestion failed, continuing with stored posts: {e}")
+
+    posts = load_posts_dataset(days=days, keys=('id', 'subreddit', 'query'))
+    if posts.empty:
+        raise RuntimeError("Could not collect any Reddit posts for the fan-out sources.")
+    posts['query'] = posts['query'].fillna('').astype(str)
+    wanted = pd.DataFrame([{"subreddit": s, "query": q or ""} for s, q in sources])
+    posts = posts.merge(wanted, on=['subreddit', 'query'])
+
+    posts['title'] = posts['title'].fillna('')
+    posts['selftext'] = posts['selftext'].fillna('')
+    posts = posts[~((posts['title'] == '') & (posts['selftext'] == ''))]
+    if posts.empty:
+        raise RuntimeError("No valid posts remaining after cleaning.")
+
+    print(f"Collected {posts['id'].nunique()} distinct posts ({len(posts)} post/source rows).")
+    write_table(posts, output, partition_cols=['date'])
+
+
+def score_unique_posts(posts_path, output, cache_path="data/cache/finbert_sentiment.sqlite", workers=1,
+                       backend="torch", feature_store=None):
+    """Label each distinct post once with FinBERT, however many sources it was found through."""
+    from src.finbert_sentiment import analyze_finbert_sentiment
+
+    posts = read_table(posts_path, columns=['id', 'date', 'created_utc', 'title', 'selftext'])
+    unique = posts.drop_duplicates(subset=['id']).reset_index(drop=True)
+    print(f"Scoring {len(unique)} distinct posts ({len(posts)} post/source rows)...")
+    scored = analyze_finbert_sentiment(unique, cache_path=cache_path, workers=workers, backend=backend,
+                                       feature_store=feature_store)
+    write_table(scored[['id', 'date', 'created_utc', 'label', 'finbert_score']], output, partition_cols=['date'])
+
+
+def aggregate_configs(posts_path, scores_path, configs, output, cutoff="close"):
+    """Per-session sentiment statistics of every configuration in one grouped pass, partitioned by ticker."""
+    membership = read_table(posts_path, columns=['id', 'subreddit', 'query'])
+    membership = membership.astype({'subreddit': str, 'query': str})
+    scores = read_table(scores_path)
+
+    # A post counts once per configuration even when several of its sources match.
+    rows = (membership.merge(_config_sources(configs), on=['subreddit', 'query'])
+            .drop_duplicates(subset=['config', 'id'])
+            .merge(scores, on='id'))
+    daily = aggregate_session_sentiment(rows, keys=('config',), cutoff=cutoff)
+    daily['ticker'] = daily['config'].map({c["name"]: c["ticker"] for c in configs})
+
+    missing = sorted({c["name"] for c in configs} - set(daily['config']))
+    if missing:
+        print(f"WARNING: no scored posts for {len(missing)} configuration(s): {missing[:10]}")
+    write_table(daily, output, partition_cols=['ticker'])
+
+
+def fetch_stocks(tickers, days, output, store_path=PRICE_STORE):
+    """Daily OHLCV bars of all tickers through the price store, downloaded in bulk."""
+    frames = get_stock_data_bulk(sorted(set(tickers)), days=days, store_path=store_path)
+    fetched = [df.assign(ticker=t) for t, df in frames.items() if df is not None and not df.empty]
+    if not fetched:
+        raise RuntimeError(f"Could not fetch stock data for any of the {len(frames)} tickers "
+                           f"({', '.join(list(frames)[:10])}) over the last {days} days.")
+    stock = pd.concat(fetched, ignore_index=True)
+    write_table(stock, output, partition_cols=['ticker'])
+    print(f"Stock data fetched for {stock['ticker'].nunique()} of {len(frames)} tickers.")
+
+
+def _merge_ticker(task):
+    """One ticker's stock bars and metrics merged with the daily sentiment of each of its configurations."""
+    return task["ticker"], task["daily"].merge(task["stock"].drop(columns='ticker'), on='date', how='inner')
+
+
+def merge_configs(daily_path, stock_path, output, workers=1, feature_cache=f"{FANOUT_DIR}/stock_features",
+                  volume_window=VOLUME_WINDOW):
+    """
+    Stock metrics of all tickers at once (incrementally, see src.stock_features), then
+    the per-ticker sentiment/stock merges, run in parallel across tickers.
+
+    Writes a dataset partitioned by ticker with one row per (config, date).
+    """
+    daily = read_table(daily_path)
+    stock = read_table(stock_path)
+    daily['ticker'] = daily['ticker'].astype(str)
+    stock['ticker'] = stock['ticker'].astype(str)
+    stock = incremental_stock_features(stock, feature_cache, volume_window)
+
+    stock_by_ticker = dict(tuple(stock.groupby('ticker')))
+    tasks = [{"ticker": ticker, "daily": part.drop(columns='ticker'), "stock": stock_by_ticker[ticker]}
+             for ticker, part in daily.groupby('ticker') if ticker in stock_by_ticker]
+    no_stock = sorted(set(daily['ticker']) - set(stock_by_ticker))
+    if no_stock:
+        print(f"WARNING: no stock data for {no_stock}")
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            results = list(pool.map(_merge_ticker, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        results = [_merge_ticker(task) for task in tasks]
+
+    empty = [ticker for ticker, merged in results if merged.empty]
+    if empty:
+        print(f"WARNING: no overlapping dates between sentiment and stock data for {empty}")
+    merged = [m.assign(ticker=ticker) for ticker, m in results if not m.empty]
+    if not merged:
+        tickers = sorted(set(daily['ticker']))
+        raise RuntimeError(f"Could not merge sentiment and stock data for any of the {len(tickers)} tickers "
+                           f"({', '.join(tickers[:10])}): no stock bars on the sentiment dates.")
+    merged = pd.concat(merged, ignore_index=True)
+    write_table(merged, output, partition_cols=['ticker'])
+    print(f"Merged {merged['config'].nunique()} configuration(s) across {merged['ticker'].nunique()} ticker(s).")
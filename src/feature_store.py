@@ -0,0 +1,226 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+FEATURE_STORE = "data/features/finbert"
+POOL_BLOCK_ROWS = 16_384
+
+
+class EmbeddingStore:
+    """
+    Append-only store of per-post FinBERT class probabilities and pooled hidden-state embeddings.
+
+    Layout of the store directory:
+        meta.json          model identity, dimensions and the committed row count
+        probs.f32          float32 rows of num_labels class probabilities
+        embeddings.f32     float32 rows of `dim` embedding values
+        index/part-N.arrow Arrow IPC parts mapping id, date and created_utc to a row
+
+    Row data is appended first, then its index part, then meta.json is
+    replaced with the new row count; readers only look at committed rows, so
+    an interrupted append is invisible and truncated on the next one. Reads
+    memory-map the arrays, so embeddings are never loaded wholesale.
+
+    Args:
+        root: Store directory
+        model_id: Identity of the model the vectors come from; appending with
+            a different one raises ValueError
+    """
+
+    def __init__(self, root=FEATURE_STORE, model_id=None):
+        self.root = root
+        self.model_id = model_id
+        self._index = None
+        self._ids = None
+        meta_path = os.path.join(root, "meta.json")
+        self.meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if model_id is not None and self.meta["model"] != model_id:
+                raise ValueError(f"Feature store {root} holds vectors of {self.meta['model']}, not {model_id}")
+
+    @property
+    def rows(self):
+        return self.meta["rows"] if self.meta is not None else 0
+
+    def __len__(self):
+        return self.rows
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _part_path(self, part):
+        return os.path.join(self.root, "index", f"part-{part:05d}.arrow")
+
+    def _write_meta(self, meta):
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self._path("meta.json"))
+        self.meta = meta
+
+    def append(self, ids, dates, created_utc, probs, embeddings):
+        """
+        Append the vectors of new posts; ids already in the store are skipped.
+
+        Returns:
+            Number of rows appended
+        """
+        probs = np.ascontiguousarray(probs, dtype=np.float32)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        ids = pd.Series(np.asarray(ids, dtype=object)).astype(str)
+        known = self._id_set()
+        keep = ~(np.fromiter((i in known for i in ids), dtype=bool, count=len(ids)) | ids.duplicated().to_numpy())
+        if not keep.any():
+            return 0
+        if self.meta is None:
+            if self.model_id is None:
+                raise ValueError("A model_id is needed to create a feature store")
+            os.makedirs(os.path.join(self.root, "index"), exist_ok=True)
+            self._write_meta({"model": self.model_id, "num_labels": probs.shape[1], "dim": embeddings.shape[1],
+                              "rows": 0, "parts": 0})
+        meta = dict(self.meta)
+        if probs.shape[1] != meta["num_labels"] or embeddings.shape[1] != meta["dim"]:
+            raise ValueError(f"Expected {meta['num_labels']} probabilities and {meta['dim']} embedding values per row")
+
+        start = meta["rows"]
+        n = int(keep.sum())
+        for name, values in (("probs.f32", probs), ("embeddings.f32", embeddings)):
+            width = values.shape[1]
+            with open(self._path(name), "ab") as f:
+                f.truncate(start * width * 4)  # drop rows of an interrupted append
+                f.write(values[keep].tobytes())
+
+        index = pa.table({
+            "id": pa.array(ids[keep].to_numpy(), pa.string()),
+            "date": pa.array(pd.to_datetime(np.asarray(dates)[keep]).date, pa.date32()),
+            "created_utc": pa.array(pd.to_datetime(np.asarray(created_utc)[keep], utc=True),
+                                    pa.timestamp("ns", "UTC")),
+            "row": pa.array(np.arange(start, start + n), pa.int64()),
+        })
+        with pa.OSFile(self._part_path(meta["parts"]), "wb") as sink, pa.ipc.new_file(sink, index.schema) as writer:
+            writer.write_table(index)
+
+        meta.update(rows=start + n, parts=meta["parts"] + 1)
+        self._write_meta(meta)
+        known.update(ids[keep])
+        if self._index is not None:
+            self._index = pd.concat([self._index, index.to_pandas()], ignore_index=True)
+        return n
+
+    def index(self):
+        """DataFrame of id, date, created_utc and row for every committed row, in row order."""
+        if self._index is None:
+            parts = []
+            for part in range(self.meta["parts"] if self.meta else 0):
+                with pa.memory_map(self._part_path(part), "r") as source:
+                    parts.append(pa.ipc.open_file(source).read_all())
+            if parts:
+                df = pa.concat_tables(parts).to_pandas()
+                self._index = df[df["row"] < self.rows].reset_index(drop=True)
+            else:
+                self._index = pd.DataFrame({"id": pd.Series(dtype=object), "date": pd.Series(dtype=object),
+                                            "created_utc": pd.Series(dtype="datetime64[ns, UTC]"),
+                                            "row": pd.Series(dtype=np.int64)})
+        return self._index
+
+    def ids(self):
+        return self.index()["id"]
+
+    def _id_set(self):
+        if self._ids is None:
+            self._ids = set(self.ids())
+        return self._ids
+
+    def _memmap(self, name, width):
+        if not self.rows:
+            return np.zeros((0, width), dtype=np.float32)
+        return np.memmap(self._path(name), dtype=np.float32, mode="r", shape=(self.rows, width))
+
+    def probs(self):
+        """Read-only memory map of the class probabilities, shape (rows, num_labels)."""
+        return self._memmap("probs.f32", self.meta["num_labels"] if self.meta else 0)
+
+    def embeddings(self):
+        """Read-only memory map of the embeddings, shape (rows, dim)."""
+        return self._memmap("embeddings.f32", self.meta["dim"] if self.meta else 0)
+
+    def mean_pool(self, groups, block_rows=POOL_BLOCK_ROWS):
+        """
+        Mean probabilities and embeddings per group, streamed through the memory maps in blocks.
+
+        Args:
+            groups: Group label of every committed row (NaN/NaT rows are skipped)
+            block_rows: Rows decoded at a time; memory use is O(block_rows + groups)
+
+        Returns:
+            (group labels sorted, probs (n_groups, num_labels), embeddings (n_groups, dim), counts)
+        """
+        codes, labels = pd.factorize(pd.Series(groups), sort=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        means = []
+        for values in (self.probs(), self.embeddings()):
+            sums = np.zeros((len(labels), values.shape[1]))
+            for start in range(0, self.rows, block_rows):
+                block_codes = codes[start:start + block_rows]
+                order = np.argsort(block_codes, kind="stable")
+                order = order[block_codes[order] >= 0]
+                if not len(order):
+                    continue
+                sorted_codes = block_codes[order]
+                bounds = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+                block = values[start:start + block_rows][order]
+                sums[sorted_codes[bounds]] += np.add.reduceat(block, bounds, axis=0, dtype=np.float64)
+            means.append((sums / np.maximum(counts, 1)[:, None]).astype(np.float32))
+        return labels, means[0], means[1], counts
+
+    def daily_mean(self, cutoff=None, block_rows=POOL_BLOCK_ROWS):
+        """
+        Daily mean probabilities and embeddings.
+
+        Args:
+            cutoff: None groups by the post's calendar date; 'close' or 'open'
+                groups by trading session, like aggregate_session_sentiment
+
+        Returns:
+            (dates as datetime.date, probs, embeddings, counts), sorted by date
+        """
+        index = self.index()
+        if cutoff is None:
+            groups = pd.to_datetime(index["date"])
+        else:
+            from src.market_calendar import assign_sessions
+            groups = assign_sessions(index["created_utc"], cutoff=cutoff)
+        labels, probs, embeddings, counts = self.mean_pool(groups, block_rows)
+        return pd.DatetimeIndex(labels).date, probs, embeddings, counts
+
+
+def daily_finbert_features(store_path, dates, cutoff="close"):
+    """
+    Daily mean FinBERT probabilities and embeddings of a store, aligned to `dates`.
+
+    Args:
+        store_path: EmbeddingStore directory
+        dates: Dates of the rows to build (e.g. the merged dataset's 'date')
+        cutoff: Session cutoff the dates were aggregated with (None for calendar dates)
+
+    Returns:
+        (array of shape (len(dates), num_labels + dim), column names); days
+        without stored posts are zero
+    """
+    store = EmbeddingStore(store_path)
+    if not len(store):
+        raise ValueError(f"Feature store {store_path} is empty")
+    days, probs, embeddings, _ = store.daily_mean(cutoff=cutoff)
+    pos = pd.Index(days).get_indexer(pd.to_datetime(pd.Series(dates)).dt.date)
+    pooled = np.hstack([probs, embeddings])
+    out = np.where((pos >= 0)[:, None], pooled[np.maximum(pos, 0)], 0).astype(np.float32)
+    if (pos < 0).any():
+        print(f"WARNING: {int((pos < 0).sum())} of {len(pos)} days have no posts in {store_path}")
+    names = ([f"finbert_p{i}" for i in range(probs.shape[1])] +
+             [f"finbert_emb{i}" for i in range(embeddings.shape[1])])
+    return out, names
@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+import torch
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+BACKENDS = ("torch", "int8", "onnx")
+ONNX_DIR = "data/cache/onnx"
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations quantized on the fly)."""
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(model, tokenizer, path, opset=14):
+    """
+    Export a sequence-classification model to ONNX with dynamic batch and sequence axes.
+
+    Args:
+        model: fp32 Hugging Face model
+        tokenizer: Matching tokenizer (used to build the example input)
+        path: Destination .onnx file
+        opset: ONNX opset version
+
+    Returns:
+        path
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    model.eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *args):
+            return self.inner(**dict(zip(input_names, args))).logits
+
+    with torch.inference_mode():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    return path
+
+
+class OnnxSequenceClassifier:
+    """
+    onnxruntime session exposed through the small slice of the Hugging Face model
+    interface used by predict_sentiment_batched (config, device, eval, __call__).
+    """
+
+    def __init__(self, path, config, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The 'onnx' backend requires onnxruntime (pip install onnxruntime).") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.config = config
+        self.device = torch.device("cpu")
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs):
+        feed = {name: inputs[name].cpu().numpy().astype(np.int64) for name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return SequenceClassifierOutput(logits=torch.from_numpy(logits))
+
+
+class OnnxSentimentPipeline:
+    """Drop-in stand-in for the transformers pipeline when running on onnxruntime."""
+
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def __call__(self, text):
+        batch = self.tokenizer([text], truncation=True, return_tensors="pt")
+        probs = torch.softmax(self.model(**batch).logits, dim=-1)[0]
+        top = int(probs.argmax())
+        return [{"label": self.model.config.id2label[top], "score": float(probs[top])}]
+
+
+def onnx_path(model_name, revision, onnx_dir=ONNX_DIR):
+    return os.path.join(onnx_dir, f"{model_name.replace('/', '--')}-{revision}.onnx")
+
+
+def parity_report(reference_probs, probs, id2label):
+    """
+    Compare a backend's class probabilities against the fp32 reference.
+
+    Returns:
+        Dict with the label disagreement rate and top-score / probability drift
+    """
+    reference_probs = np.asarray(reference_probs, dtype=np.float64)
+    probs = np.asarray(probs, dtype=np.float64)
+    ref_top = reference_probs.argmax(axis=1)
+    top = probs.argmax(axis=1)
+    rows = np.arange(len(top))
+    score_drift = np.abs(probs[rows, top] - reference_probs[rows, ref_top])
+    prob_drift = np.abs(probs - reference_probs)
+
+    return {
+        "n": len(top),
+        "label_disagreement": float((top != ref_top).mean()) if len(top) else 0.0,
+        "disagreements_by_label": {
+            id2label[int(k)]: int(((ref_top == k) & (top != ref_top)).sum()) for k in np.unique(ref_top)
+        },
+        "score_drift_mean": float(score_drift.mean()) if len(top) else 0.0,
+        "score_drift_max": float(score_drift.max()) if len(top) else 0.0,
+        "prob_drift_max": float(prob_drift.max()) if len(top) else 0.0,
+    }
@@ -1,33 +1,451 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
 from transformers import pipeline
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import os
+import numpy as np
 import pandas as pd
+import torch
 from tqdm import tqdm
+from src.finbert_backends import (
+    BACKENDS,
+    OnnxSentimentPipeline,
+    OnnxSequenceClassifier,
+    export_onnx,
+    onnx_path,
+    quantize_int8,
+)
+from src.sentiment_cache import SentimentCache
+from src.cpu import core_slices, pin_to_cores
+
+FINBERT_MODEL = "ProsusAI/finbert"
+
+def load_finbert_pipeline(model_name=FINBERT_MODEL, backend="torch"):
+    """
+    Load FinBERT on the requested CPU backend.
+
+    Args:
+        model_name: Hugging Face model name
+        backend: 'torch' (fp32), 'int8' (dynamic int8 quantization) or 'onnx' (onnxruntime)
+
+    Returns:
+        Pipeline exposing .model and .tokenizer
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
 
-def load_finbert_pipeline():
-    model_name = "ProsusAI/finbert"
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     model = AutoModelForSequenceClassification.from_pretrained(model_name)
 
+    if backend == "int8":
+        model = quantize_int8(model)
+    elif backend == "onnx":
+        path = _ensure_onnx_export(model_name, model, tokenizer)
+        return OnnxSentimentPipeline(OnnxSequenceClassifier(path, model.config), tokenizer)
+
     sentiment_pipeline = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
     return sentiment_pipeline
 
 
-def analyze_finbert_sentiment(df):
-    if 'title' not in df.columns:
-        raise ValueError("Expected a 'title' column.")
+def _ensure_onnx_export(model_name, model=None, tokenizer=None):
+    """Export the model to ONNX once per revision and return the file path."""
+    revision = finbert_revision(model.config if model is not None else AutoConfig.from_pretrained(model_name))
+    path = onnx_path(model_name, revision)
+    if not os.path.exists(path):
+        print(f"Exporting {model_name} to {path}...")
+        tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_name)
+        model = model or AutoModelForSequenceClassification.from_pretrained(model_name)
+        export_onnx(model, tokenizer, path)
+    return path
+
+
+def finbert_revision(config):
+    """Commit hash of the locally resolved model, used to version cached results."""
+    return getattr(config, "_commit_hash", None) or "unknown"
+
+
+def length_sorted_batches(lengths, batch_size):
+    """
+    Group row positions into batches of similar token length.
+
+    Args:
+        lengths: Token length of every text
+        batch_size: Maximum number of texts per batch
+
+    Returns:
+        List of index arrays, shortest texts first
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+POOLING_METHODS = ("mean", "max_confidence", "length_weighted")
+
+
+def chunk_token_ids(token_ids, window):
+    """Split a token id list into consecutive windows of at most `window` tokens."""
+    if not token_ids:
+        return [[]]
+    return [token_ids[i:i + window] for i in range(0, len(token_ids), window)]
+
+
+def pool_chunk_probs(chunk_probs, owners, chunk_lengths, n_texts, pooling="mean"):
+    """
+    Combine per-chunk class probabilities into one row per text.
+
+    Args:
+        chunk_probs: Array (n_chunks, num_labels)
+        owners: Text position of every chunk
+        chunk_lengths: Token count of every chunk (weights for 'length_weighted')
+        n_texts: Number of texts
+        pooling: 'mean', 'max_confidence' (most confident chunk wins) or 'length_weighted'
+
+    Returns:
+        Array (n_texts, num_labels)
+    """
+    if pooling not in POOLING_METHODS:
+        raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING_METHODS}")
+
+    owners = np.asarray(owners)
+    pooled = np.zeros((n_texts, chunk_probs.shape[1]), dtype=np.float64)
+
+    if pooling == "max_confidence":
+        confidence = chunk_probs.max(axis=1)
+        # Sort by (owner, confidence) so the last chunk per owner is its most confident one.
+        order = np.lexsort((confidence, owners))
+        last = np.r_[owners[order][1:] != owners[order][:-1], True]
+        pooled[owners[order][last]] = chunk_probs[order][last]
+        return pooled.astype(np.float32)
+
+    weights = np.ones(len(owners)) if pooling == "mean" else np.asarray(chunk_lengths, dtype=np.float64)
+    np.add.at(pooled, owners, chunk_probs * weights[:, None])
+    pooled /= np.bincount(owners, weights=weights, minlength=n_texts)[:, None]
+    return pooled.astype(np.float32)
+
+
+def pool_chunk_embeddings(chunk_embeddings, chunk_probs, owners, chunk_lengths, n_texts, pooling="mean"):
+    """
+    Combine per-chunk embeddings into one row per text, weighting chunks as pool_chunk_probs does.
+
+    'max_confidence' keeps the embedding of the chunk whose probabilities won.
+
+    Returns:
+        Array (n_texts, hidden_size)
+    """
+    if pooling not in POOLING_METHODS:
+        raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING_METHODS}")
+
+    owners = np.asarray(owners)
+    if pooling == "max_confidence":
+        pooled = np.zeros((n_texts, chunk_embeddings.shape[1]), dtype=np.float32)
+        order = np.lexsort((chunk_probs.max(axis=1), owners))
+        last = np.r_[owners[order][1:] != owners[order][:-1], True]
+        pooled[owners[order][last]] = chunk_embeddings[order][last]
+        return pooled
+
+    if len(owners) == n_texts:
+        return chunk_embeddings.astype(np.float32)  # one chunk per text: nothing to pool
+    weights = np.ones(len(owners)) if pooling == "mean" else np.asarray(chunk_lengths, dtype=np.float64)
+    pooled = np.zeros((n_texts, chunk_embeddings.shape[1]), dtype=np.float64)
+    np.add.at(pooled, owners, chunk_embeddings * weights[:, None])
+    pooled /= np.bincount(owners, weights=weights, minlength=n_texts)[:, None]
+    return pooled.astype(np.float32)
+
+
+def mean_hidden_state(hidden, attention_mask):
+    """Mean of the last hidden layer over the real (unpadded) tokens of each sequence."""
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+
+
+def predict_sentiment_batched(pipe, texts, batch_size=32, max_length=512, pooling="mean", progress=True,
+                              return_embeddings=False):
+    """
+    Run the FinBERT model over texts in length-grouped, dynamically padded batches.
+
+    Texts longer than max_length tokens are split into token windows; all
+    chunks of all texts share the same batches, and each text's chunk results
+    are pooled afterwards. Each batch is only padded to its longest member, so
+    short titles are never padded out to the size of long selftexts.
+
+    Args:
+        pipe: Pipeline returned by load_finbert_pipeline
+        texts: Sequence of strings
+        batch_size: Number of chunks per forward pass
+        max_length: Token limit per chunk, including special tokens
+        pooling: How chunk results are combined (see pool_chunk_probs)
+        progress: Show a tqdm progress bar
+        return_embeddings: Also return the mean last-layer hidden state of
+            every text, taken from the same forward pass (torch/int8 backends)
+
+    Returns:
+        Array of class probabilities with shape (len(texts), num_labels), or
+        (probs, embeddings of shape (len(texts), hidden_size)) with return_embeddings
+    """
+    tokenizer, model = pipe.tokenizer, pipe.model
+    if return_embeddings and isinstance(model, OnnxSequenceClassifier):
+        raise ValueError("Embeddings need the 'torch' or 'int8' backend; the ONNX export only has logits")
+    texts = list(texts)
+    if not texts:
+        probs = np.zeros((0, model.config.num_labels), dtype=np.float32)
+        return (probs, np.zeros((0, model.config.hidden_size), dtype=np.float32)) if return_embeddings else probs
+
+    window = max_length - tokenizer.num_special_tokens_to_add()
+    token_ids = tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+
+    chunks, owners = [], []
+    for i, ids in enumerate(token_ids):
+        for chunk in chunk_token_ids(ids, window):
+            chunks.append(tokenizer.prepare_for_model(chunk, add_special_tokens=True))
+            owners.append(i)
+    lengths = [len(c["input_ids"]) for c in chunks]
+
+    chunk_probs = np.zeros((len(chunks), model.config.num_labels), dtype=np.float32)
+    if return_embeddings:
+        chunk_embeddings = np.zeros((len(chunks), model.config.hidden_size), dtype=np.float32)
+    model.eval()
+    with torch.inference_mode():
+        for idx in tqdm(length_sorted_batches(lengths, batch_size), desc="Analyzing Sentiment", disable=not progress):
+            batch = tokenizer.pad([chunks[i] for i in idx], padding=True, return_tensors="pt").to(model.device)
+            if return_embeddings:
+                output = model(**batch, output_hidden_states=True)
+                hidden = output.hidden_states[-1].float()
+                chunk_embeddings[idx] = mean_hidden_state(hidden, batch["attention_mask"]).cpu().numpy()
+            else:
+                output = model(**batch)
+            chunk_probs[idx] = torch.softmax(output.logits.float(), dim=-1).cpu().numpy()
 
-    pipe = load_finbert_pipeline()
+    probs = pool_chunk_probs(chunk_probs, owners, lengths, len(texts), pooling=pooling)
+    if not return_embeddings:
+        return probs
+    return probs, pool_chunk_embeddings(chunk_embeddings, chunk_probs, owners, lengths, len(texts), pooling=pooling)
 
-    texts = df['title'].fillna("").astype(str) + " " + df['selftext'].fillna("").astype(str)
-    sentiments = []
-    
-    for t in tqdm(texts, desc="Analyzing Sentiment"):
-        result = pipe(t[:512])[0]  # truncate to 512 tokens
-        sentiments.append({
-            "label": result['label'],  # POSITIVE / NEGATIVE / NEUTRAL
-            "score": result['score']
-        })
 
-    sent_df = pd.DataFrame(sentiments)
+_worker_pipe = None
+
+
+def _init_scoring_worker(slice_queue, backend, model_name=FINBERT_MODEL):
+    """Pin this worker to its core slice and load the model once."""
+    global _worker_pipe
+    cores = slice_queue.get()
+    pin_to_cores(cores)
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+    _worker_pipe = load_finbert_pipeline(model_name, backend=backend)
+
+
+def _score_shard(texts, batch_size, pooling, return_embeddings=False):
+    return predict_sentiment_batched(_worker_pipe, texts, batch_size=batch_size, pooling=pooling, progress=False,
+                                     return_embeddings=return_embeddings)
+
+
+def predict_sentiment_sharded(texts, workers, batch_size=32, shards_per_worker=4, backend="torch",
+                              pooling="mean", return_embeddings=False, model_name=FINBERT_MODEL):
+    """
+    Score texts on a pool of worker processes, each pinned to its own slice of cores.
+
+    Texts are ordered by length and cut into shards so every shard batches
+    well; shards are handed out dynamically for load balance and the results
+    are written back in input order. Workers are started with the 'spawn'
+    method, so callers must run under an `if __name__ == "__main__":` guard.
+
+    Args:
+        texts: Sequence of strings
+        workers: Number of worker processes
+        batch_size: Number of texts per forward pass inside a worker
+        shards_per_worker: Shards per worker; more shards balance load better
+        backend: Model backend loaded by every worker (see load_finbert_pipeline)
+        pooling: How chunks of long texts are combined (see pool_chunk_probs)
+        return_embeddings: Also return pooled hidden states (see predict_sentiment_batched)
+        model_name: Model loaded by every worker (a Hugging Face name or local directory)
+
+    Returns:
+        Array of class probabilities with shape (len(texts), num_labels), or
+        (probs, embeddings) with return_embeddings
+    """
+    if return_embeddings and backend == "onnx":
+        raise ValueError("Embeddings need the 'torch' or 'int8' backend; the ONNX export only has logits")
+    texts = list(texts)
+    config = AutoConfig.from_pretrained(model_name)
+    probs = np.zeros((len(texts), config.num_labels), dtype=np.float32)
+    embeddings = np.zeros((len(texts), config.hidden_size), dtype=np.float32) if return_embeddings else None
+    if not texts:
+        return (probs, embeddings) if return_embeddings else probs
+
+    order = np.argsort([len(t) for t in texts], kind="stable")
+    n_shards = min(len(texts), workers * shards_per_worker)
+    shards = [idx for idx in np.array_split(order, n_shards) if len(idx)]
+
+    if backend == "onnx":
+        _ensure_onnx_export(model_name)  # export once here rather than racing in every worker
+
+    ctx = mp.get_context("spawn")
+    slice_queue = ctx.Queue()
+    for cores in core_slices(workers):
+        slice_queue.put(cores)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_scoring_worker, initargs=(slice_queue, backend, model_name)) as pool:
+        futures = {pool.submit(_score_shard, [texts[i] for i in idx], batch_size, pooling, return_embeddings): idx
+                   for idx in shards}
+        for future in tqdm(futures, desc=f"Analyzing Sentiment ({workers} workers)"):
+            if return_embeddings:
+                probs[futures[future]], embeddings[futures[future]] = future.result()
+            else:
+                probs[futures[future]] = future.result()
+
+    return (probs, embeddings) if return_embeddings else probs
+
+
+def probs_to_labels(probs, id2label):
+    """Convert class probabilities to the pipeline's top label and score."""
+    top = probs.argmax(axis=1)
+    labels = [id2label[int(i)] for i in top]
+    scores = probs[np.arange(len(top)), top].astype(float)
+    return labels, scores
+
+
+EMBEDDING_BLOCK = 4096  # texts scored per block when embeddings are kept, bounding their memory
+
+
+def analyze_finbert_sentiment(df, batch_size=32, cache_path=None, max_cache_entries=500_000, workers=1,
+                              backend="torch", pooling="mean", text_columns=('title', 'selftext'),
+                              feature_store=None, model_name=FINBERT_MODEL):
+    """
+    Label every post with FinBERT.
+
+    Identical texts (crossposts, repeated titles) are scored once and the
+    result is fanned back out to all of their rows. Posts longer than the
+    model's 512-token limit are scored in token windows and pooled.
+
+    Args:
+        df: DataFrame with the text columns (posts: 'title'/'selftext', comments: 'body')
+        batch_size: Number of texts per forward pass
+        cache_path: Optional SQLite file; only cache misses are run through the model
+        max_cache_entries: Size cap of the cache before LRU eviction
+        workers: Number of scoring processes; >1 shards the texts across CPU cores
+        backend: 'torch', 'int8' or 'onnx' (see load_finbert_pipeline)
+        pooling: 'mean', 'max_confidence' or 'length_weighted' chunk pooling for long posts
+        text_columns: Columns joined with a space to form the scored text;
+            pass ('body',) to score comments from get_reddit_comments
+        feature_store: Optional src.feature_store.EmbeddingStore directory; the
+            class probabilities and pooled hidden states of posts not yet in
+            it are appended from the same forward pass (needs 'id', 'date' and
+            'created_utc' columns, and the torch or int8 backend)
+        model_name: Sequence-classification model (a Hugging Face name or
+            local directory) with FinBERT's positive/negative/neutral labels
+
+    Returns:
+        df with 'label' and 'finbert_score' (the top label's probability)
+        columns appended; Reddit's upvote 'score' is left as it is
+    """
+    text_columns = list(text_columns)
+    if text_columns[0] not in df.columns:
+        raise ValueError(f"Expected a '{text_columns[0]}' column.")
+
+    texts = df[text_columns[0]].fillna("").astype(str)
+    for column in text_columns[1:]:
+        texts = texts + " " + df[column].fillna("").astype(str)
+    codes, unique_texts = pd.factorize(texts)
+    unique_texts = list(unique_texts)
+    if len(unique_texts) < len(texts):
+        print(f"Scoring {len(unique_texts)} unique texts for {len(texts)} posts.")
+
+    config = AutoConfig.from_pretrained(model_name)
+
+    cache = None
+    if cache_path is not None:
+        model_id = f"{model_name}:{backend}:{pooling}"
+        cache = SentimentCache(cache_path, model_id, finbert_revision(config), max_entries=max_cache_entries)
+        cached = cache.get_many(unique_texts)
+        miss_idx = [i for i, p in enumerate(cached) if p is None]
+    else:
+        cached = [None] * len(unique_texts)
+        miss_idx = list(range(len(unique_texts)))
+
+    probs = np.zeros((len(unique_texts), config.num_labels), dtype=np.float32)
+    for i, p in enumerate(cached):
+        if p is not None:
+            probs[i] = p
+
+    if feature_store is not None:
+        _score_into_store(df, codes, unique_texts, probs, miss_idx, cache, feature_store, config, batch_size,
+                          workers, backend, pooling, model_name)
+    elif miss_idx:
+        miss_texts = [unique_texts[i] for i in miss_idx]
+        if workers > 1:
+            probs[miss_idx] = predict_sentiment_sharded(miss_texts, workers, batch_size=batch_size,
+                                                          backend=backend, pooling=pooling, model_name=model_name)
+        else:
+            pipe = load_finbert_pipeline(model_name, backend=backend)
+            probs[miss_idx] = predict_sentiment_batched(pipe, miss_texts, batch_size=batch_size,
+                                                          pooling=pooling)
+        if cache is not None:
+            cache.put_many(miss_texts, probs[miss_idx])
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Sentiment cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evicted, {stats['entries']} entries")
+        cache.close()
+
+    labels, scores = probs_to_labels(probs[codes], config.id2label)
+
+    sent_df = pd.DataFrame({
+        "label": labels,  # POSITIVE / NEGATIVE / NEUTRAL
+        "finbert_score": scores
+    })
     result_df = pd.concat([df.reset_index(drop=True), sent_df], axis=1)
-    return result_df
\ No newline at end of file
+    return result_df
+
+
+def _score_into_store(df, codes, unique_texts, probs, miss_idx, cache, feature_store, config, batch_size, workers,
+                      backend, pooling, model_name=FINBERT_MODEL):
+    """
+    Fill probs for the cache misses and append the vectors of posts missing from the feature store.
+
+    Texts of new posts are run through the model even when their
+    probabilities are cached, since the cache holds no embeddings. Texts are
+    scored in blocks of EMBEDDING_BLOCK, so only one block of embeddings is
+    held in memory before it is appended.
+    """
+    from src.feature_store import EmbeddingStore
+
+    missing = [c for c in ('id', 'date', 'created_utc') if c not in df.columns]
+    if missing:
+        raise ValueError(f"The feature store needs {missing} columns.")
+    store = feature_store if isinstance(feature_store, EmbeddingStore) else EmbeddingStore(
+        feature_store, model_id=f"{model_name}:{backend}:{pooling}@{finbert_revision(config)}")
+
+    ids = df['id'].astype(str).to_numpy()
+    new_posts = ~pd.Series(ids).isin(store.ids()).to_numpy() & ~pd.Series(ids).duplicated().to_numpy()
+    needed = np.zeros(len(unique_texts), dtype=bool)
+    needed[miss_idx] = True
+    needed[codes[new_posts]] = True
+    run_idx = np.flatnonzero(needed)
+    if len(run_idx):
+        print(f"Scoring {len(run_idx)} texts with embeddings for {int(new_posts.sum())} posts new to {store.root}.")
+
+    pipe = load_finbert_pipeline(model_name, backend=backend) if workers <= 1 and len(run_idx) else None
+    position = np.full(len(unique_texts), -1)
+    block_size = EMBEDDING_BLOCK * max(workers, 1)
+    for start in range(0, len(run_idx), block_size):
+        block = run_idx[start:start + block_size]
+        block_texts = [unique_texts[i] for i in block]
+        if pipe is None:
+            block_probs, block_embeddings = predict_sentiment_sharded(block_texts, workers, batch_size=batch_size,
+                                                                      backend=backend, pooling=pooling,
+                                                                      return_embeddings=True, model_name=model_name)
+        else:
+            block_probs, block_embeddings = predict_sentiment_batched(pipe, block_texts, batch_size=batch_size,
+                                                                      pooling=pooling, return_embeddings=True)
+        probs[block] = block_probs
+        if cache is not None:
+            cache.put_many(block_texts, block_probs)
+
+        position[:] = -1
+        position[block] = np.arange(len(block))
+        rows = np.flatnonzero(new_posts & (position[codes] >= 0))
+        at = position[codes[rows]]
+        store.append(ids[rows], df['date'].to_numpy()[rows], df['created_utc'].to_numpy()[rows], block_probs[at],
+                     block_embeddings[at])
@@ -0,0 +1,290 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.cpu import core_slices, init_blas_worker
+
+ANALYSIS_FEATURES = ['sentiment_avg', 'sentiment_std', '%pos', '%neg', '%neu', 'sentiment_momentum',
+                     'finbert_confidence', 'post_count', 'volatility', 'volume_spike', 'price_change']
+ANALYSIS_TARGET = 'daily_return'
+
+_BOOT_CHUNK_BYTES = 256 * 2 ** 20
+
+
+def lag_matrix(y, lags):
+    """
+    Columns of y shifted by each lag: column j holds y[t + lags[j]] at row t (NaN past the ends).
+
+    A positive lag pairs today's features with a later target, i.e. the feature leads.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    T = len(y)
+    out = np.full((T, len(lags)), np.nan)
+    for j, lag in enumerate(lags):
+        if abs(lag) >= T:
+            continue
+        if lag >= 0:
+            out[:T - lag, j] = y[lag:]
+        else:
+            out[-lag:, j] = y[:T + lag]
+    return out
+
+
+def masked_corr(X, Y):
+    """
+    Pearson correlation of every column of X with every column of Y over their jointly finite rows.
+
+    All sums are matrix products, so one call covers every (feature, lag)
+    pair; leading batch dimensions (e.g. bootstrap resamples) are supported.
+
+    Args:
+        X: (..., T, F) array, NaN where missing
+        Y: (..., T, L) array, NaN where missing
+
+    Returns:
+        (corr, n): (..., F, L) correlations (NaN with fewer than 3 pairs) and pair counts
+    """
+    mx, my = ~np.isnan(X), ~np.isnan(Y)
+    X0, Y0 = np.where(mx, X, 0.0), np.where(my, Y, 0.0)
+    mx, my = mx.astype(np.float64), my.astype(np.float64)
+    Xt, mxt = np.swapaxes(X0, -1, -2), np.swapaxes(mx, -1, -2)
+
+    n = mxt @ my
+    sx, sy = Xt @ my, mxt @ Y0
+    sxx, syy = (Xt * Xt) @ my, mxt @ (Y0 * Y0)
+    sxy = Xt @ Y0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    corr[n < 3] = np.nan
+    return corr, n
+
+
+def block_bootstrap_indices(T, n_boot, block_size, rng):
+    """Row indices of n_boot moving-block bootstrap resamples of a length-T series."""
+    block_size = max(1, min(block_size, T))
+    n_blocks = -(-T // block_size)
+    starts = rng.integers(0, T - block_size + 1, (n_boot, n_blocks))
+    return (starts[:, :, None] + np.arange(block_size)).reshape(n_boot, -1)[:, :T]
+
+
+def lagged_xcorr(X, y, max_lag=5, n_boot=0, block_size=5, ci=0.95, seed=0):
+    """
+    Cross-correlation of every feature with the target at lags -max_lag..+max_lag.
+
+    Confidence intervals come from a moving-block bootstrap over rows, which
+    keeps the serial dependence of daily series within each block. Rows are
+    resampled jointly for all features and lags, and each batch of
+    resamples is reduced with the same matrix products as the point estimate.
+
+    Args:
+        X: (T, F) feature matrix in time order, NaN where missing
+        y: (T,) target series
+        max_lag: Largest lead/lag in rows (days)
+        n_boot: Bootstrap resamples (0 skips the intervals)
+        block_size: Rows per bootstrap block
+        ci: Confidence level of the percentile intervals
+        seed: Bootstrap seed
+
+    Returns:
+        Dict with 'lags', 'corr' and 'n' ((F, L) arrays), plus 'ci_low'/'ci_high' when n_boot > 0
+    """
+    lags = np.arange(-max_lag, max_lag + 1)
+    X = np.asarray(X, dtype=np.float64)
+    Y = lag_matrix(y, lags)
+    # Centering does not change a correlation but keeps the raw sums well conditioned.
+    X = X - np.nanmean(X, axis=0)
+    Y = Y - np.nanmean(Y, axis=0)
+    corr, n = masked_corr(X, Y)
+    result = {"lags": lags, "corr": corr, "n": n}
+    if not n_boot:
+        return result
+
+    rng = np.random.default_rng(seed)
+    T, F = X.shape
+    # Each resample materializes (T, F + L) rows several times over; keep a chunk within budget.
+    chunk = max(1, _BOOT_CHUNK_BYTES // (8 * 6 * T * (F + len(lags))))
+    draws = []
+    for start in range(0, n_boot, chunk):
+        idx = block_bootstrap_indices(T, min(chunk, n_boot - start), block_size, rng)
+        draws.append(masked_corr(X[idx], Y[idx])[0])
+    draws = np.concatenate(draws)
+    alpha = (1 - ci) / 2
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanquantile(draws, [alpha, 1 - alpha], axis=0)
+    result["ci_low"], result["ci_high"] = low, high
+    return result
+
+
+def _lags_of(series, p):
+    """(..., T) -> (..., T - p, p) with column j holding series[t - 1 - j] for targets t = p..T-1."""
+    return sliding_window_view(series, p, axis=-1)[..., :-1, ::-1]
+
+
+def _rss(A, y):
+    """Residual sum of squares of a batch of least-squares fits; A (B, n, k), y (B, n)."""
+    gram = np.swapaxes(A, -1, -2) @ A
+    beta = np.linalg.pinv(gram) @ (np.swapaxes(A, -1, -2) @ y[..., None])
+    resid = y - (A @ beta)[..., 0]
+    return np.einsum('bn,bn->b', resid, resid)
+
+
+def granger_tests(dep, cause, max_lag=5):
+    """
+    Granger causality F-tests of cause -> dep for lag orders 1..max_lag, batched over series.
+
+    For each order p the restricted model regresses dep_t on a constant and
+    dep_{t-1..t-p}; the unrestricted one adds cause_{t-1..t-p}. Both are
+    fitted on the same rows (those with every value present), the same
+    sum-of-squared-residuals F-test as statsmodels' grangercausalitytests.
+
+    Args:
+        dep: (B, T) dependent series, or (T,) shared by all batches
+        cause: (B, T) candidate causes, or (T,) shared by all batches
+
+    Returns:
+        Dict with 'f_stat', 'p_value' and 'n' arrays of shape (B, max_lag)
+    """
+    from scipy.stats import f as f_dist
+
+    dep, cause = np.atleast_2d(dep).astype(np.float64), np.atleast_2d(cause).astype(np.float64)
+    dep, cause = np.broadcast_arrays(dep, cause)
+    # Standardizing each series leaves the F statistics unchanged and keeps the normal equations well scaled.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dep = (dep - np.nanmean(dep, axis=1, keepdims=True)) / np.nanstd(dep, axis=1, keepdims=True)
+        cause = (cause - np.nanmean(cause, axis=1, keepdims=True)) / np.nanstd(cause, axis=1, keepdims=True)
+
+    B, T = dep.shape
+    f_stat = np.full((B, max_lag), np.nan)
+    p_value = np.full((B, max_lag), np.nan)
+    n_obs = np.zeros((B, max_lag), dtype=np.int64)
+    for p in range(1, max_lag + 1):
+        if T - p < 2 * p + 2:
+            break
+        y = dep[:, p:]
+        restricted = np.concatenate([np.ones(y.shape + (1,)), _lags_of(dep, p)], axis=-1)
+        unrestricted = np.concatenate([restricted, _lags_of(cause, p)], axis=-1)
+        valid = np.isfinite(y) & np.isfinite(unrestricted).all(axis=-1)
+        # Missing rows are zeroed out, which drops them from both fits.
+        y = np.where(valid, y, 0.0)
+        unrestricted = np.where(valid[..., None], unrestricted, 0.0)
+        restricted = unrestricted[..., :p + 1]
+
+        rss_r, rss_u = _rss(restricted, y), _rss(unrestricted, y)
+        n = valid.sum(axis=1)
+        df_u = n - 2 * p - 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f = ((rss_r - rss_u) / p) / (rss_u / df_u)
+        f[df_u < 1] = np.nan
+        f_stat[:, p - 1] = f
+        p_value[:, p - 1] = f_dist.sf(f, p, df_u)
+        n_obs[:, p - 1] = n
+    return {"f_stat": f_stat, "p_value": p_value, "n": n_obs}
+
+
+def _analyze_group(task):
+    """Cross-correlations with bootstrap intervals and Granger tests for one ticker (or config)."""
+    X, y, features = task["X"], task["y"], task["features"]
+    xc = lagged_xcorr(X, y, task["max_lag"], task["n_boot"], task["block_size"], task["ci"], task["seed"])
+    F, L = xc["corr"].shape
+    xcorr = pd.DataFrame({
+        "group": task["group"],
+        "feature": np.repeat(features, L),
+        "lag": np.tile(xc["lags"], F),
+        "corr": xc["corr"].ravel(),
+        "n": xc["n"].ravel().astype(np.int64),
+    })
+    if "ci_low" in xc:
+        xcorr["ci_low"], xcorr["ci_high"] = xc["ci_low"].ravel(), xc["ci_high"].ravel()
+
+    frames = []
+    directions = {"feature->target": (y, X.T), "target->feature": (X.T, y)}
+    for direction, (dep, cause) in directions.items():
+        g = granger_tests(dep, cause, task["granger_lags"])
+        frames.append(pd.DataFrame({
+            "group": task["group"],
+            "feature": np.repeat(features, task["granger_lags"]),
+            "direction": direction,
+            "lag_order": np.tile(np.arange(1, task["granger_lags"] + 1), F),
+            "f_stat": g["f_stat"].ravel(),
+            "p_value": g["p_value"].ravel(),
+            "n": g["n"].ravel(),
+        }))
+    return xcorr, pd.concat(frames, ignore_index=True)
+
+
+def lead_lag_analysis(df, features=ANALYSIS_FEATURES, target=ANALYSIS_TARGET, by='ticker', max_lag=5,
+                      granger_lags=5, n_boot=1000, block_size=5, ci=0.95, workers=1, seed=0):
+    """
+    Lagged cross-correlations and Granger tests of many features against a target, per ticker.
+
+    Every (feature, lag) pair of a group is computed in one batch of matrix
+    products, bootstrap resamples included. Groups are independent and run
+    on a spawn process pool when workers > 1, each worker pinned to its own
+    cores with a matching BLAS thread cap; callers must then run under an
+    `if __name__ == "__main__":` guard.
+
+    Args:
+        df: Merged sentiment/stock frame with a 'date' column
+        features: Feature columns (those missing from df are skipped)
+        target: Target column
+        by: Group column ('ticker', or 'config' for fan-out output); None treats df as one series
+        max_lag: Cross-correlation lags -max_lag..+max_lag (positive = feature leads)
+        granger_lags: Highest Granger lag order tested
+        n_boot, block_size, ci: Moving-block bootstrap settings (n_boot=0 skips the intervals)
+        workers: Number of worker processes
+        seed: Bootstrap seed
+
+    Returns:
+        (xcorr, granger): tidy frames keyed by group and feature; xcorr has
+        one row per lag with corr, n and ci_low/ci_high, granger one row per
+        (direction, lag_order) with f_stat, p_value and n
+    """
+    features = [f for f in features if f in df.columns and f != target]
+    if not features:
+        raise ValueError("None of the requested features are in the data")
+    groups = df.groupby(by, observed=True) if by is not None and by in df.columns else [(None, df)]
+
+    tasks = []
+    for i, (group, part) in enumerate(groups):
+        part = part.sort_values('date')
+        tasks.append({"group": group, "X": part[features].to_numpy(np.float64),
+                      "y": part[target].to_numpy(np.float64), "features": features, "max_lag": max_lag,
+                      "granger_lags": granger_lags, "n_boot": n_boot, "block_size": block_size, "ci": ci,
+                      "seed": seed + i})
+
+    if workers <= 1 or len(tasks) < 2:
+        results = [_analyze_group(task) for task in tasks]
+    else:
+        ctx = mp.get_context("spawn")
+        slice_queue = ctx.Queue()
+        for cores in core_slices(workers):
+            slice_queue.put(cores)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_blas_worker,
+                                 initargs=(slice_queue,)) as pool:
+            results = [f.result() for f in as_completed([pool.submit(_analyze_group, t) for t in tasks])]
+
+    xcorr = pd.concat([r[0] for r in results], ignore_index=True)
+    granger = pd.concat([r[1] for r in results], ignore_index=True)
+    column = by or 'group'
+    xcorr = xcorr.rename(columns={'group': column}).sort_values([column, 'feature', 'lag'], ignore_index=True)
+    granger = granger.rename(columns={'group': column}).sort_values([column, 'feature', 'direction', 'lag_order'],
+                                                                     ignore_index=True)
+    return xcorr, granger
+
+
+def strongest_leads(xcorr, by='ticker', min_n=20):
+    """
+    Per group and feature, the lag with the largest |corr| and whether its interval excludes 0.
+
+    Picking the best of 2 * max_lag + 1 lags makes the interval optimistic;
+    treat it as a screen, not a test.
+    """
+    rows = xcorr[(xcorr['n'] >= min_n) & xcorr['corr'].notna()]
+    best = rows.loc[rows['corr'].abs().groupby([rows[by], rows['feature']], observed=True).idxmax()]
+    if 'ci_low' in best.columns:
+        best = best.assign(significant=(best['ci_low'] > 0) | (best['ci_high'] < 0))
+    return best.sort_values('corr', key=np.abs, ascending=False, ignore_index=True)
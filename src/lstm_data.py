@@ -0,0 +1,104 @@
+import glob
+import os
+
+import numpy as np
+import tensorflow as tf
+
+
+def write_feature_shards(X, y, directory, name="series", rows_per_shard=100_000, window_size=10):
+    """
+    Split one feature series into .npy shards the tf.data input pipeline streams from.
+
+    Consecutive shards overlap by `window_size` rows, so no window of up to
+    that size is lost at a shard boundary. Each shard is a pair of files
+    <name>-<n>.X.npy / <name>-<n>.y.npy; several series (e.g. one per ticker)
+    can share a directory, and windows never span two series.
+
+    Args:
+        X: Scaled features, shape (n_rows, n_features)
+        y: Scaled targets aligned with X
+        directory: Shard directory
+        name: Series name used in the file names
+        rows_per_shard: New rows per shard
+        window_size: Largest window that will be read from the shards
+
+    Returns:
+        List of shard paths (the .X.npy files)
+    """
+    os.makedirs(directory, exist_ok=True)
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32).reshape(len(X), -1)
+    paths = []
+    for n, start in enumerate(range(0, max(len(X) - window_size, 1), rows_per_shard)):
+        stop = min(start + rows_per_shard + window_size, len(X))
+        path = os.path.join(directory, f"{name}-{n:05d}.X.npy")
+        np.save(path, X[start:stop])
+        np.save(path[:-len(".X.npy")] + ".y.npy", y[start:stop])
+        paths.append(path)
+    return paths
+
+
+def list_shards(directory):
+    return sorted(glob.glob(os.path.join(directory, "*.X.npy")))
+
+
+def count_windows(shard_paths, window_size):
+    """Number of training windows in the shards, read from the .npy headers only."""
+    return sum(max(len(np.load(path, mmap_mode="r")) - window_size, 0) for path in shard_paths)
+
+
+def _load_shard(path):
+    path = path.decode() if isinstance(path, bytes) else path
+    X = np.load(path)
+    y = np.load(path[:-len(".X.npy")] + ".y.npy")
+    return X, y
+
+
+def shard_dataset(shards, window_size=10, batch_size=256, shuffle=False, shuffle_buffer=10_000,
+                  cache=None, seed=None):
+    """
+    tf.data pipeline of (window, next target) batches streamed from feature shards.
+
+    Shards are loaded by a parallel map, optionally cached (raw rows, before
+    windowing, so the cache is not window_size times larger), cut into
+    windows with tf.signal.frame in a second parallel map, then shuffled,
+    batched and prefetched. Only the shards in flight are ever in memory.
+
+    Args:
+        shards: Shard directory or list of .X.npy paths
+        window_size: Rows per window
+        batch_size: Windows per batch
+        shuffle: Shuffle shard order and windows (within shuffle_buffer)
+        shuffle_buffer: Windows held by the shuffle buffer
+        cache: None, "memory", or a file prefix for an on-disk cache
+        seed: Shuffle seed
+
+    Returns:
+        tf.data.Dataset yielding (X_batch, y_batch)
+    """
+    paths = list_shards(shards) if isinstance(shards, str) else list(shards)
+    if not paths:
+        raise ValueError(f"No feature shards found in {shards}")
+    n_features = np.load(paths[0], mmap_mode="r").shape[1]
+    n_targets = np.load(paths[0][:-len(".X.npy")] + ".y.npy", mmap_mode="r").shape[1]
+
+    def load(path):
+        X, y = tf.numpy_function(_load_shard, [path], (tf.float32, tf.float32))
+        return tf.ensure_shape(X, (None, n_features)), tf.ensure_shape(y, (None, n_targets))
+
+    def to_windows(X, y):
+        # frame() yields len - window + 1 windows; the last one has no next-step target.
+        windows = tf.signal.frame(X, window_size, 1, axis=0)[:-1]
+        return windows, y[window_size:]
+
+    ds = tf.data.Dataset.from_tensor_slices(paths)
+    if shuffle:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    if cache is not None:
+        ds = ds.cache("" if cache == "memory" else cache)
+    ds = ds.map(to_windows, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    ds = ds.unbatch()
+    if shuffle:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
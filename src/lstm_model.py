@@ -1,25 +1,98 @@
+import time
+
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
-
-def build_lstm_model(input_shape):
-    model = Sequential([
-        LSTM(64, input_shape=input_shape, return_sequences=True),
-        Dropout(0.2),
-        LSTM(32),
-        Dropout(0.2),
-        Dense(1)
-    ])
-    model.compile(optimizer='adam', loss='mse')
+from tensorflow.keras.callbacks import Callback, EarlyStopping
+from tensorflow.keras.optimizers import Adam
+
+def build_lstm_model(input_shape, units=(64, 32), dropout=0.2, learning_rate=None):
+    """
+    Stacked LSTM regressor.
+
+    Args:
+        input_shape: (window_size, n_features)
+        units: Units of each LSTM layer, first to last
+        dropout: Dropout after every LSTM layer
+        learning_rate: Adam learning rate (None for Keras' default)
+    """
+    layers = []
+    for i, n in enumerate(units):
+        last = i == len(units) - 1
+        layers.append(LSTM(n, input_shape=input_shape, return_sequences=not last) if i == 0
+                      else LSTM(n, return_sequences=not last))
+        layers.append(Dropout(dropout))
+    model = Sequential(layers + [Dense(1)])
+    model.compile(optimizer=Adam(learning_rate) if learning_rate else 'adam', loss='mse')
     return model
 
+class ThroughputCallback(Callback):
+    """Records wall time and training samples per second of every epoch."""
+
+    def __init__(self, samples_per_epoch=None, batch_size=None):
+        super().__init__()
+        self.samples_per_epoch = samples_per_epoch
+        self.batch_size = batch_size
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._batches = 0
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._batches += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._start
+        # Without an exact count, assume every batch is full.
+        samples = self.samples_per_epoch or self._batches * (self.batch_size or 0)
+        record = {"epoch": epoch + 1, "seconds": seconds, "samples": samples,
+                  "samples_per_s": samples / seconds if seconds > 0 else 0.0}
+        self.epochs.append(record)
+        print(f"epoch {epoch + 1}: {seconds:.2f}s, {record['samples_per_s']:.0f} samples/s")
+
+    def summary(self):
+        """Mean epoch time and throughput, skipping the first (warm-up) epoch when possible."""
+        epochs = self.epochs[1:] or self.epochs
+        seconds = sum(e["seconds"] for e in epochs)
+        return {"epochs": len(self.epochs), "mean_epoch_s": seconds / len(epochs) if epochs else 0.0,
+                "samples_per_s": sum(e["samples"] for e in epochs) / seconds if seconds > 0 else 0.0}
+
 def train_lstm_model(model, X_train, y_train, X_val, y_val, epochs=50, batch_size=16):
     early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
-    return model.fit(
+    throughput = ThroughputCallback(samples_per_epoch=len(X_train), batch_size=batch_size)
+    history = model.fit(
         X_train, y_train,
         validation_data=(X_val, y_val),
         epochs=epochs,
         batch_size=batch_size,
-        callbacks=[early_stop],
+        callbacks=[early_stop, throughput],
         verbose=2
-    )
\ No newline at end of file
+    )
+    history.throughput = throughput.summary()
+    return history
+
+def train_lstm_dataset(model, train_ds, val_ds=None, epochs=50, samples_per_epoch=None, batch_size=None,
+                       patience=5):
+    """
+    Train on tf.data pipelines (e.g. src.lstm_data.shard_dataset) instead of in-memory arrays.
+
+    Args:
+        model: Compiled Keras model
+        train_ds: Dataset of (X_batch, y_batch)
+        val_ds: Optional validation dataset; enables early stopping on val_loss
+        epochs: Maximum number of epochs
+        samples_per_epoch: Exact training windows per epoch (src.lstm_data.count_windows),
+            used for the samples/s figures
+        batch_size: Batch size of train_ds, used when samples_per_epoch is unknown
+        patience: Early-stopping patience in epochs
+
+    Returns:
+        Keras History with a `throughput` summary attribute
+    """
+    throughput = ThroughputCallback(samples_per_epoch=samples_per_epoch, batch_size=batch_size)
+    callbacks = [throughput]
+    if val_ds is not None:
+        callbacks.insert(0, EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True))
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks, verbose=2)
+    history.throughput = throughput.summary()
+    return history
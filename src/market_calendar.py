@@ -0,0 +1,184 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay,
+                                    USMartinLutherKingJr, USMemorialDay, USPresidentsDay, USThanksgivingDay,
+                                    nearest_workday, sunday_to_monday)
+
+EXCHANGE_TZ = "America/New_York"
+REGULAR_OPEN = timedelta(hours=9, minutes=30)
+REGULAR_CLOSE = timedelta(hours=16)
+EARLY_CLOSE = timedelta(hours=13)
+
+# Posts after a session's cutoff roll forward to the next session.
+#   'close': everything up to the closing bell counts for that day (after-close posts -> next session)
+#   'open':  only pre-market information counts (posts during the session -> next session); use this
+#            when the target is the open-to-close daily_return, so intraday posts cannot leak into it
+CUTOFFS = ("open", "close")
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Full-day NYSE closures (regular holiday rules; one-off closures are not included)."""
+    rules = [
+        # A Saturday New Year's Day is not observed on the Friday before.
+        Holiday("NewYearsDay", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("IndependenceDay", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def _early_closes(days, holidays):
+    """Sessions closing at 13:00: July 3 (before a weekday July 4), the day after Thanksgiving and Christmas Eve."""
+    days = pd.DatetimeIndex(days)
+    thanksgiving = set(holidays[(holidays.month == 11)])
+    early = ((days.month == 7) & (days.day == 3) & (days.dayofweek <= 3))
+    early |= (days.month == 12) & (days.day == 24)
+    early |= np.array([d - pd.Timedelta(days=1) in thanksgiving for d in days], dtype=bool)
+    return early
+
+
+def trading_sessions(start, end, tz=EXCHANGE_TZ):
+    """
+    Regular NYSE sessions between two dates (inclusive), from a local rules-based calendar.
+
+    Returns:
+        DataFrame with 'session' (datetime64 day), 'open' and 'close' (UTC
+        timestamps; 13:00 local on early-close days)
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    holidays = NYSEHolidayCalendar().holidays(start - pd.Timedelta(days=7), end + pd.Timedelta(days=7))
+    days = pd.bdate_range(start, end, freq="C", holidays=holidays)
+    close = np.where(_early_closes(days, holidays), EARLY_CLOSE, REGULAR_CLOSE)
+    return pd.DataFrame({
+        "session": days.values.astype("datetime64[ns]"),
+        "open": (days + REGULAR_OPEN).tz_localize(tz).tz_convert("UTC"),
+        "close": (days + pd.to_timedelta(close)).tz_localize(tz).tz_convert("UTC"),
+    })
+
+
+def trading_bars(start, end, freq="1h", tz=EXCHANGE_TZ):
+    """
+    Intraday bars of the regular sessions, anchored at the open (09:30, 10:30, ...).
+
+    The last bar of a session ends at the close and may be shorter than freq.
+
+    Returns:
+        DataFrame with 'session', 'bar_start' and 'bar_end' (UTC)
+    """
+    sessions = trading_sessions(start, end, tz)
+    step = pd.Timedelta(freq).value
+    open_ns = sessions["open"].to_numpy("datetime64[ns]").astype(np.int64)
+    close_ns = sessions["close"].to_numpy("datetime64[ns]").astype(np.int64)
+    per_session = -(-(close_ns - open_ns) // step)
+    starts = open_ns[:, None] + np.arange(per_session.max(initial=0)) * step
+    keep = starts < close_ns[:, None]
+    bar_start = starts[keep]
+    bar_end = np.minimum(bar_start + step, np.broadcast_to(close_ns[:, None], starts.shape)[keep])
+    return pd.DataFrame({
+        "session": np.broadcast_to(sessions["session"].to_numpy()[:, None], starts.shape)[keep],
+        "bar_start": pd.to_datetime(bar_start, utc=True),
+        "bar_end": pd.to_datetime(bar_end, utc=True),
+    })
+
+
+def _utc_ns(timestamps):
+    """Timestamps (naive values are taken as UTC) as int64 nanoseconds since the epoch."""
+    return pd.to_datetime(timestamps, utc=True).to_numpy("datetime64[ns]").astype(np.int64)
+
+
+def next_boundary(timestamps, boundaries):
+    """
+    Index of the first boundary strictly after each timestamp, -1 past the last one or for a missing timestamp.
+
+    One binary search per timestamp (np.searchsorted), so aligning n posts
+    to m sorted boundaries costs O(n log m) with no sort of the posts.
+    """
+    ns = _utc_ns(timestamps)
+    idx = np.searchsorted(_utc_ns(boundaries), ns, side="right")
+    # NaT is INT64_MIN as an integer, which would sort before every boundary.
+    idx[(idx == len(boundaries)) | (ns == np.iinfo(np.int64).min)] = -1
+    return idx
+
+
+def assign_sessions(created_utc, sessions=None, cutoff="close"):
+    """
+    Trading session each post counts toward, given its creation time.
+
+    A post belongs to the first session whose cutoff ('open' or 'close', see
+    CUTOFFS) is after it, so weekend, holiday and after-hours posts roll
+    forward to the next session instead of being dropped by a calendar-date
+    join.
+
+    Args:
+        created_utc: Post timestamps (array-like; naive values are taken as UTC)
+        sessions: trading_sessions() frame; built to cover the posts when None
+        cutoff: 'close' or 'open'
+
+    Returns:
+        datetime64[ns] array of session days (NaT past the calendar's end and
+        for posts without a timestamp)
+    """
+    if cutoff not in CUTOFFS:
+        raise ValueError(f"Unknown cutoff '{cutoff}'. Expected one of {CUTOFFS}")
+    if sessions is None:
+        sessions = sessions_covering(created_utc)
+    idx = next_boundary(created_utc, sessions[cutoff])
+    days = sessions["session"].to_numpy("datetime64[ns]")
+    out = days[idx]
+    out[idx < 0] = np.datetime64("NaT", "ns")
+    return out
+
+
+def assign_bars(created_utc, bars):
+    """
+    Start of the intraday bar each post counts toward: the first bar opening after it.
+
+    Posts made during a bar count toward the following bar, so a bar's
+    sentiment only uses information available when it opens.
+
+    Returns:
+        DatetimeIndex (UTC) of bar starts (NaT past the last bar and for posts
+        without a timestamp)
+    """
+    idx = next_boundary(created_utc, bars["bar_start"])
+    starts = bars["bar_start"].to_numpy("datetime64[ns]")
+    out = starts[idx]
+    out[idx < 0] = np.datetime64("NaT", "ns")
+    return pd.DatetimeIndex(out).tz_localize("UTC")
+
+
+def sessions_covering(created_utc, pad_days=10):
+    """trading_sessions() spanning the posts, padded so the newest posts still find a next session."""
+    ts = pd.to_datetime(created_utc, utc=True)
+    start = ts.min().tz_convert(EXCHANGE_TZ).tz_localize(None) - pd.Timedelta(days=1)
+    end = ts.max().tz_convert(EXCHANGE_TZ).tz_localize(None) + pd.Timedelta(days=pad_days)
+    return trading_sessions(start, end)
+
+
+def align_posts(df, cutoff="close", freq=None):
+    """
+    Add the trading session (and optionally intraday bar) every post counts toward.
+
+    Args:
+        df: Posts with a 'created_utc' column
+        cutoff: Session cutoff, 'close' or 'open' (see CUTOFFS)
+        freq: Also add 'bar_start' for intraday bars of this length (e.g. '1h')
+
+    Returns:
+        df with 'session' (datetime64 day) and, with freq, 'bar_start' (UTC);
+        posts past the calendar's end or without created_utc get NaT
+    """
+    sessions = sessions_covering(df['created_utc'])
+    out = df.assign(session=assign_sessions(df['created_utc'], sessions, cutoff))
+    if freq is not None:
+        bars = trading_bars(sessions['session'].iloc[0], sessions['session'].iloc[-1], freq)
+        out['bar_start'] = assign_bars(df['created_utc'], bars)
+    return out
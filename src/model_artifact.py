@@ -0,0 +1,92 @@
+import json
+import os
+import pickle
+import shutil
+import time
+
+MODEL_DIR = "models"
+
+
+def list_versions(name, root=MODEL_DIR):
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(d[1:]) for d in os.listdir(directory) if d.startswith("v") and d[1:].isdigit())
+
+
+def save_model_artifact(model, scaler_X, scaler_y, features, target, window_size, name="tsla_lstm",
+                        root=MODEL_DIR, metrics=None):
+    """
+    Save a trained model with its fitted scalers as the next version of `name`.
+
+    Layout: root/name/v<N>/{model.keras, scalers.pkl, meta.json}. The version
+    directory is written under a temporary name and renamed, so readers never
+    see a half-written artifact.
+
+    Returns:
+        Path of the new version directory
+    """
+    import tensorflow as tf
+
+    versions = list_versions(name, root)
+    version = (versions[-1] + 1) if versions else 1
+    final = os.path.join(root, name, f"v{version}")
+    tmp = final + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    model.save(os.path.join(tmp, "model.keras"))
+    with open(os.path.join(tmp, "scalers.pkl"), "wb") as f:
+        pickle.dump({"X": scaler_X, "y": scaler_y}, f)
+    meta = {
+        "name": name,
+        "version": version,
+        "created_at": time.time(),
+        "features": list(features),
+        "target": target,
+        "window_size": window_size,
+        "tensorflow": tf.__version__,
+        "metrics": metrics or {},
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    os.rename(tmp, final)
+    return final
+
+
+class ModelArtifact:
+    """A loaded model version: the Keras model, scaler_X/scaler_y and its metadata."""
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "scalers.pkl"), "rb") as f:
+            scalers = pickle.load(f)
+        self.scaler_X, self.scaler_y = scalers["X"], scalers["y"]
+        # Inference only: no optimizer state is needed.
+        self.model = tf.keras.models.load_model(os.path.join(path, "model.keras"), compile=False)
+
+    @property
+    def features(self):
+        return self.meta["features"]
+
+    @property
+    def window_size(self):
+        return self.meta["window_size"]
+
+    def __repr__(self):
+        return f"ModelArtifact({self.meta['name']!r}, v{self.meta['version']})"
+
+
+def load_model_artifact(name="tsla_lstm", version=None, root=MODEL_DIR):
+    """Load one version of a model (the latest when version is None)."""
+    versions = list_versions(name, root)
+    if not versions:
+        raise FileNotFoundError(f"No saved versions of model '{name}' in {root}")
+    version = versions[-1] if version is None else version
+    if version not in versions:
+        raise FileNotFoundError(f"Model '{name}' has no version {version}; available: {versions}")
+    return ModelArtifact(os.path.join(root, name, f"v{version}"))
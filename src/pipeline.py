@@ -0,0 +1,255 @@
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import resource
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+STATE_PATH = "data/cache/pipeline_state.json"
+RUN_LOG = "data/cache/pipeline_runs.jsonl"
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    Args:
+        name: Unique stage name
+        func: Module-level function called as func(**params); it reads its
+            inputs from and writes its outputs to disk
+        inputs: Files the stage reads; a file produced by another stage makes
+            that stage a dependency
+        outputs: Files the stage writes
+        params: Keyword arguments for func (part of the fingerprint)
+        volatile: Always run (the stage pulls from an external source)
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, volatile=False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.volatile = volatile
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def _file_digest(path):
+    """Content hash of a file, or of every file (with its relative path) in a dataset directory."""
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                h.update(os.path.relpath(file_path, path).encode())
+                h.update(_file_digest(file_path).encode())
+        return h.hexdigest()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _package_digest(directory):
+    """Hash of every .py file directly in a directory (the package a stage function lives in)."""
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            h.update(name.encode())
+            h.update(_file_digest(os.path.join(directory, name)).encode())
+    return h.hexdigest()
+
+
+def fingerprint(stage):
+    """
+    Hash of the stage's code, parameters and input file contents.
+
+    The code part covers every module of the package the stage function is
+    defined in (src/), not just the function: stage functions are thin
+    wrappers, often importing their helpers lazily, so editing
+    src/sentiment_aggregation.py must re-run the stages built on it.
+    """
+    h = hashlib.sha256()
+    h.update(stage.name.encode())
+    h.update(inspect.getsource(stage.func).encode())
+    h.update(_package_digest(os.path.dirname(os.path.abspath(inspect.getsourcefile(stage.func)))).encode())
+    h.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for path in stage.inputs:
+        h.update(path.encode())
+        h.update(_file_digest(path).encode() if os.path.exists(path) else b"<missing>")
+    return h.hexdigest()
+
+
+def _dependencies(stages):
+    producers = {path: stage.name for stage in stages for path in stage.outputs}
+    return {
+        stage.name: {producers[p] for p in stage.inputs if p in producers and producers[p] != stage.name}
+        for stage in stages
+    }
+
+
+def _topological_order(stages, deps):
+    order, done = [], set()
+    pending = [s.name for s in stages]
+    while pending:
+        ready = [name for name in pending if deps[name] <= done]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle among {pending}")
+        order.extend(ready)
+        done.update(ready)
+        pending = [name for name in pending if name not in done]
+    return order
+
+
+def _downstream(name, deps):
+    found, frontier = {name}, [name]
+    while frontier:
+        current = frontier.pop()
+        for stage, requires in deps.items():
+            if current in requires and stage not in found:
+                found.add(stage)
+                frontier.append(stage)
+    return found
+
+
+def _run_stage(func, params):
+    """Executed in a fresh worker process; returns wall time and the process's peak RSS."""
+    start = time.perf_counter()
+    try:
+        func(**params)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    wall = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return {"wall_s": wall, "peak_rss_mb": peak_mb, "error": error}
+
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(path, state):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def run_pipeline(stages, only=None, from_stage=None, force=False, max_workers=2,
+                 state_path=STATE_PATH, run_log=RUN_LOG):
+    """
+    Run stages in dependency order, in parallel where the graph allows.
+
+    A stage is skipped when its fingerprint matches the last successful run
+    and all of its outputs exist. Stages selected with `only` or
+    `from_stage` are always re-run. Every stage runs in its own worker
+    process, so its recorded peak RSS is its own.
+
+    Args:
+        stages: List of Stage
+        only: Names of the only stages to run
+        from_stage: Re-run this stage and everything downstream of it
+        force: Re-run every selected stage regardless of fingerprints
+        max_workers: Maximum number of stages running at once
+        state_path: JSON file holding the last successful fingerprint per stage
+        run_log: JSONL file the per-stage metrics are appended to
+
+    Returns:
+        Dict stage name -> result ('ok', 'skipped', 'failed', 'blocked') with metrics
+    """
+    by_name = {s.name: s for s in stages}
+    deps = _dependencies(stages)
+    order = _topological_order(stages, deps)
+
+    for name in list(only or []) + ([from_stage] if from_stage else []):
+        if name not in by_name:
+            raise ValueError(f"Unknown stage '{name}'. Stages: {', '.join(order)}")
+
+    if only:
+        selected, forced = set(only), set(only)
+    elif from_stage:
+        forced = _downstream(from_stage, deps)
+        selected = forced
+    else:
+        selected, forced = set(order), set(order) if force else set()
+
+    state = _load_state(state_path)
+    results = {}
+    run_id = time.strftime("%Y%m%dT%H%M%S")
+
+    def _is_fresh(stage):
+        entry = state.get(stage.name)
+        return (entry is not None and not stage.volatile and stage.name not in forced
+                and entry.get("fingerprint") == fingerprint(stage)
+                and all(os.path.exists(p) for p in stage.outputs))
+
+    remaining = [name for name in order if name in selected]
+    running = {}
+    ctx = mp.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, max_tasks_per_child=1) as pool:
+        while remaining or running:
+            for name in list(remaining):
+                stage_deps = deps[name] & selected
+                if any(results.get(d, {}).get("status") in ("failed", "blocked") for d in stage_deps):
+                    results[name] = {"status": "blocked"}
+                    print(f"[{name}] blocked by a failed dependency")
+                    remaining.remove(name)
+                    continue
+                if not all(d in results for d in stage_deps) or len(running) >= max_workers:
+                    continue
+                stage = by_name[name]
+                remaining.remove(name)
+                if _is_fresh(stage):
+                    results[name] = {"status": "skipped"}
+                    print(f"[{name}] inputs unchanged, skipping")
+                    continue
+                print(f"[{name}] running...")
+                running[pool.submit(_run_stage, stage.func, stage.params)] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                metrics = future.result()
+                if metrics["error"]:
+                    results[name] = {"status": "failed", **metrics}
+                    print(f"[{name}] FAILED after {metrics['wall_s']:.1f}s\n{metrics['error']}")
+                else:
+                    results[name] = {"status": "ok", **metrics}
+                    state[name] = {"fingerprint": fingerprint(by_name[name]), "finished": time.time()}
+                    _save_state(state_path, state)
+                    print(f"[{name}] done in {metrics['wall_s']:.1f}s, peak RSS {metrics['peak_rss_mb']:.0f} MiB")
+
+    directory = os.path.dirname(run_log)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(run_log, "a") as f:
+        for name in order:
+            if name in results:
+                entry = {k: v for k, v in results[name].items() if k != "error"}
+                f.write(json.dumps({"run": run_id, "stage": name, **entry}) + "\n")
+
+    return results
+
+
+def print_summary(results):
+    print(f"\n{'stage':<22}{'status':<10}{'wall s':>9}{'peak RSS MiB':>14}")
+    for name, r in results.items():
+        wall = f"{r['wall_s']:.1f}" if "wall_s" in r else "-"
+        peak = f"{r['peak_rss_mb']:.0f}" if "peak_rss_mb" in r else "-"
+        print(f"{name:<22}{r['status']:<10}{wall:>9}{peak:>14}")
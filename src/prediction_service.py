@@ -0,0 +1,187 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()
+
+
+class PredictionService:
+    """
+    Keeps one model warm and micro-batches concurrent requests into single forward passes.
+
+    Requests are queued; a background thread takes the first waiting request,
+    collects more for up to max_wait_ms (or until max_batch_size), scales
+    them, runs one predict_on_batch call and inverse-scales the results.
+
+    Args:
+        artifact: ModelArtifact (see src.model_artifact)
+        max_batch_size: Largest batch sent to the model
+        max_wait_ms: How long the first request of a batch waits for company
+        latency_window: Number of recent request latencies kept for stats()
+    """
+
+    def __init__(self, artifact, max_batch_size=64, max_wait_ms=2.0, latency_window=10_000):
+        self.artifact = artifact
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._thread = None
+
+    def start(self):
+        # Warm up at two batch sizes so requests do not pay graph tracing, and
+        # Keras traces a batch-size-agnostic function instead of one per size.
+        for n in (1, self.max_batch_size):
+            shape = (n, self.artifact.window_size, len(self.artifact.features))
+            self.artifact.model.predict_on_batch(np.zeros(shape, dtype=np.float32))
+        self._thread = threading.Thread(target=self._loop, name="prediction-service", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _as_window(self, window):
+        if hasattr(window, "columns"):
+            window = window[self.artifact.features].to_numpy()
+        window = np.asarray(window, dtype=np.float64)
+        expected = (self.artifact.window_size, len(self.artifact.features))
+        if window.shape != expected:
+            raise ValueError(f"Expected a window of shape {expected} (rows x features), got {window.shape}")
+        return window
+
+    def submit(self, window):
+        """
+        Queue one window of unscaled feature rows.
+
+        Args:
+            window: Array (window_size, n_features) or a DataFrame holding the
+                artifact's feature columns
+
+        Returns:
+            concurrent.futures.Future resolving to the predicted target value
+        """
+        if self._thread is None:
+            raise RuntimeError("PredictionService is not running; call start() first")
+        future = Future()
+        self._queue.put((self._as_window(window), future, time.perf_counter()))
+        return future
+
+    def predict(self, window, timeout=None):
+        return self.submit(window).result(timeout)
+
+    def predict_many(self, windows, timeout=None):
+        futures = [self.submit(w) for w in windows]
+        return [f.result(timeout) for f in futures]
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stop = [item], False
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        a = self.artifact
+        try:
+            X = np.stack([window for window, _, _ in batch])
+            n, w, f = X.shape
+            X_scaled = a.scaler_X.transform(X.reshape(-1, f)).reshape(n, w, f).astype(np.float32)
+            y = a.scaler_y.inverse_transform(np.asarray(a.model.predict_on_batch(X_scaled)).reshape(n, -1)).ravel()
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        now = time.perf_counter()
+        for (_, future, queued), value in zip(batch, y):
+            future.set_result(float(value))
+            self._latencies.append(now - queued)
+        self._batch_sizes.append(n)
+
+    def stats(self):
+        """Latency percentiles (ms) and batching of the recent requests."""
+        latencies = np.array(self._latencies) * 1000
+        if not len(latencies):
+            return {"requests": 0}
+        return {
+            "requests": len(latencies),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "mean_batch": float(np.mean(self._batch_sizes)),
+        }
+
+
+def create_app(services):
+    """
+    aiohttp application exposing prediction services over HTTP.
+
+    Routes:
+        POST /predict/{model}  body {"window": [[...], ...]} or {"windows": [...]}
+        GET  /stats            latency stats of every model
+        GET  /health
+
+    Args:
+        services: Dict model name (e.g. a ticker) -> running PredictionService
+    """
+    from aiohttp import web
+
+    async def predict(request):
+        service = services.get(request.match_info["model"])
+        if service is None:
+            raise web.HTTPNotFound(text=f"Unknown model; available: {sorted(services)}")
+        body = await request.json()
+        windows = body["windows"] if "windows" in body else [body.get("window")]
+        try:
+            futures = [asyncio.wrap_future(service.submit(w)) for w in windows]
+        except (TypeError, ValueError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        predictions = await asyncio.gather(*futures)
+        return web.json_response({"model": request.match_info["model"],
+                                  "version": service.artifact.meta["version"],
+                                  "predictions": predictions})
+
+    async def stats(request):
+        return web.json_response({name: s.stats() for name, s in services.items()})
+
+    async def health(request):
+        return web.json_response({"status": "ok", "models": sorted(services)})
+
+    app = web.Application()
+    app.add_routes([web.post("/predict/{model}", predict), web.get("/stats", stats), web.get("/health", health)])
+    return app
+
+
+def serve_http(services, host="127.0.0.1", port=8080):
+    """Serve create_app(services) until interrupted."""
+    from aiohttp import web
+
+    web.run_app(create_app(services), host=host, port=port)
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+from src.market_calendar import trading_sessions
+
+PRICE_STORE = "data/cache/prices.sqlite"
+
+
+class PriceStore:
+    """
+    Local SQLite store of daily OHLCV bars keyed by (ticker, date).
+
+    Besides the bars themselves the store records, per ticker, the
+    contiguous date range that has already been downloaded. Weekends and
+    holidays have no rows, so only this coverage can tell a missing day
+    from a non-trading day.
+    """
+
+    def __init__(self, path=PRICE_STORE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS prices (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                Open REAL, Close REAL, High REAL, Low REAL, Volume REAL,
+                PRIMARY KEY (ticker, date)
+            );
+            CREATE TABLE IF NOT EXISTS coverage (
+                ticker TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL
+            );
+        """)
+
+    def coverage(self, ticker):
+        row = self.conn.execute("SELECT start, end FROM coverage WHERE ticker = ?", (ticker,)).fetchone()
+        return (date.fromisoformat(row[0]), date.fromisoformat(row[1])) if row else None
+
+    def missing_ranges(self, ticker, start, end):
+        """
+        Date ranges (inclusive) that must be downloaded to cover [start, end].
+
+        Ranges are extended to touch the existing coverage so it stays contiguous.
+        """
+        covered = self.coverage(ticker)
+        if covered is None:
+            return [(start, end)]
+        cov_start, cov_end = covered
+        ranges = []
+        if start < cov_start:
+            ranges.append((start, cov_start - timedelta(days=1)))
+        if end > cov_end:
+            ranges.append((cov_end + timedelta(days=1), end))
+        return ranges
+
+    def write(self, ticker, df, start, end):
+        """
+        Upsert downloaded bars and extend the ticker's coverage to [start, end].
+
+        The current (UTC) day, the clock get_stock_data_bulk's ranges use, is
+        never marked as covered because its bar may still change.
+        An empty download only counts as coverage when [start, end] holds no
+        NYSE session: yfinance answers failures and rate limits with an empty
+        frame, and those ranges must be fetched again on the next run.
+        """
+        rows = []
+        if df is not None and not df.empty:
+            rows = [
+                (ticker, r.date.isoformat(), r.Open, r.Close, r.High, r.Low, r.Volume)
+                for r in df.itertuples(index=False)
+            ]
+        end = min(end, datetime.now(timezone.utc).date() - timedelta(days=1))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO prices (ticker, date, Open, Close, High, Low, Volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if end < start:
+                return
+            if not rows and len(trading_sessions(start, end)):
+                print(f"--- Warning: no bars for {ticker} between {start} and {end}; left uncovered ---")
+                return
+            covered = self.coverage(ticker)
+            if covered is not None:
+                start, end = min(start, covered[0]), max(end, covered[1])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO coverage (ticker, start, end) VALUES (?, ?, ?)",
+                (ticker, start.isoformat(), end.isoformat()),
+            )
+
+    def drop(self, ticker):
+        """Forget a ticker's bars and coverage (e.g. after a split re-adjusted its history)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM prices WHERE ticker = ?", (ticker,))
+            self.conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+
+    def read(self, ticker, start, end):
+        """Stored bars for [start, end] in the get_stock_data column layout."""
+        df = pd.read_sql_query(
+            "SELECT date, Open, Close, High, Low, Volume FROM prices "
+            "WHERE ticker = ? AND date BETWEEN ? AND ? ORDER BY date",
+            self.conn, params=(ticker, start.isoformat(), end.isoformat()),
+        )
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        return df
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,469 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OAUTH_URL = "https://oauth.reddit.com"
+AUTH_URL = "https://www.reddit.com/api/v1/access_token"
+REDDIT_QPM = 100  # requests per minute allowed per OAuth client
+PAGE_SIZE = 100   # maximum listing page size
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every request of a client.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. The
+    bucket can also be paused until a server-reported reset time when the
+    X-Ratelimit headers say the quota is exhausted.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst size
+    """
+
+    def __init__(self, rate=REDDIT_QPM / 60, capacity=10):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def update_from_headers(self, headers):
+        """Pause the bucket when Reddit reports the quota is used up."""
+        remaining = headers.get("X-Ratelimit-Remaining")
+        reset = headers.get("X-Ratelimit-Reset")
+        if remaining is None or reset is None:
+            return
+        if float(remaining) < 1:
+            self.paused_until = max(self.paused_until, time.monotonic() + float(reset))
+            self.tokens = 0
+
+
+def post_record(data, subreddit, query=None, source=None):
+    created_time = datetime.fromtimestamp(data["created_utc"], tz=timezone.utc)
+    record = {
+        "id": data["id"],
+        "date": created_time.date(),
+        "created_utc": created_time,
+        "title": data.get("title", ""),
+        "selftext": data.get("selftext", ""),
+        "score": data.get("score"),
+        "upvote_ratio": data.get("upvote_ratio"),
+        "num_comments": data.get("num_comments"),
+        "subreddit": subreddit,
+        "url": data.get("url"),
+        "permalink": data.get("permalink"),
+        "query": query,
+    }
+    if source is not None:
+        record["source"] = source
+    return record
+
+
+class AsyncRedditClient:
+    """
+    Minimal application-only OAuth client for Reddit's JSON API.
+
+    The base URLs are configurable so the client can be pointed at a local
+    fake server (see benchmarks/fake_reddit.py).
+
+    Args:
+        client_id: Reddit app id (defaults to REDDIT_CLIENT_ID)
+        client_secret: Reddit app secret (defaults to REDDIT_CLIENT_SECRET)
+        user_agent: User-Agent header
+        base_url: API root for authenticated requests
+        auth_url: Token endpoint
+        bucket: TokenBucket shared across requests (one is created if omitted)
+        max_retries: Retries on 429 / 5xx responses
+    """
+
+    def __init__(self, client_id=None, client_secret=None, user_agent="sentiment-tracker",
+                 base_url=OAUTH_URL, auth_url=AUTH_URL, bucket=None, max_retries=3):
+        self.client_id = client_id or os.getenv("REDDIT_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("REDDIT_CLIENT_SECRET")
+        self.user_agent = user_agent
+        self.base_url = base_url.rstrip("/")
+        self.auth_url = auth_url
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self.requests = 0
+        self._session = None
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(headers={"User-Agent": self.user_agent})
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def _authorization(self):
+        async with self._token_lock:
+            if self._token is None or time.monotonic() > self._token_expires - 60:
+                auth = aiohttp.BasicAuth(self.client_id or "", self.client_secret or "")
+                async with self._session.post(self.auth_url, auth=auth,
+                                              data={"grant_type": "client_credentials"}) as resp:
+                    resp.raise_for_status()
+                    payload = await resp.json()
+                self._token = payload["access_token"]
+                self._token_expires = time.monotonic() + payload.get("expires_in", 3600)
+        return f"bearer {self._token}"
+
+    async def get(self, path, params=None):
+        """GET a JSON endpoint through the shared rate limiter."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            headers = {"Authorization": await self._authorization()}
+            async with self._session.get(f"{self.base_url}{path}", params=params, headers=headers) as resp:
+                self.requests += 1
+                self.bucket.update_from_headers(resp.headers)
+                if resp.status == 429 or resp.status >= 500:
+                    if attempt == self.max_retries:
+                        resp.raise_for_status()
+                    retry_after = float(resp.headers.get("Retry-After", 2 ** attempt))
+                    self.bucket.paused_until = max(self.bucket.paused_until, time.monotonic() + retry_after)
+                    continue
+                resp.raise_for_status()
+                return await resp.json()
+
+    async def listing(self, path, limit, params=None):
+        """Yield the children of a paginated listing until `limit` items or the end."""
+        params = dict(params or {})
+        fetched = 0
+        after = None
+        while fetched < limit:
+            page_params = {**params, "limit": min(PAGE_SIZE, limit - fetched), "raw_json": 1}
+            if after:
+                page_params["after"] = after
+            page = await self.get(path, page_params)
+            children = page["data"]["children"]
+            for child in children:
+                yield child["data"]
+            fetched += len(children)
+            after = page["data"].get("after")
+            if not children or not after:
+                break
+
+
+def _listing_specs(subreddit, query, limit, sorts):
+    if query is not None:
+        return [("search", f"/r/{subreddit}/search",
+                 {"q": query, "sort": "new", "t": "all", "restrict_sr": 1}, limit)]
+    per_sort = max(1, limit // len(sorts))
+    specs = []
+    for sort in sorts:
+        params = {"t": "week"} if sort == "top" else {}
+        specs.append((sort, f"/r/{subreddit}/{sort}", params, per_sort))
+    return specs
+
+
+async def _collect_listing(client, subreddit, source, path, params, limit, query, start_time):
+    posts = []
+    async for data in client.listing(path, limit, params):
+        created_time = datetime.fromtimestamp(data["created_utc"], tz=timezone.utc)
+        if start_time is not None and created_time < start_time:
+            continue
+        if data.get("selftext") in ('[removed]', '[deleted]'):
+            continue
+        posts.append(post_record(data, subreddit, query=query, source=source))
+    print(f"r/{subreddit} {source}: {len(posts)} posts")
+    return posts
+
+
+async def collect_posts_async(subreddits, query=None, days=7, limit=500,
+                              sorts=("new", "hot", "top"), client=None, **client_kwargs):
+    """
+    Collect posts from several subreddits and listings concurrently.
+
+    Every (subreddit, listing) pair is fetched as its own task; all tasks
+    share one token bucket that enforces Reddit's per-minute quota.
+
+    Args:
+        subreddits: Subreddit name or list of names
+        query: Search query (None for new/hot/top listings)
+        days: Number of days to look back (None for no time filter)
+        limit: Maximum number of posts per subreddit
+        sorts: Listings to fetch when no query is given
+        client: Optional AsyncRedditClient that is already open
+        **client_kwargs: Passed to AsyncRedditClient when client is None
+
+    Returns:
+        Tuple (DataFrame with the get_reddit_posts schema, stats dict)
+    """
+    if isinstance(subreddits, str):
+        subreddits = [subreddits]
+    start_time = datetime.now(timezone.utc) - timedelta(days=days) if days is not None else None
+
+    async def _run(c):
+        tasks = [
+            _collect_listing(c, sub, source, path, params, lim, query, start_time)
+            for sub in subreddits
+            for source, path, params, lim in _listing_specs(sub, query, limit, sorts)
+        ]
+        return await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    if client is None:
+        async with AsyncRedditClient(**client_kwargs) as c:
+            results = await _run(c)
+            requests, waited = c.requests, c.bucket.waited
+    else:
+        results = await _run(client)
+        requests, waited = client.requests, client.bucket.waited
+    elapsed = time.perf_counter() - started
+
+    posts = [p for listing in results for p in listing]
+    df = pd.DataFrame(posts)
+    if not df.empty:
+        df['created_utc'] = pd.to_datetime(df['created_utc'])
+        df = df.sort_values('created_utc', ascending=False)
+        df = df.drop_duplicates(subset=['id'])
+
+    stats = {
+        "posts": len(df),
+        "raw_posts": len(posts),
+        "requests": requests,
+        "seconds": elapsed,
+        "posts_per_s": len(posts) / elapsed if elapsed else 0.0,
+        "requests_per_s": requests / elapsed if elapsed else 0.0,
+        "rate_limit_wait_s": waited,
+    }
+    print(f"Collected {stats['posts']} unique posts with {requests} requests in {elapsed:.1f}s "
+          f"({stats['posts_per_s']:.1f} posts/s, {waited:.1f}s waiting on the rate limiter)")
+    return df, stats
+
+
+def _comment_record(data, post_id):
+    return {
+        'post_id': post_id,
+        'comment_id': data['id'],
+        'body': data.get('body', ''),
+        'score': data.get('score'),
+        'created_utc': datetime.fromtimestamp(data['created_utc'], tz=timezone.utc),
+        'parent_id': data.get('parent_id'),
+    }
+
+
+def _flatten_comments(children, comments, more_ids):
+    """Walk a comment tree, collecting comment data and the ids behind 'more' stubs."""
+    for child in children:
+        if child["kind"] == "more":
+            more_ids.extend(child["data"].get("children", []))
+        elif child["kind"] == "t1":
+            comments.append(child["data"])
+            replies = child["data"].get("replies")
+            if isinstance(replies, dict):
+                _flatten_comments(replies["data"]["children"], comments, more_ids)
+
+
+async def fetch_post_comments(client, post_id, limit_per_post=50, replace_more=0, depth=None):
+    """
+    Fetch the comment tree of one post.
+
+    Args:
+        client: Open AsyncRedditClient
+        post_id: Reddit post id (without the t3_ prefix)
+        limit_per_post: Maximum comments kept for the post
+        replace_more: Number of 'load more comments' expansions (None expands everything)
+        depth: Maximum reply depth requested from the API
+
+    Returns:
+        List of comment records
+    """
+    params = {"limit": 500, "raw_json": 1}
+    if depth is not None:
+        params["depth"] = depth
+    _, listing = await client.get(f"/comments/{post_id}", params)
+
+    comments, more_ids = [], []
+    _flatten_comments(listing["data"]["children"], comments, more_ids)
+
+    expansions = 0
+    while more_ids and len(comments) < limit_per_post and (replace_more is None or expansions < replace_more):
+        batch, more_ids = more_ids[:100], more_ids[100:]
+        payload = await client.get("/api/morechildren", {
+            "link_id": f"t3_{post_id}",
+            "children": ",".join(batch),
+            "api_type": "json",
+            "raw_json": 1,
+        })
+        _flatten_comments(payload["json"]["data"]["things"], comments, more_ids)
+        expansions += 1
+
+    return [
+        _comment_record(c, post_id)
+        for c in comments[:limit_per_post]
+        if c.get('body') not in ['[removed]', '[deleted]']
+    ]
+
+
+class DataFrameSink:
+    """Accumulate streamed comments as DataFrame chunks instead of one growing list."""
+
+    def __init__(self, chunk_size=5000):
+        self.chunk_size = chunk_size
+        self.frames = []
+        self._pending = []
+
+    def __call__(self, records):
+        self._pending.extend(records)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.frames.append(pd.DataFrame(self._pending))
+            self._pending = []
+
+    def result(self):
+        self.flush()
+        return pd.concat(self.frames, ignore_index=True) if self.frames else pd.DataFrame()
+
+
+class CsvSink:
+    """Append streamed comments to a CSV file in chunks."""
+
+    def __init__(self, path, chunk_size=5000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self._pending = []
+        self._header = not os.path.exists(path)
+
+    def __call__(self, records):
+        self._pending.extend(records)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            pd.DataFrame(self._pending).to_csv(self.path, mode="a", header=self._header, index=False)
+            self.rows += len(self._pending)
+            self._header = False
+            self._pending = []
+
+    def result(self):
+        self.flush()
+        return self.path
+
+
+async def harvest_comments_async(post_ids, limit_per_post=50, workers=8, replace_more=0, depth=None,
+                                 sink=None, client=None, **client_kwargs):
+    """
+    Harvest comments for many posts with a bounded pool of concurrent workers.
+
+    All workers share the client's token bucket, so the pool size only
+    bounds concurrency; the request rate stays within the API quota.
+    Comments are handed to `sink` post by post as they arrive.
+
+    Args:
+        post_ids: Iterable of Reddit post ids
+        limit_per_post: Maximum comments per post
+        workers: Number of concurrent fetches
+        replace_more: 'load more comments' expansions per post (None expands everything)
+        depth: Maximum reply depth requested from the API
+        sink: Callable receiving each post's comment records (defaults to a DataFrameSink)
+        client: Optional AsyncRedditClient that is already open
+        **client_kwargs: Passed to AsyncRedditClient when client is None
+
+    Returns:
+        Tuple (sink, stats dict)
+    """
+    sink = sink if sink is not None else DataFrameSink()
+    queue = asyncio.Queue()
+    for post_id in post_ids:
+        queue.put_nowait(post_id)
+    counts = {"posts": 0, "comments": 0, "errors": 0}
+
+    async def _worker(c):
+        while True:
+            try:
+                post_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                records = await fetch_post_comments(c, post_id, limit_per_post, replace_more, depth)
+            except Exception as e:
+                print(f"Error fetching comments for post {post_id}: {e}")
+                counts["errors"] += 1
+                continue
+            sink(records)
+            counts["posts"] += 1
+            counts["comments"] += len(records)
+
+    async def _run(c):
+        await asyncio.gather(*(_worker(c) for _ in range(workers)))
+        return c.requests, c.bucket.waited
+
+    started = time.perf_counter()
+    if client is None:
+        async with AsyncRedditClient(**client_kwargs) as c:
+            requests, waited = await _run(c)
+    else:
+        requests, waited = await _run(client)
+    elapsed = time.perf_counter() - started
+
+    stats = {
+        **counts,
+        "requests": requests,
+        "seconds": elapsed,
+        "posts_per_s": counts["posts"] / elapsed if elapsed else 0.0,
+        "comments_per_s": counts["comments"] / elapsed if elapsed else 0.0,
+        "rate_limit_wait_s": waited,
+    }
+    print(f"Harvested {counts['comments']} comments from {counts['posts']} posts in {elapsed:.1f}s "
+          f"({stats['posts_per_s']:.1f} posts/s, {counts['errors']} errors)")
+    return sink, stats
+
+
+def get_reddit_posts_async(subreddits, query=None, days=7, limit=500, **kwargs):
+    """Synchronous wrapper around collect_posts_async that returns only the DataFrame."""
+    df, _ = asyncio.run(collect_posts_async(subreddits, query=query, days=days, limit=limit, **kwargs))
+    return df
+
+
+def harvest_comments(post_ids, limit_per_post=50, workers=8, replace_more=0, depth=None, output_path=None,
+                     **kwargs):
+    """
+    Synchronous wrapper around harvest_comments_async.
+
+    Returns:
+        DataFrame of comments, or the CSV path when output_path is given
+    """
+    sink = CsvSink(output_path) if output_path else DataFrameSink()
+    sink, _ = asyncio.run(harvest_comments_async(post_ids, limit_per_post=limit_per_post, workers=workers,
+                                                 replace_more=replace_more, depth=depth, sink=sink, **kwargs))
+    return sink.result()
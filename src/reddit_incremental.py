@@ -0,0 +1,316 @@
+import asyncio
+import glob
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from src.reddit_async import AsyncRedditClient, PAGE_SIZE, post_record
+
+STATE_PATH = "data/cache/ingest_state.sqlite"
+DATASET_DIR = "data/reddit/posts"
+
+
+def source_key(subreddit, query=None):
+    return f"{subreddit}|{query or ''}"
+
+
+class IngestState:
+    """
+    SQLite store of per-source high-water marks, seen post ids and mid-run checkpoints.
+
+    A source is one (subreddit, query) pair.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                source TEXT PRIMARY KEY,
+                newest_utc REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                source TEXT NOT NULL,
+                post_id TEXT NOT NULL,
+                created_utc REAL NOT NULL,
+                PRIMARY KEY (source, post_id)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                source TEXT PRIMARY KEY,
+                cursor TEXT,
+                run_newest_utc REAL,
+                fetched INTEGER NOT NULL
+            );
+        """)
+
+    def watermark(self, source):
+        row = self.conn.execute("SELECT newest_utc FROM watermarks WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def seen_ids(self, source, post_ids):
+        post_ids = list(post_ids)
+        if not post_ids:
+            return set()
+        placeholders = ",".join("?" * len(post_ids))
+        rows = self.conn.execute(
+            f"SELECT post_id FROM seen WHERE source = ? AND post_id IN ({placeholders})", [source, *post_ids]
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def checkpoint(self, source):
+        row = self.conn.execute(
+            "SELECT cursor, run_newest_utc, fetched FROM checkpoints WHERE source = ?", (source,)
+        ).fetchone()
+        return {"cursor": row[0], "run_newest_utc": row[1], "fetched": row[2]} if row else None
+
+    def save_progress(self, source, records, cursor, run_newest_utc, fetched):
+        """Mark records as seen and move the checkpoint forward in one transaction."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seen (source, post_id, created_utc) VALUES (?, ?, ?)",
+                [(source, r["id"], r["created_utc"].timestamp()) for r in records],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (source, cursor, run_newest_utc, fetched) VALUES (?, ?, ?, ?)",
+                (source, cursor, run_newest_utc, fetched),
+            )
+
+    def finish_run(self, source, newest_utc, prune_before):
+        """Advance the watermark, drop the checkpoint and forget ids older than the lookback."""
+        with self.conn:
+            self.conn.execute("DELETE FROM checkpoints WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM seen WHERE source = ? AND created_utc < ?", (source, prune_before))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks (source, newest_utc, updated_at) VALUES (?, ?, ?)",
+                (source, newest_utc, time.time()),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def append_partitioned(records, dataset_dir=DATASET_DIR, run_id=None):
+    """
+    Append post records to a dataset partitioned by post date.
+
+    Each call writes one new file per touched date partition
+    (dataset_dir/date=YYYY-MM-DD/part-<run>-<n>.csv); files are never rewritten.
+    """
+    if not records:
+        return []
+    run_id = run_id or uuid.uuid4().hex[:8]
+    df = pd.DataFrame(records)
+    paths = []
+    for date, part in df.groupby('date'):
+        directory = os.path.join(dataset_dir, f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{run_id}-{uuid.uuid4().hex[:8]}.csv")
+        part.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def load_posts_dataset(dataset_dir=DATASET_DIR, days=None, subreddit=None, query=None, keys=('id',)):
+    """
+    Read the partitioned post dataset, keeping the most recently fetched version of each post.
+
+    Args:
+        dataset_dir: Dataset root
+        days: Only read partitions from the last `days` days
+        subreddit: Optional subreddit filter
+        query: Optional query filter
+        keys: Columns identifying one post; pass ('id', 'subreddit', 'query')
+            to keep a row for every source a post was found through
+
+    Returns:
+        DataFrame with the get_reddit_posts schema plus 'fetched_at'
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).date() if days is not None else None
+    frames = []
+    for directory in sorted(glob.glob(os.path.join(dataset_dir, "date=*"))):
+        partition_date = datetime.strptime(os.path.basename(directory)[5:], "%Y-%m-%d").date()
+        if cutoff is not None and partition_date < cutoff:
+            continue
+        frames.extend(pd.read_csv(path) for path in sorted(glob.glob(os.path.join(directory, "*.csv"))))
+
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    if subreddit is not None:
+        df = df[df['subreddit'] == subreddit]
+    if query is not None:
+        df = df[df['query'] == query]
+    df['created_utc'] = pd.to_datetime(df['created_utc'])
+    df['date'] = df['created_utc'].dt.date
+    df = df.sort_values('fetched_at').drop_duplicates(subset=list(keys), keep='last')
+    return df.sort_values('created_utc', ascending=False).reset_index(drop=True)
+
+
+async def ingest_incremental_async(subreddit, query=None, state_path=STATE_PATH, dataset_dir=DATASET_DIR,
+                                   lookback_hours=24, initial_days=100, max_posts=1000, checkpoint_every=PAGE_SIZE,
+                                   client=None, **client_kwargs):
+    """
+    Fetch only posts newer than the source's high-water mark, plus a short lookback.
+
+    Posts are read newest-first from the 'new' listing (or a search sorted by
+    new) until they are older than watermark - lookback. Posts inside the
+    lookback that were already seen are re-fetched to refresh score and
+    num_comments. After every `checkpoint_every` posts the batch is appended
+    to the dataset and the listing cursor is checkpointed, so a crashed or
+    rate-limited run resumes where it stopped. The watermark only advances
+    once the walk reached it (or the end of the listing); a run cut short by
+    max_posts keeps its checkpoint and the next run continues from there.
+
+    Args:
+        subreddit: Subreddit name
+        query: Search query (None for the 'new' listing)
+        state_path: SQLite state store
+        dataset_dir: Root of the date-partitioned post dataset
+        lookback_hours: How far behind the watermark posts are refreshed
+        initial_days: Window fetched on the very first run of a source
+        max_posts: Upper bound of posts fetched in one run (a backlog larger
+            than this takes several runs)
+        checkpoint_every: Posts between checkpoints
+        client: Optional AsyncRedditClient that is already open
+        **client_kwargs: Passed to AsyncRedditClient when client is None
+
+    Returns:
+        DataFrame of the posts written in this run (new and refreshed)
+    """
+    source = source_key(subreddit, query)
+    state = IngestState(state_path)
+    now = time.time()
+    watermark = state.watermark(source)
+    stop_before = (watermark - lookback_hours * 3600) if watermark is not None else now - initial_days * 86400
+
+    resume = state.checkpoint(source)
+    cursor = resume["cursor"] if resume else None
+    run_newest = resume["run_newest_utc"] if resume else None
+    fetched = resume["fetched"] if resume else 0
+    if resume:
+        print(f"Resuming {source} from checkpoint after {fetched} posts")
+
+    if query is None:
+        path, params = f"/r/{subreddit}/new", {}
+    else:
+        path, params = f"/r/{subreddit}/search", {"q": query, "sort": "new", "t": "all", "restrict_sr": 1}
+
+    run_id = uuid.uuid4().hex[:8]
+    written = []
+    pending = []
+    counts = {"new": 0, "refreshed": 0}
+
+    def _flush():
+        nonlocal pending
+        if not pending:
+            return
+        append_partitioned(pending, dataset_dir, run_id)
+        state.save_progress(source, pending, cursor, run_newest, fetched)
+        written.extend(pending)
+        pending = []
+
+    complete = False
+
+    async def _run(c):
+        nonlocal cursor, run_newest, fetched, complete
+        done = False
+        fetched_this_run = 0
+        while not done and fetched_this_run < max_posts:
+            page_params = {**params, "limit": min(PAGE_SIZE, max_posts - fetched_this_run), "raw_json": 1}
+            if cursor:
+                page_params["after"] = cursor
+            page = await c.get(path, page_params)
+            children = [child["data"] for child in page["data"]["children"]]
+            already_seen = state.seen_ids(source, (d["id"] for d in children))
+            fetched_at = datetime.now(timezone.utc)
+
+            for data in children:
+                if data["created_utc"] < stop_before:
+                    done = True
+                    break
+                if data.get("selftext") in ('[removed]', '[deleted]'):
+                    continue
+                record = post_record(data, subreddit, query=query)
+                record["fetched_at"] = fetched_at
+                pending.append(record)
+                counts["refreshed" if data["id"] in already_seen else "new"] += 1
+                run_newest = max(run_newest or 0.0, data["created_utc"])
+
+            fetched += len(children)
+            fetched_this_run += len(children)
+            cursor = page["data"].get("after")
+            if not children or not cursor:
+                done = True
+            complete = done
+            if len(pending) >= checkpoint_every or done:
+                _flush()
+
+    try:
+        if client is None:
+            async with AsyncRedditClient(**client_kwargs) as c:
+                await _run(c)
+        else:
+            await _run(client)
+        _flush()
+        if complete:
+            newest = max(filter(None, [watermark, run_newest]), default=now)
+            state.finish_run(source, newest, prune_before=newest - 2 * lookback_hours * 3600)
+        else:
+            # Stopped by max_posts above the watermark: moving it now would skip the
+            # posts between here and the old watermark for good.
+            state.save_progress(source, [], cursor, run_newest, fetched)
+            print(f"{source}: stopped after {max_posts} posts before reaching the watermark; "
+                  "the next run resumes from the checkpoint")
+    finally:
+        state.close()
+
+    print(f"r/{subreddit}{' ' + query if query else ''}: {counts['new']} new, "
+          f"{counts['refreshed']} refreshed posts ({fetched} fetched)")
+    df = pd.DataFrame(written)
+    if not df.empty:
+        df['created_utc'] = pd.to_datetime(df['created_utc'])
+    return df
+
+
+def get_reddit_posts_incremental(subreddit="stocks", query=None, **kwargs):
+    """Synchronous wrapper around ingest_incremental_async."""
+    return asyncio.run(ingest_incremental_async(subreddit, query=query, **kwargs))
+
+
+async def ingest_sources_async(sources, client=None, client_kwargs=None, **kwargs):
+    """
+    Incrementally ingest many (subreddit, query) sources concurrently through one client.
+
+    The sources share the client's rate limiter. A failing source is
+    reported and skipped so it does not stop the others.
+
+    Returns:
+        Dict source -> DataFrame of posts written (None for failed sources)
+    """
+    async def _one(c, subreddit, query):
+        try:
+            return await ingest_incremental_async(subreddit, query=query, client=c, **kwargs)
+        except Exception as e:
+            print(f"Ingestion of {source_key(subreddit, query)} failed: {e}")
+            return None
+
+    sources = list(dict.fromkeys(sources))
+    if client is None:
+        async with AsyncRedditClient(**(client_kwargs or {})) as c:
+            results = await asyncio.gather(*(_one(c, s, q) for s, q in sources))
+    else:
+        results = await asyncio.gather(*(_one(client, s, q) for s, q in sources))
+    return dict(zip(sources, results))
+
+
+def get_reddit_posts_sources(sources, **kwargs):
+    """Synchronous wrapper around ingest_sources_async."""
+    return asyncio.run(ingest_sources_async(sources, **kwargs))
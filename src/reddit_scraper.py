@@ -1,17 +1,31 @@
-import praw
 import pandas as pd
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
-import time
+from src.reddit_async import harvest_comments
 
 load_dotenv()
 
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-    user_agent="sentiment-tracker"
-)
+
+@lru_cache(maxsize=None)
+def get_reddit():
+    """The shared praw.Reddit client, created (and praw imported) on first use."""
+    import praw
+
+    return praw.Reddit(
+        client_id=os.getenv("REDDIT_CLIENT_ID"),
+        client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+        user_agent="sentiment-tracker"
+    )
+
+
+def __getattr__(name):
+    # Keeps `from src.reddit_scraper import reddit` working without building the client at import.
+    if name == "reddit":
+        return get_reddit()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_reddit_posts(query=None, subreddit="stocks", days=7, limit=500):
     """
@@ -32,7 +46,7 @@ def get_reddit_posts(query=None, subreddit="stocks", days=7, limit=500):
     posts = []
     
     try:
-        subreddit_obj = reddit.subreddit(subreddit)
+        subreddit_obj = get_reddit().subreddit(subreddit)
         print(f"Accessing r/{subreddit}...")
         
         # If no query specified, get recent posts using different sorting methods
@@ -84,9 +98,6 @@ def get_reddit_posts(query=None, subreddit="stocks", days=7, limit=500):
                             "query": query
                         })
                         
-                        # Add a small delay to avoid rate limiting
-                        time.sleep(0.1)
-                        
                     except Exception as e:
                         print(f"Error processing submission {submission.id}: {e}")
                         continue
@@ -122,8 +133,6 @@ def get_reddit_posts(query=None, subreddit="stocks", days=7, limit=500):
                         "query": query
                     })
                     
-                    time.sleep(0.1)
-                    
                 except Exception as e:
                     print(f"Error processing submission {submission.id}: {e}")
                     continue
@@ -146,42 +155,25 @@ def get_reddit_posts(query=None, subreddit="stocks", days=7, limit=500):
     
     return df
 
-def get_reddit_comments(post_ids, limit_per_post=50):
+def get_reddit_comments(post_ids, limit_per_post=50, workers=8, replace_more=0, output_path=None):
     """
     Get comments for specific Reddit posts.
     
+    Posts are fetched concurrently by a bounded pool of workers that share one
+    rate limiter (see src.reddit_async.harvest_comments_async).
+    
     Args:
         post_ids: List of Reddit post IDs
         limit_per_post: Maximum comments per post
+        workers: Number of posts fetched concurrently
+        replace_more: Number of "load more comments" expansions per post (None for all)
+        output_path: Optional CSV file that comments are streamed into
     
     Returns:
-        DataFrame with comments
+        DataFrame with comments (or output_path when streaming to a file)
     """
-    comments = []
-    
-    for post_id in post_ids:
-        try:
-            submission = reddit.submission(id=post_id)
-            submission.comments.replace_more(limit=0)  # Remove "more comments" objects
-            
-            for comment in submission.comments.list()[:limit_per_post]:
-                if comment.body not in ['[removed]', '[deleted]']:
-                    comments.append({
-                        'post_id': post_id,
-                        'comment_id': comment.id,
-                        'body': comment.body,
-                        'score': comment.score,
-                        'created_utc': datetime.fromtimestamp(comment.created_utc, tz=timezone.utc),
-                        'parent_id': comment.parent_id
-                    })
-                    
-            time.sleep(0.2)  # Rate limiting
-            
-        except Exception as e:
-            print(f"Error fetching comments for post {post_id}: {e}")
-            continue
-    
-    return pd.DataFrame(comments)
+    return harvest_comments(post_ids, limit_per_post=limit_per_post, workers=workers,
+                            replace_more=replace_more, output_path=output_path)
 
 # Alternative function for when you want to collect ALL posts (not time-limited)
 def get_all_reddit_posts(subreddit="elonmusk", limit=1000):
@@ -198,7 +190,7 @@ def get_all_reddit_posts(subreddit="elonmusk", limit=1000):
     posts = []
     
     try:
-        subreddit_obj = reddit.subreddit(subreddit)
+        subreddit_obj = get_reddit().subreddit(subreddit)
         print(f"Accessing r/{subreddit} for all posts...")
         
         # Get posts from multiple sources
@@ -244,7 +236,6 @@ def get_all_reddit_posts(subreddit="elonmusk", limit=1000):
                     })
                     
                     count += 1
-                    time.sleep(0.1)
                     
                 except Exception as e:
                     print(f"Error processing submission {submission.id}: {e}")
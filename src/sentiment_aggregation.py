@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+SENTIMENT_MAPPING = {'positive': 1, 'neutral': 0, 'negative': -1}
+LABELS = ('positive', 'negative', 'neutral')
+
+
+def finbert_confidence(df):
+    """
+    Return FinBERT's confidence column, 'finbert_score'.
+
+    Outputs written before analyze_finbert_sentiment named it hold it as
+    'score.1', the CSV/Arrow rename of its second 'score' column (Reddit's
+    upvotes being the first).
+    """
+    if 'finbert_score' in df.columns:
+        return df['finbert_score']
+    if 'score.1' in df.columns:
+        return df['score.1']
+    raise KeyError("No 'finbert_score' column; re-run the score stage.")
+
+
+def _group_codes(df, keys):
+    """Dense group code per row and the key values of every group, sorted by key."""
+    codes, levels = [], []
+    for key in keys:
+        key_codes, key_levels = pd.factorize(df[key], sort=True)
+        codes.append(key_codes)
+        levels.append(key_levels)
+    if len(keys) == 1:
+        return codes[0], {keys[0]: levels[0]}
+    # Hash-factorize the combined code; only the distinct groups get sorted.
+    combined = np.ravel_multi_index(codes, [len(lv) for lv in levels])
+    inverse, group_keys = pd.factorize(combined, sort=True)
+    unravelled = np.unravel_index(group_keys, [len(lv) for lv in levels])
+    return inverse, {key: levels[i][unravelled[i]] for i, key in enumerate(keys)}
+
+
+def aggregate_daily_sentiment(df, keys=('date',), label_col='label', time_key='date'):
+    """
+    Per-group sentiment statistics computed in one pass with bincount reductions.
+
+    Args:
+        df: Scored posts (output of analyze_finbert_sentiment) with a 'date'
+            column or a 'created_utc' column to derive it from
+        keys: Grouping columns, e.g. ('date',), ('subreddit', 'date') or ('ticker', 'date')
+        label_col: Column holding the FinBERT label
+        time_key: Key along which sentiment_momentum is differenced
+
+    Returns:
+        DataFrame with one row per group: keys, sentiment_avg, sentiment_std,
+        post_count, finbert_confidence, positive/negative/neutral counts,
+        total_posts, %pos, %neg, %neu and sentiment_momentum
+    """
+    keys = list(keys)
+    if time_key in keys:
+        # Put the time key last so momentum is a diff within each series.
+        keys = [k for k in keys if k != time_key] + [time_key]
+
+    if 'date' in keys and 'date' not in df.columns:
+        df = df.assign(date=pd.to_datetime(df['created_utc']).dt.date)
+
+    label_codes = pd.Categorical(df[label_col], categories=list(LABELS)).codes
+    # pd.factorize codes a missing key as -1, which bincount cannot take; such posts belong to no group.
+    valid = (label_codes >= 0) & df[keys].notna().all(axis=1).to_numpy()
+    df = df.loc[valid]
+    label_codes = label_codes[valid].astype(np.int64)
+    confidence = finbert_confidence(df).to_numpy(dtype=np.float64)
+
+    if df.empty:
+        return pd.DataFrame(columns=keys + ['sentiment_avg', 'sentiment_std', 'post_count', 'finbert_confidence',
+                                            'positive_count', 'negative_count', 'neutral_count', 'total_posts',
+                                            '%pos', '%neg', '%neu', 'sentiment_momentum'])
+
+    group, key_values = _group_codes(df, keys)
+    n_groups = len(next(iter(key_values.values())))
+
+    label_values = np.array([SENTIMENT_MAPPING[label] for label in LABELS], dtype=np.float64)
+    sentiment = label_values[label_codes]
+
+    counts = np.bincount(group, minlength=n_groups).astype(np.float64)
+    sums = np.bincount(group, weights=sentiment, minlength=n_groups)
+    sq_sums = np.bincount(group, weights=sentiment * sentiment, minlength=n_groups)
+    conf_sums = np.bincount(group, weights=confidence, minlength=n_groups)
+    label_counts = np.bincount(group * len(LABELS) + label_codes,
+                               minlength=n_groups * len(LABELS)).reshape(n_groups, len(LABELS))
+
+    mean = sums / counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (sq_sums - counts * mean * mean) / (counts - 1)
+    std = np.sqrt(np.clip(var, 0, None))
+    std[counts < 2] = 0.0  # a single post per group has no spread
+
+    out = pd.DataFrame(key_values)
+    out['sentiment_avg'] = mean
+    out['sentiment_std'] = std
+    out['post_count'] = counts.astype(np.int64)
+    out['finbert_confidence'] = conf_sums / counts
+    out['positive_count'] = label_counts[:, 0]
+    out['negative_count'] = label_counts[:, 1]
+    out['neutral_count'] = label_counts[:, 2]
+    out['total_posts'] = out['post_count']
+    out['%pos'] = label_counts[:, 0] / counts
+    out['%neg'] = label_counts[:, 1] / counts
+    out['%neu'] = label_counts[:, 2] / counts
+
+    # Groups are sorted by (series keys..., time_key), so each series is contiguous.
+    momentum = np.empty(n_groups)
+    momentum[0] = np.nan
+    momentum[1:] = np.diff(mean)
+    series_keys = [k for k in keys if k != time_key]
+    if time_key not in keys:
+        momentum[:] = np.nan
+    elif series_keys:
+        series_start = np.zeros(n_groups, dtype=bool)
+        series_start[0] = True
+        for key in series_keys:
+            values = out[key].to_numpy()
+            series_start[1:] |= values[1:] != values[:-1]
+        momentum[series_start] = np.nan
+    out['sentiment_momentum'] = momentum
+
+    return out
+
+
+def aggregate_session_sentiment(df, keys=(), cutoff="close", label_col='label'):
+    """
+    aggregate_daily_sentiment keyed by trading session instead of calendar date.
+
+    Every post counts toward the first NYSE session whose cutoff ('close' or
+    'open', see src.market_calendar) follows its created_utc, so weekend,
+    holiday and after-hours posts land on the session they can move instead
+    of a day with no stock bar.
+
+    Args:
+        df: Scored posts with a 'created_utc' column
+        keys: Grouping columns besides the session, e.g. ('config',)
+        cutoff: 'close' or 'open'
+        label_col: Column holding the FinBERT label
+
+    Returns:
+        aggregate_daily_sentiment's layout, with 'date' holding the session day
+    """
+    from src.market_calendar import assign_sessions
+
+    session = assign_sessions(df['created_utc'], cutoff=cutoff)
+    known = ~np.isnat(session)
+    df = df.loc[known].assign(session=session[known])
+    out = aggregate_daily_sentiment(df, keys=tuple(keys) + ('session',), label_col=label_col, time_key='session')
+    out['session'] = pd.to_datetime(out['session']).dt.date
+    return out.rename(columns={'session': 'date'})
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import sqlite3
+import time
+import unicodedata
+
+import numpy as np
+
+_SQLITE_BATCH = 500  # stay well below SQLite's bound-parameter limit
+
+
+def normalize_text(text):
+    """Normalize unicode and whitespace so trivially different copies share a key."""
+    text = unicodedata.normalize("NFKC", str(text))
+    return " ".join(text.split())
+
+
+def text_key(text, model_id):
+    """Content address of a text for a given model identity."""
+    payload = f"{model_id}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class SentimentCache:
+    """
+    Persistent SQLite cache of FinBERT class probabilities.
+
+    Entries are keyed on a hash of the normalized text plus the model name and
+    revision, so one file can be shared by several models or backends (the
+    score stage, fan-out scoring and run_stream all use the default one).
+    Entries of a model that is no longer used are never hit again and age out
+    through the LRU eviction once the cache grows past max_entries.
+
+    Args:
+        path: SQLite file location
+        model_name: Hugging Face model name
+        revision: Model revision (commit hash)
+        max_entries: Size cap before LRU eviction kicks in
+    """
+
+    def __init__(self, path, model_name, revision, max_entries=500_000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.model_id = f"{model_name}@{revision}"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                probs BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+        """)
+
+    def keys_for(self, texts):
+        return [text_key(t, self.model_id) for t in texts]
+
+    def get_many(self, texts):
+        """
+        Look up cached probabilities.
+
+        Args:
+            texts: Sequence of strings
+
+        Returns:
+            List aligned with texts holding a probability array or None on a miss
+        """
+        keys = self.keys_for(texts)
+        found = {}
+        for i in range(0, len(keys), _SQLITE_BATCH):
+            chunk = keys[i:i + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, probs FROM entries WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update((k, np.frombuffer(blob, dtype=np.float32)) for k, blob in rows)
+
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+            )
+
+        results = [found.get(k) for k in keys]
+        hits = sum(r is not None for r in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts, probs):
+        """Store probability rows for texts and evict the oldest entries if over the cap."""
+        now = time.time()
+        rows = [
+            (k, np.asarray(p, dtype=np.float32).tobytes(), now)
+            for k, p in zip(self.keys_for(texts), probs)
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, probs, last_used) VALUES (?, ?, ?)", rows
+            )
+        self._evict()
+
+    def _evict(self):
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY last_used LIMIT ?)", (excess,)
+            )
+        self.evictions += excess
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM entries")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
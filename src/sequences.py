@@ -0,0 +1,69 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def window_view(X, window_size):
+    """
+    Read-only strided view of every window X[i:i + window_size] for i < len(X) - window_size.
+
+    No data is copied: the result has shape (n_windows, window_size, n_features)
+    and shares memory with X, which may be a np.memmap.
+    """
+    X = np.asarray(X)
+    n_windows = max(len(X) - window_size, 0)
+    if n_windows == 0:
+        return np.empty((0, window_size) + X.shape[1:], dtype=X.dtype)
+    # sliding_window_view puts the window axis last; move it next to the sample axis.
+    return np.moveaxis(sliding_window_view(X, window_size, axis=0)[:n_windows], -1, 1)
+
+
+def create_sequences(X, y, window_size=10, copy=False):
+    """
+    Windows of `window_size` rows of X, each paired with the target right after it.
+
+    Same values as the original loop (X[i:i + window_size], y[i + window_size]),
+    built without a Python loop.
+
+    Args:
+        X: Array of shape (n_rows, n_features)
+        y: Targets aligned with X
+        window_size: Rows per window
+        copy: Return a contiguous array instead of a read-only view of X
+            (the view costs no memory; a copy is window_size times the size of X)
+
+    Returns:
+        (X_seq, y_seq) with shapes (n_rows - window_size, window_size, n_features)
+        and (n_rows - window_size, ...)
+    """
+    windows = window_view(X, window_size)
+    targets = np.asarray(y)[window_size:window_size + len(windows)]
+    if copy:
+        windows = np.ascontiguousarray(windows)
+    return windows, targets
+
+
+def iter_sequence_batches(X, y, window_size=10, batch_size=256, start=0, stop=None, shuffle=False, seed=None):
+    """
+    Yield (X_batch, y_batch) window batches, materializing one batch at a time.
+
+    X and y may be memory-mapped, so datasets larger than RAM stream from disk.
+
+    Args:
+        X, y, window_size: As in create_sequences
+        batch_size: Windows per batch
+        start, stop: Range of window indices to draw from (e.g. a train/validation split)
+        shuffle: Visit the windows in random order
+        seed: Seed (or np.random.Generator) of the shuffle
+    """
+    windows, targets = create_sequences(X, y, window_size)
+    stop = len(windows) if stop is None else min(stop, len(windows))
+    if shuffle:
+        order = np.random.default_rng(seed).permutation(np.arange(start, stop))
+        for i in range(0, len(order), batch_size):
+            idx = np.sort(order[i:i + batch_size])
+            yield windows[idx], targets[idx]
+    else:
+        for i in range(start, stop, batch_size):
+            j = min(i + batch_size, stop)
+            yield np.ascontiguousarray(windows[i:j]), np.ascontiguousarray(targets[i:j])
+
@@ -0,0 +1,289 @@
+import pandas as pd
+import os
+import warnings
+warnings.filterwarnings('ignore')
+from src.stock_data import get_stock_data
+from src.stock_features import FEATURE_CACHE, VOLUME_WINDOW, incremental_stock_features
+from src.price_store import PRICE_STORE
+from src.sentiment_aggregation import aggregate_daily_sentiment, aggregate_session_sentiment
+from src.storage import column_names, read_table, write_arrow, write_table
+
+# Pipeline stages. Each one reads its inputs from disk and writes its outputs
+# back, so the runner in src.pipeline can fingerprint, skip and parallelize them.
+# Heavy frameworks (FinBERT/torch, matplotlib, the Reddit clients) are imported
+# inside the stages that use them, so importing this module stays cheap.
+
+
+def _ensure_dir(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def collect_reddit(subreddit, days, output, max_posts=1000, lookback_hours=24, csv_output=None):
+    """Phase 1: incrementally ingest posts and write the cleaned window to `output`."""
+    from src.reddit_incremental import get_reddit_posts_incremental, load_posts_dataset
+
+    # Incremental ingestion: only posts newer than the last run (plus a refresh
+    # lookback) are downloaded; the window is then read from the local dataset.
+    try:
+        get_reddit_posts_incremental(subreddit=subreddit, initial_days=days, lookback_hours=lookback_hours,
+                                     max_posts=max_posts)
+    except Exception as e:
+        print(f"Incremental Reddit ingestion failed, continuing with stored posts: {e}")
+    reddit_df = load_posts_dataset(days=days, subreddit=subreddit)
+
+    if reddit_df.empty:
+        raise RuntimeError(
+            "Could not collect any Reddit posts. Please check: "
+            "1. Your Reddit API credentials in .env file "
+            "2. Internet connection "
+            "3. Reddit API rate limits "
+            "4. Subreddit accessibility"
+        )
+
+    print(f"Successfully collected {len(reddit_df)} Reddit posts.")
+
+    # Display sample of collected data
+    print("\nSample of collected posts:")
+    print(reddit_df[['date', 'title', 'score']].head())
+
+    # Check if we have the required columns
+    required_columns = ['title', 'selftext']
+    missing_columns = [col for col in required_columns if col not in reddit_df.columns]
+    if missing_columns:
+        raise RuntimeError(f"Missing required columns: {missing_columns}")
+
+    # Clean the data
+    print("Cleaning Reddit data...")
+    reddit_df['title'] = reddit_df['title'].fillna('')
+    reddit_df['selftext'] = reddit_df['selftext'].fillna('')
+
+    # Remove posts with empty title and selftext
+    reddit_df = reddit_df[~((reddit_df['title'] == '') & (reddit_df['selftext'] == ''))]
+
+    if reddit_df.empty:
+        raise RuntimeError("No valid posts remaining after cleaning.")
+
+    print(f"After cleaning: {len(reddit_df)} posts remain.")
+    write_table(reddit_df, output, partition_cols=['date'], csv_path=csv_output)
+
+
+def score_sentiment(posts_path, output, cache_path="data/cache/finbert_sentiment.sqlite", workers=1,
+                    csv_output=None, feature_store=None):
+    """Label every post with FinBERT (and, with a feature_store, keep its probabilities and embeddings)."""
+    from src.finbert_sentiment import analyze_finbert_sentiment
+
+    reddit_df = read_table(posts_path)
+    print("Analyzing sentiment with FinBERT...")
+    finbert_df = analyze_finbert_sentiment(reddit_df, cache_path=cache_path, workers=workers,
+                                           feature_store=feature_store)
+    write_table(finbert_df, output, partition_cols=['date'], csv_path=csv_output)
+    print("Sentiment analysis completed and saved.")
+
+
+def aggregate_sentiment(sentiment_path, output, csv_output=None, cutoff="close"):
+    """
+    Phase 2: sentiment statistics per trading session.
+
+    Posts are aligned to the NYSE session they can move (cutoff 'close' or
+    'open', see src.market_calendar); cutoff=None keeps plain calendar dates.
+    """
+    # Only the columns the aggregation needs; selftext is never decoded.
+    available = column_names(sentiment_path)
+    columns = [c for c in ('date', 'created_utc', 'label', 'finbert_score', 'score.1') if c in available]
+    sentiment_df = read_table(sentiment_path, columns=columns)
+
+    # Check if we have enough data for daily aggregation
+    print(f"Date range: {sentiment_df['date'].min()} to {sentiment_df['date'].max()}")
+    print(f"Number of unique dates: {sentiment_df['date'].nunique()}")
+
+    if sentiment_df['date'].nunique() < 2:
+        print("WARNING: Only data from one day. Analysis may be limited.")
+
+    # Mean/std/counts, label shares, FinBERT confidence and momentum in one grouped pass
+    if cutoff is not None and 'created_utc' in sentiment_df.columns:
+        daily_stats = aggregate_session_sentiment(sentiment_df, cutoff=cutoff)
+        print(f"Aligned {int(daily_stats['post_count'].sum())} of {len(sentiment_df)} posts "
+              f"to {len(daily_stats)} trading sessions (cutoff: {cutoff}).")
+    else:
+        daily_stats = aggregate_daily_sentiment(sentiment_df, keys=('date',))
+    write_table(daily_stats, output, csv_path=csv_output)
+    print("Enhanced sentiment aggregation completed.")
+
+
+def fetch_stock(ticker, days, output, store_path=PRICE_STORE, csv_output=None):
+    """Phase 3a: daily OHLCV bars through the local price store."""
+    stock_df = get_stock_data(ticker, days=days, store_path=store_path)
+    write_table(stock_df.assign(ticker=ticker), output, partition_cols=['ticker'], csv_path=csv_output)
+    print("Stock data fetched.")
+
+
+def merge_sentiment_stock(daily_path, stock_path, output, arrow_output=None, csv_output=None,
+                          feature_cache=FEATURE_CACHE, volume_window=VOLUME_WINDOW):
+    """Phase 3b: stock metrics (only bars new since the last run are computed) and the sentiment/stock merge."""
+    daily_stats = read_table(daily_path)
+    stock_df = read_table(stock_path)
+    stock_df['ticker'] = stock_df['ticker'].astype(str)
+
+    # Calculate additional stock metrics
+    stock_df = incremental_stock_features(stock_df, feature_cache, volume_window)
+
+    # Merge data
+    print("Merging sentiment and stock data...")
+    merged = pd.merge(daily_stats, stock_df, on='date', how='inner')
+
+    if merged.empty:
+        print("WARNING: No overlapping dates between sentiment and stock data.")
+        print("Sentiment data date range:", daily_stats['date'].min(), "to", daily_stats['date'].max())
+        print("Stock data date range:", stock_df['date'].min(), "to", stock_df['date'].max())
+
+        # Try outer join to see what data we have
+        merged = pd.merge(daily_stats, stock_df, on='date', how='outer')
+        print(f"Outer merge resulted in {len(merged)} rows.")
+
+        if merged.empty:
+            raise RuntimeError("Could not merge data.")
+
+    write_table(merged, output, partition_cols=['ticker'], csv_path=csv_output)
+    if arrow_output is not None:
+        # Uncompressed copy the model stage can memory-map.
+        write_arrow(merged, arrow_output)
+    print("Enhanced sentiment and stock data merged and saved.")
+
+
+def analyze_lead_lag(merged_path, xcorr_output, granger_output, by='ticker', max_lag=5, granger_lags=5,
+                     n_boot=1000, workers=1):
+    """Phase 4a: lagged cross-correlations with bootstrap intervals and Granger tests per ticker."""
+    from src.cpu import available_cores
+    from src.lead_lag import lead_lag_analysis, strongest_leads
+
+    merged_df = read_table(merged_path)
+    xcorr, granger = lead_lag_analysis(merged_df, by=by, max_lag=max_lag, granger_lags=granger_lags,
+                                       n_boot=n_boot, workers=min(workers, len(available_cores())))
+    write_table(xcorr, xcorr_output)
+    write_table(granger, granger_output)
+
+    print(f"Strongest leads/lags (of {xcorr['feature'].nunique()} features, lags -{max_lag}..+{max_lag}):")
+    print(strongest_leads(xcorr, by=by).head(10).to_string(index=False))
+
+
+def plot_analysis(merged_path, posts_path, figures_dir="figures", summary_path="data/summary_stats.txt",
+                  ticker="TSLA"):
+    """Phase 4: figures, basic statistics and the summary file."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use('seaborn-v0_8')
+    sns.set_palette("husl")
+    os.makedirs(figures_dir, exist_ok=True)
+
+    merged_df = read_table(merged_path)
+    reddit_df = read_table(posts_path, columns=['date'])
+
+    if len(merged_df) < 2:
+        print("WARNING: Insufficient data for comprehensive analysis. Creating basic visualizations...")
+
+    merged_df['date'] = pd.to_datetime(merged_df['date'])
+    merged_df.set_index('date', inplace=True)
+
+    # Remove rows with all NaN values
+    merged_df = merged_df.dropna(how='all')
+
+    if merged_df.empty:
+        raise RuntimeError("No valid data after merging.")
+
+    # 1. Basic visualizations that work with minimal data
+    print("\nGenerating visualizations...")
+
+    # Create a flexible plot based on available data
+    fig, axes = plt.subplots(2, 1, figsize=(16, 12))
+
+    # Plot 1: Available sentiment and stock data
+    ax1 = axes[0]
+    ax1_twin = ax1.twinx()
+
+    # Only plot if we have the data
+    if 'Close' in merged_df.columns and not merged_df['Close'].isna().all():
+        ax1.plot(merged_df.index, merged_df['Close'], color='#1f77b4', linewidth=2, label=f'{ticker} Close Price')
+        ax1.set_ylabel('Stock Price (USD)', fontsize=12, color='#1f77b4')
+
+    if 'sentiment_avg' in merged_df.columns and not merged_df['sentiment_avg'].isna().all():
+        ax1_twin.plot(merged_df.index, merged_df['sentiment_avg'], color='#ff7f0e', linewidth=2, label='Daily Sentiment Average')
+        ax1_twin.set_ylabel('Sentiment Average (-1 to 1)', fontsize=12, color='#ff7f0e')
+
+    ax1.set_title(f'{ticker} Stock Price vs Daily Sentiment Average', fontsize=14, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper left')
+
+    # Plot 2: Sentiment distribution
+    ax2 = axes[1]
+    if 'sentiment_avg' in merged_df.columns and not merged_df['sentiment_avg'].isna().all():
+        ax2.hist(merged_df['sentiment_avg'].dropna(), bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+        ax2.set_xlabel('Sentiment Average')
+        ax2.set_ylabel('Frequency')
+        ax2.set_title('Distribution of Daily Sentiment Averages', fontsize=14, fontweight='bold')
+        ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(os.path.join(figures_dir, "basic_analysis.png"), dpi=300, bbox_inches='tight')
+    plt.close()
+
+    # Calculate basic statistics
+    print("\n=== BASIC STATISTICS ===")
+    if 'sentiment_avg' in merged_df.columns:
+        print(f"Average sentiment: {merged_df['sentiment_avg'].mean():.3f}")
+        print(f"Sentiment std dev: {merged_df['sentiment_avg'].std():.3f}")
+        print(f"Number of data points: {len(merged_df['sentiment_avg'].dropna())}")
+
+    if 'daily_return' in merged_df.columns and 'sentiment_avg' in merged_df.columns:
+        correlation = merged_df['daily_return'].corr(merged_df['sentiment_avg'])
+        print(f"Correlation (sentiment vs daily return): {correlation:.3f}")
+
+    # Only do advanced analysis if we have sufficient data
+    if len(merged_df) >= 5:
+        print("\nGenerating advanced analysis...")
+
+        # 2. CORRELATION ANALYSIS
+        correlation_vars = ['sentiment_avg', 'daily_return', 'Close', 'Volume']
+        available_vars = [var for var in correlation_vars if var in merged_df.columns and not merged_df[var].isna().all()]
+
+        if len(available_vars) >= 2:
+            correlation_df = merged_df[available_vars].dropna()
+
+            if len(correlation_df) >= 2:
+                pearson_corr = correlation_df.corr(method='pearson')
+
+                # Create correlation heatmap
+                plt.figure(figsize=(10, 8))
+                sns.heatmap(pearson_corr, annot=True, cmap='RdBu_r', center=0, fmt='.3f',
+                            square=True, linewidths=.5, cbar_kws={"shrink": .8})
+                plt.title('Correlation Matrix', fontsize=14, fontweight='bold')
+                plt.tight_layout()
+                plt.savefig(os.path.join(figures_dir, "correlation_heatmap.png"), dpi=300, bbox_inches='tight')
+                plt.close()
+
+                print("Correlation analysis completed.")
+
+    print("\nAnalysis Complete!")
+    print("Generated files:")
+    print("- basic_analysis.png")
+    if len(merged_df) >= 5:
+        print("- correlation_heatmap.png")
+    print("- Data files in data/ directory")
+
+    # Save summary statistics
+    summary_stats = {
+        'total_posts': len(reddit_df),
+        'date_range': f"{reddit_df['date'].min()} to {reddit_df['date'].max()}",
+        'sentiment_avg': merged_df['sentiment_avg'].mean() if 'sentiment_avg' in merged_df.columns else None,
+        'sentiment_std': merged_df['sentiment_avg'].std() if 'sentiment_avg' in merged_df.columns else None,
+        'data_points': len(merged_df)
+    }
+
+    _ensure_dir(summary_path)
+    with open(summary_path, "w") as f:
+        for key, value in summary_stats.items():
+            f.write(f"{key}: {value}\n")
+
+    print(f"\nSummary saved to {summary_path}")
@@ -1,13 +1,14 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta, timezone
+from src.price_store import PRICE_STORE, PriceStore
+from src.stock_features import VOLUME_WINDOW, compute_stock_features
 
-def get_stock_data(ticker="TSLA", days=30):
-    end_date = datetime.now(timezone.utc)
-    start_date = end_date - timedelta(days=days)
+OHLCV_COLUMNS = ['date', 'Open', 'Close', 'High', 'Low', 'Volume']
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
 
-    df = yf.download(ticker, start=start_date, end=end_date)
 
+def _normalize_ohlcv(df):
+    """Bring a single-ticker yfinance frame into the `date, Open, Close, High, Low, Volume` shape."""
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
 
@@ -16,16 +17,176 @@ def get_stock_data(ticker="TSLA", days=30):
         df.rename(columns={'Date': 'date'}, inplace=True)
     elif 'index' in df.columns:
         df.rename(columns={'index': 'date'}, inplace=True)
-    
+
     df['date'] = pd.to_datetime(df['date']).dt.date
-    desired_columns = ['date', 'Open', 'Close', 'High', 'Low', 'Volume']
-    
+    desired_columns = OHLCV_COLUMNS
+
     existing_desired_columns = [col for col in desired_columns if col in df.columns]
-    
+
     if len(existing_desired_columns) < len(desired_columns):
         missing_cols = set(desired_columns) - set(existing_desired_columns)
         print(f"\n--- Warning: Missing desired stock data columns: {missing_cols} ---")
 
-    df = df[existing_desired_columns]
+    # Present when downloaded with actions=True; the price store uses them to spot re-adjusted history.
+    return df[existing_desired_columns + [col for col in ACTION_COLUMNS if col in df.columns]]
+
+
+def has_corporate_action(df, before=None):
+    """Whether bars downloaded with actions=True (dated before `before`) contain a dividend or split."""
+    if df is None or df.empty:
+        return False
+    if before is not None:
+        df = df[df['date'] < before]
+    present = [col for col in ACTION_COLUMNS if col in df.columns]
+    return bool(present) and bool((df[present].fillna(0) != 0).to_numpy().any())
+
+
+def add_stock_metrics(stock_df, volume_window=VOLUME_WINDOW):
+    """
+    Append daily_return, volatility, price_change, volume_ma and volume_spike to one ticker's bars.
+
+    See src.stock_features.compute_stock_features for many tickers at once.
+    """
+    return compute_stock_features(stock_df, volume_window, by=None)
+
+
+def split_bulk_download(df, tickers):
+    """
+    Split a multi-ticker yfinance frame into one OHLCV frame per ticker.
+
+    Handles both column layouts yfinance produces: (Ticker, Price) with
+    group_by='ticker' and (Price, Ticker) with the default grouping.
+
+    Returns:
+        Dict ticker -> DataFrame with the get_stock_data columns
+    """
+    frames = {}
+    if not isinstance(df.columns, pd.MultiIndex):
+        if len(tickers) != 1:
+            raise ValueError("Expected multi-index columns for a multi-ticker download.")
+        frames[tickers[0]] = _normalize_ohlcv(df)
+        return frames
+
+    level = 0 if set(tickers) & set(df.columns.get_level_values(0)) else 1
+    for ticker in tickers:
+        if ticker not in df.columns.get_level_values(level):
+            print(f"--- Warning: no data returned for {ticker} ---")
+            continue
+        part = df.xs(ticker, axis=1, level=level).dropna(how='all')
+        frames[ticker] = _normalize_ohlcv(part)
+    return frames
+
+
+def get_stock_data_bulk(tickers, days=30, store_path=PRICE_STORE, downloader=None):
+    """
+    Fetch daily OHLCV bars for many tickers, downloading only what the local store lacks.
+
+    Tickers that are missing the same date range are fetched together in one
+    bulk download call. Bars are split- and dividend-adjusted (auto_adjust),
+    so a split or dividend in newly downloaded bars rescales the ticker's
+    whole history: its cached bars are dropped and the full window is
+    downloaded again.
+
+    Args:
+        tickers: List of ticker symbols
+        days: Number of days to look back
+        store_path: SQLite price store
+        downloader: yf.download-compatible callable (injectable for offline use)
+
+    Returns:
+        Dict ticker -> DataFrame with columns date, Open, Close, High, Low, Volume
+    """
+    if downloader is None:
+        import yfinance as yf
+        downloader = yf.download
+    end_date = datetime.now(timezone.utc).date()
+    start_date = end_date - timedelta(days=days)
+    tickers = list(dict.fromkeys(tickers))
+
+    def download(group, start, end):
+        print(f"Downloading {len(group)} ticker(s) for {start} to {end}...")
+        # yfinance treats `end` as exclusive.
+        df = downloader(group if len(group) > 1 else group[0], start=start, end=end + timedelta(days=1),
+                        group_by='ticker', auto_adjust=True, actions=True, progress=False)
+        return split_bulk_download(df, group) if df is not None and not df.empty else {}
+
+    store = PriceStore(store_path)
+    try:
+        requests = {}
+        for ticker in tickers:
+            for start, end in store.missing_ranges(ticker, start_date, end_date):
+                requests.setdefault((start, end), []).append(ticker)
+
+        readjusted = []
+        for (start, end), group in requests.items():
+            frames = download(group, start, end)
+            for ticker in group:
+                covered = store.coverage(ticker)
+                # Adjustments only rescale bars before the action, i.e. cached ones when the range is newer.
+                # The still-open current day is fetched again tomorrow, so its action is handled then, once.
+                if (covered is not None and start > covered[0]
+                        and has_corporate_action(frames.get(ticker), before=end_date)):
+                    readjusted.append(ticker)
+                    continue
+                store.write(ticker, frames.get(ticker), start, end)
+
+        if readjusted:
+            print(f"Split or dividend in new bars of {readjusted}; re-downloading their history.")
+            for ticker in readjusted:
+                store.drop(ticker)
+            frames = download(readjusted, start_date, end_date)
+            for ticker in readjusted:
+                store.write(ticker, frames.get(ticker), start_date, end_date)
+
+        return {ticker: store.read(ticker, start_date, end_date) for ticker in tickers}
+    finally:
+        store.close()
+
 
-    return df
\ No newline at end of file
+def get_stock_data(ticker="TSLA", days=30, store_path=None, downloader=None):
+    """
+    Fetch daily OHLCV bars for one ticker.
+
+    Args:
+        ticker: Ticker symbol
+        days: Number of days to look back
+        store_path: Optional SQLite price store; only missing dates are downloaded
+        downloader: yf.download-compatible callable (injectable for offline use)
+
+    Returns:
+        DataFrame with columns date, Open, Close, High, Low, Volume
+    """
+    if store_path is not None:
+        return get_stock_data_bulk([ticker], days=days, store_path=store_path, downloader=downloader)[ticker]
+
+    end_date = datetime.now(timezone.utc)
+    start_date = end_date - timedelta(days=days)
+
+    if downloader is None:
+        import yfinance as yf
+        downloader = yf.download
+    df = downloader(ticker, start=start_date, end=end_date)
+    return _normalize_ohlcv(df)
+
+
+def get_intraday_bars(ticker="TSLA", days=30, interval="1h", downloader=None):
+    """
+    Fetch intraday OHLCV bars for one ticker (Yahoo keeps about 730 days of hourly bars).
+
+    Returns:
+        DataFrame with columns bar_start (UTC), Open, Close, High, Low, Volume;
+        bar_start matches src.market_calendar.trading_bars
+    """
+    end_date = datetime.now(timezone.utc)
+    start_date = end_date - timedelta(days=days)
+
+    if downloader is None:
+        import yfinance as yf
+        downloader = yf.download
+    df = downloader(ticker, start=start_date, end=end_date, interval=interval)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+    df = df.reset_index()
+    df = df.rename(columns={df.columns[0]: 'bar_start'})
+    df['bar_start'] = pd.to_datetime(df['bar_start'], utc=True)
+    return df[['bar_start'] + [c for c in OHLCV_COLUMNS[1:] if c in df.columns]]
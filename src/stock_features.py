@@ -0,0 +1,344 @@
+import glob
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.storage import read_table, write_table
+
+# Per-bar stock features (Phase 3). All tickers are computed together on a
+# wide (bar position x ticker) layout: column j holds ticker j's bars in date
+# order, padded with NaN, so every rolling window is one slice along axis 0.
+
+STOCK_FEATURES = ['daily_return', 'volatility', 'price_change', 'volume_ma', 'volume_spike']
+PRICE_COLUMNS = ['Open', 'Close', 'High', 'Low', 'Volume']
+VOLUME_WINDOW = 3
+FEATURE_CACHE = "data/cache/stock_features"
+# Appended feature parts kept before they are merged back into one file.
+COMPACT_PARTS = 32
+# Feature parts are stored in date order in row groups of this many rows, so
+# a read of the last weeks skips the older groups from their statistics.
+FEATURE_ROW_GROUP = 65_536
+
+
+def _wide(df, by):
+    """Ticker codes, per-ticker bar positions and the wide OHLCV arrays of a long frame sorted by (by, date)."""
+    if by is None:
+        codes = np.zeros(len(df), dtype=np.int64)
+        tickers = np.array([None], dtype=object)
+    else:
+        codes, tickers = pd.factorize(df[by])
+    starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    positions = np.arange(len(df)) - np.repeat(starts, np.diff(np.r_[starts, len(df)]))
+    shape = (positions.max(initial=-1) + 1, len(tickers))
+    wide = {}
+    for column in PRICE_COLUMNS:
+        values = np.full(shape, np.nan)
+        values[positions, codes] = df[column].to_numpy(dtype=np.float64)
+        wide[column] = values
+    return codes, positions, tickers, wide
+
+
+def rolling_mean(values, window):
+    """Trailing mean over axis 0 (NaN until `window` values, or when one of them is NaN), like rolling(window).mean()."""
+    out = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return out
+    filled = np.nan_to_num(values)
+    sums = np.cumsum(filled, axis=0)
+    gaps = np.cumsum(np.isnan(values), axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    gaps[window:] = gaps[window:] - gaps[:-window]
+    mean = sums[window - 1:] / window
+    mean[gaps[window - 1:] > 0] = np.nan
+    out[window - 1:] = mean
+    return out
+
+
+def _features(wide, volume_window):
+    """Feature arrays from the wide OHLCV arrays."""
+    open_, close, volume = wide['Open'], wide['Close'], wide['Volume']
+    price_change = np.full(close.shape, np.nan)
+    price_change[1:] = close[1:] / close[:-1] - 1
+    volume_ma = rolling_mean(volume, volume_window)
+    return {
+        'daily_return': (close - open_) / open_,
+        'volatility': np.abs(wide['High'] - wide['Low']) / open_,
+        'price_change': price_change,
+        'volume_ma': volume_ma,
+        'volume_spike': volume / volume_ma,
+    }
+
+
+def compute_stock_features(stock_df, volume_window=VOLUME_WINDOW, by='ticker'):
+    """
+    Append daily_return, volatility, price_change, volume_ma and volume_spike for every ticker at once.
+
+    Args:
+        stock_df: Long OHLCV bars (date, Open, Close, High, Low, Volume and the `by` column)
+        volume_window: Bars in the volume_ma window
+        by: Ticker column; None treats all rows as one ticker
+
+    Returns:
+        stock_df sorted by (by, date) with the feature columns
+    """
+    sort_keys = ['date'] if by is None else [by, 'date']
+    df = stock_df.sort_values(sort_keys, kind='stable').reset_index(drop=True)
+    codes, positions, _, wide = _wide(df, by)
+    for name, values in _features(wide, volume_window).items():
+        df[name] = values[positions, codes]
+    return df
+
+
+class StockFeatureState:
+    """
+    Tail of every ticker's bars, enough to extend the features by one bar in O(tickers).
+
+    Per ticker it keeps the first and last date, the last bar's OHLCV, the
+    last volume_window - 1 volumes and the number of bars seen. update()
+    applies new bars one date at a time, vectorized over the tickers trading
+    on that date.
+    """
+
+    def __init__(self, volume_window=VOLUME_WINDOW):
+        self.volume_window = volume_window
+        self.tickers = np.array([], dtype=object)
+        self.first_date = np.array([], dtype='datetime64[ns]')
+        self.last_date = np.array([], dtype='datetime64[ns]')
+        self.last_bar = np.empty((0, len(PRICE_COLUMNS)))
+        self.volume_tail = np.empty((volume_window - 1, 0))
+        self.bars = np.array([], dtype=np.int64)
+        self._index = {}
+
+    @property
+    def last_close(self):
+        return self.last_bar[:, PRICE_COLUMNS.index('Close')]
+
+    @classmethod
+    def from_history(cls, stock_df, volume_window=VOLUME_WINDOW, by='ticker'):
+        """State after all bars of stock_df (as compute_stock_features would see them)."""
+        state = cls(volume_window)
+        df = stock_df.sort_values([by, 'date'], kind='stable').reset_index(drop=True)
+        codes, positions, tickers, wide = _wide(df, by)
+        bars = np.bincount(codes, minlength=len(tickers))
+        last = np.r_[np.flatnonzero(np.diff(codes)), len(df) - 1] if len(df) else np.array([], dtype=np.int64)
+        first = np.r_[0, last[:-1] + 1] if len(df) else last
+        dates = pd.to_datetime(df['date'].to_numpy()).to_numpy('datetime64[ns]')
+        state._add_tickers(tickers)
+        state.bars[:] = bars
+        state.first_date[:] = dates[first]
+        state.last_date[:] = dates[last]
+        state.last_bar[:] = df[PRICE_COLUMNS].to_numpy(dtype=np.float64)[last]
+        k = volume_window - 1
+        for lag in range(1, k + 1):
+            rows = bars - lag
+            ok = rows >= 0
+            state.volume_tail[k - lag, ok] = wide['Volume'][rows[ok], np.flatnonzero(ok)]
+        return state
+
+    def _add_tickers(self, tickers):
+        new = [t for t in pd.unique(np.asarray(tickers, dtype=object)) if t not in self._index]
+        if not new:
+            return
+        for t in new:
+            self._index[t] = len(self._index)
+        n = len(new)
+        self.tickers = np.concatenate([self.tickers, np.array(new, dtype=object)])
+        self.first_date = np.concatenate([self.first_date, np.full(n, np.datetime64('NaT', 'ns'))])
+        self.last_date = np.concatenate([self.last_date, np.full(n, np.datetime64('NaT', 'ns'))])
+        self.last_bar = np.concatenate([self.last_bar, np.full((n, len(PRICE_COLUMNS)), np.nan)])
+        self.volume_tail = np.concatenate([self.volume_tail, np.full((self.volume_window - 1, n), np.nan)], axis=1)
+        self.bars = np.concatenate([self.bars, np.zeros(n, dtype=np.int64)])
+
+    def update(self, bars, by='ticker'):
+        """
+        Extend the state by new bars and return their features.
+
+        Bars dated on or before a ticker's last applied date are skipped (the
+        state cannot revise history; recompute with from_history instead).
+
+        Args:
+            bars: Long OHLCV bars (any number of dates) with the `by` column
+
+        Returns:
+            The applied bars with the feature columns, sorted by (date, by)
+        """
+        bars = bars.sort_values(['date', by], kind='stable')
+        self._add_tickers(bars[by].unique())
+        idx = pd.Index(self.tickers).get_indexer(bars[by].to_numpy(dtype=object))
+        dates = pd.to_datetime(bars['date'].to_numpy()).to_numpy('datetime64[ns]')
+        fresh = np.isnat(self.last_date[idx]) | (dates > self.last_date[idx])
+        bars, idx, dates = bars.loc[fresh], idx[fresh], dates[fresh]
+        if bars.empty:
+            return bars.assign(**{name: np.array([]) for name in STOCK_FEATURES})
+
+        columns = {c: bars[c].to_numpy(dtype=np.float64) for c in PRICE_COLUMNS}
+        out = {name: np.empty(len(bars)) for name in STOCK_FEATURES}
+        # One vectorized step per distinct date; a ticker has at most one bar per date.
+        bounds = np.r_[0, np.flatnonzero(dates[1:] != dates[:-1]) + 1, len(bars)]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows, t = slice(start, stop), idx[start:stop]
+            open_, close, volume = columns['Open'][rows], columns['Close'][rows], columns['Volume'][rows]
+            # rolling(window) needs `window` bars; a NaN volume in the tail propagates through the sum.
+            window_sum = self.volume_tail[:, t].sum(axis=0) + volume
+            volume_ma = np.where(self.bars[t] + 1 >= self.volume_window, window_sum / self.volume_window, np.nan)
+            out['daily_return'][rows] = (close - open_) / open_
+            out['volatility'][rows] = np.abs(columns['High'][rows] - columns['Low'][rows]) / open_
+            out['price_change'][rows] = close / self.last_close[t] - 1
+            out['volume_ma'][rows] = volume_ma
+            out['volume_spike'][rows] = volume / volume_ma
+
+            if self.volume_window > 1:
+                self.volume_tail[:-1, t] = self.volume_tail[1:, t]
+                self.volume_tail[-1, t] = volume
+            self.last_bar[t] = np.column_stack([columns[c][rows] for c in PRICE_COLUMNS])
+            self.first_date[t[self.bars[t] == 0]] = dates[start]
+            self.last_date[t] = dates[start]
+            self.bars[t] += 1
+        return bars.assign(**out)
+
+    def save(self, path):
+        """Write the state to an .npz file (atomically, via a temporary file)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, volume_window=self.volume_window, tickers=self.tickers.astype(str),
+                 first_date=self.first_date, last_date=self.last_date, last_bar=self.last_bar,
+                 volume_tail=self.volume_tail, bars=self.bars)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """State saved by save(), or None for a file written before the state held first_date and last_bar."""
+        with np.load(path) as data:
+            if 'last_bar' not in data.files:
+                return None
+            state = cls(int(data['volume_window']))
+            state._add_tickers(data['tickers'].astype(object))
+            state.first_date[:] = data['first_date']
+            state.last_date[:] = data['last_date']
+            state.last_bar[:] = data['last_bar']
+            state.volume_tail[:] = data['volume_tail']
+            state.bars[:] = data['bars']
+        return state
+
+
+def _part_path(directory, n):
+    return os.path.join(directory, f"part-{n:05d}.parquet")
+
+
+def _ticker_codes(column, tickers):
+    """Positions of a ticker column's values in `tickers` (-1 if absent), looked up once per distinct value."""
+    codes, uniques = pd.factorize(column)
+    positions = pd.Index(tickers).get_indexer(np.asarray(uniques, dtype=object))
+    return np.where(codes >= 0, positions[codes], -1)
+
+
+def _bar_keys(codes, dates):
+    """One int64 per (ticker code, day), ordered like (codes, dates)."""
+    return codes.astype(np.int64) * 2 ** 32 + dates.astype('datetime64[D]').view(np.int64)
+
+
+def _cached_features(df, state, features_dir, by):
+    """
+    Features of the bars of df up to each ticker's last cached date, read from the cached parts.
+
+    Returns:
+        (mask of those rows in df, (len(df), features) array filled on them),
+        or None when the cache cannot serve them (backfilled history, revised
+        prices, rows missing from the cache) and everything must be recomputed
+    """
+    t = _ticker_codes(df[by], state.tickers)
+    known = t >= 0
+    t = np.where(known, t, 0)
+    dates = df['date'].to_numpy('datetime64[ns]')
+    if (known & (dates < state.first_date[t])).any():
+        print("Bars older than the cached history; recomputing stock features.")
+        return None
+    old = known & (dates <= state.last_date[t])
+
+    # A split or dividend re-adjusts every earlier price, so it shows on each ticker's last cached bar.
+    last = old & (dates == state.last_date[t])
+    revised = ~np.isclose(df.loc[last, PRICE_COLUMNS].to_numpy(dtype=np.float64), state.last_bar[t[last]],
+                          rtol=1e-9, atol=0, equal_nan=True).all(axis=1)
+    if revised.any():
+        print(f"{int(revised.sum())} ticker(s) had their cached bars revised; recomputing stock features.")
+        return None
+
+    features = np.full((len(df), len(STOCK_FEATURES)), np.nan)
+    if not old.any():
+        return old, features
+    rows = np.flatnonzero(old)
+    first = np.full(len(state.tickers), np.datetime64('NaT', 'ns'))
+    first[:] = dates[rows].max()
+    np.minimum.at(first, t[rows], dates[rows])
+    # Parts hold dates in ascending order, so the date filter skips older row groups from their statistics.
+    cached = read_table(features_dir, filters=[('date', '>=', pd.Timestamp(first.min()))])
+    ct = _ticker_codes(cached[by], state.tickers)
+    cd = cached['date'].to_numpy('datetime64[ns]')
+    keep = (ct >= 0) & (cd >= first[ct]) & (cd <= state.last_date[ct])
+
+    keys = _bar_keys(t[rows], dates[rows])
+    order = np.argsort(keys, kind='stable')
+    cached_keys = _bar_keys(ct[keep], cd[keep])
+    cached_order = np.argsort(cached_keys, kind='stable')
+    if not np.array_equal(cached_keys[cached_order], keys[order]):
+        print("Cached stock features do not cover the requested bars; recomputing.")
+        return None
+    features[rows[order]] = cached.loc[keep, STOCK_FEATURES].to_numpy(dtype=np.float64)[cached_order]
+    return old, features
+
+
+def incremental_stock_features(stock_df, cache_dir=FEATURE_CACHE, volume_window=VOLUME_WINDOW, by='ticker'):
+    """
+    compute_stock_features with a persisted tail state, so a run only computes the bars added since the last one.
+
+    The cache holds the state and every feature row computed so far, as
+    Parquet parts under cache_dir/features (one part per run that added
+    bars, merged into one after COMPACT_PARTS). Bars up to a ticker's cached
+    last date are read from the parts, newer bars go through
+    StockFeatureState.update and are appended as a new part. The checks
+    before that are O(tickers): when the window changed, a bar predates a
+    ticker's cached history (backfill) or a ticker's last cached bar differs
+    from the state's copy (yfinance adjusts past prices after splits and
+    dividends), everything is recomputed and the cache rewritten.
+
+    Returns:
+        stock_df with the feature columns, sorted by (by, date)
+    """
+    state_path = os.path.join(cache_dir, "state.npz")
+    features_dir = os.path.join(cache_dir, "features")
+    df = stock_df.assign(date=pd.to_datetime(stock_df['date'])).reset_index(drop=True)
+
+    parts = sorted(glob.glob(os.path.join(features_dir, "part-*.parquet")))
+    state = StockFeatureState.load(state_path) if parts and os.path.exists(state_path) else None
+    cached = _cached_features(df, state, features_dir, by) if state and state.volume_window == volume_window else None
+    if cached is not None:
+        old, features = cached
+        new = state.update(df.loc[~old], by=by)
+        if len(new):
+            features[new.index] = new[STOCK_FEATURES].to_numpy(dtype=np.float64)
+            new_features = new[[by, 'date'] + STOCK_FEATURES]
+            if len(parts) >= COMPACT_PARTS:
+                new_features = pd.concat([read_table(features_dir), new_features], ignore_index=True)
+                shutil.rmtree(features_dir)
+                parts = []
+            write_table(new_features, _part_path(features_dir, len(parts)), row_group_size=FEATURE_ROW_GROUP)
+            state.save(state_path)
+        # Bars update() skipped (duplicates of an applied date) have no features; drop them as a merge would.
+        rows = np.flatnonzero(old)
+        rows = np.r_[rows, new.index.to_numpy()]
+        rank = np.argsort(np.argsort(state.tickers.astype(str), kind='stable'))
+        t = rank[_ticker_codes(df[by].iloc[rows], state.tickers)]
+        rows = rows[np.argsort(_bar_keys(t, df['date'].to_numpy('datetime64[ns]')[rows]), kind='stable')]
+        result = df.take(rows).reset_index(drop=True)
+        result[STOCK_FEATURES] = features[rows]
+        return result.assign(date=result['date'].dt.date)
+
+    result = compute_stock_features(df, volume_window, by)
+    if os.path.isdir(features_dir):
+        shutil.rmtree(features_dir)
+    write_table(result[[by, 'date'] + STOCK_FEATURES].sort_values('date', kind='stable'), _part_path(features_dir, 0),
+                row_group_size=FEATURE_ROW_GROUP)
+    StockFeatureState.from_history(df, volume_window, by).save(state_path)
+    return result.assign(date=result['date'].dt.date)
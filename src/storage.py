@@ -0,0 +1,162 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Columns stored as Arrow dictionaries (pandas categoricals); they repeat a
+# handful of values across every row.
+CATEGORICAL_COLUMNS = ('label', 'subreddit', 'query', 'ticker')
+
+# Types of the hive partition keys used by the pipeline. Without them the
+# directory values would come back as strings and date filters could not
+# prune partitions.
+PARTITION_TYPES = {'date': pa.date32(), 'ticker': pa.string(), 'subreddit': pa.string()}
+
+
+def _ensure_parent(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _unique_columns(columns):
+    """Rename repeated column names the way pandas.read_csv does ('score', 'score.1', ...)."""
+    seen, out = {}, []
+    for col in columns:
+        if col in seen:
+            seen[col] += 1
+            out.append(f"{col}.{seen[col]}")
+        else:
+            seen[col] = 0
+            out.append(col)
+    return out
+
+
+def to_arrow(df):
+    """
+    Convert a DataFrame to a typed Arrow table.
+
+    Repeated column names (e.g. two 'score' columns from a concat) are
+    renamed as a CSV round-trip would, and CATEGORICAL_COLUMNS are
+    dictionary-encoded.
+    """
+    df = df.copy(deep=False)
+    df.columns = _unique_columns(df.columns)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _partitioning(names):
+    return ds.partitioning(pa.schema([(name, PARTITION_TYPES.get(name, pa.string())) for name in names]),
+                           flavor='hive')
+
+
+def write_table(df, path, partition_cols=None, csv_path=None, compression='zstd', row_group_size=None):
+    """
+    Write a DataFrame as compressed Parquet, replacing whatever is at `path`.
+
+    Args:
+        df: DataFrame to write
+        path: A .parquet file, or a dataset directory when partition_cols is given
+        partition_cols: Hive partition keys, e.g. ['date'] or ['ticker']
+        csv_path: Also export the frame to this CSV file
+        compression: Parquet codec
+        row_group_size: Rows per row group of a single file (smaller groups let
+            filters on a sorted column skip more of it)
+    """
+    table = to_arrow(df)
+    _remove(path)
+    _ensure_parent(path)
+    if partition_cols:
+        ds.write_dataset(table, path, format='parquet', partitioning=_partitioning(partition_cols),
+                         basename_template='part-{i}.parquet',
+                         file_options=ds.ParquetFileFormat().make_write_options(compression=compression))
+    else:
+        pq.write_table(table, path, compression=compression, row_group_size=row_group_size)
+
+    if csv_path is not None:
+        _ensure_parent(csv_path)
+        df.to_csv(csv_path, index=False)
+
+
+def _discover_partitioning(path):
+    """Hive partitioning of a dataset directory with PARTITION_TYPES applied to known keys."""
+    names, current = [], path
+    while True:
+        subdirs = sorted(d for d in os.listdir(current) if os.path.isdir(os.path.join(current, d)) and '=' in d)
+        if not subdirs:
+            return _partitioning(names) if names else None
+        names.append(subdirs[0].split('=', 1)[0])
+        current = os.path.join(current, subdirs[0])
+
+
+def column_names(path):
+    """Column names of a Parquet file or dataset (partition keys included) without reading any data."""
+    if os.path.isdir(path):
+        return ds.dataset(path, format='parquet', partitioning=_discover_partitioning(path)).schema.names
+    return pq.read_schema(path).names
+
+
+def read_arrow_table(path, columns=None, filters=None, memory_map=False):
+    """
+    Read a Parquet file or partitioned dataset into an Arrow table.
+
+    Args:
+        path: File or dataset directory written by write_table
+        columns: Only decode these columns (partition keys included)
+        filters: pyarrow filters, e.g. [('date', '>=', date(2024, 1, 1))]; filters
+            on partition keys skip whole directories, others use row-group statistics
+        memory_map: Memory-map the files instead of reading them into buffers
+
+    Returns:
+        pyarrow.Table
+    """
+    partitioning = _discover_partitioning(path) if os.path.isdir(path) else None
+    return pq.read_table(path, columns=list(columns) if columns is not None else None, filters=filters,
+                         memory_map=memory_map, partitioning=partitioning)
+
+
+def read_table(path, columns=None, filters=None, memory_map=False):
+    """read_arrow_table converted to pandas; dictionary columns come back as categoricals."""
+    return read_arrow_table(path, columns=columns, filters=filters, memory_map=memory_map).to_pandas()
+
+
+def write_arrow(df, path):
+    """
+    Write an uncompressed Arrow IPC file.
+
+    Unlike Parquet it needs no decoding, so read_arrow can map it straight
+    into memory.
+    """
+    table = to_arrow(df)
+    _ensure_parent(path)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_arrow(path, columns=None):
+    """Memory-mapped, zero-copy read of an Arrow IPC file written by write_arrow."""
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    return table.to_pandas()
+
+
+def export_csv(path, csv_path, columns=None, filters=None):
+    """Export a Parquet file or dataset (optionally projected/filtered) to CSV."""
+    df = read_table(path, columns=columns, filters=filters)
+    _ensure_parent(csv_path)
+    df.to_csv(csv_path, index=False)
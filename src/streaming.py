@@ -0,0 +1,365 @@
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.reddit_async import post_record
+from src.reddit_incremental import append_partitioned
+from src.sentiment_aggregation import LABELS, SENTIMENT_MAPPING
+from src.storage import read_table, write_table
+
+STREAM_DIR = "data/reddit/stream"
+SUBMISSION_FIELDS = ("id", "created_utc", "title", "selftext", "score", "upvote_ratio", "num_comments", "url",
+                     "permalink")
+
+# Per-bucket counters: posts, positive, negative, neutral, sentiment sum,
+# sentiment sum of squares, FinBERT confidence sum.
+_N, _POS, _NEG, _NEU, _SUM, _SQ, _CONF = range(7)
+_LABEL_SLOT = {'positive': _POS, 'negative': _NEG, 'neutral': _NEU}
+
+
+def praw_submission_stream(subreddit, query=None, skip_existing=False, pause_after=0):
+    """
+    New submissions of a subreddit as post records, via praw's subreddit.stream.submissions().
+
+    Yields None whenever Reddit has nothing new (pause_after), so consumers
+    can flush partially filled micro-batches.
+    """
+    from src.reddit_scraper import get_reddit
+
+    stream = get_reddit().subreddit(subreddit).stream.submissions(skip_existing=skip_existing, pause_after=pause_after)
+    for submission in stream:
+        if submission is None:
+            yield None
+            continue
+        if submission.selftext in ('[removed]', '[deleted]'):
+            continue
+        data = {field: getattr(submission, field, None) for field in SUBMISSION_FIELDS}
+        yield post_record(data, subreddit, query=query)
+
+
+def replay_source(posts, speed=None, pause_every=None):
+    """
+    Replay stored posts (a DataFrame, or a Parquet/CSV path) in created_utc order as a stream.
+
+    Args:
+        posts: DataFrame with the get_reddit_posts schema, or a path to one
+        speed: Replay speed relative to real time (e.g. 60 = one minute per
+            second); None replays as fast as possible
+        pause_every: Yield a None pause marker after every this many posts
+    """
+    if isinstance(posts, str):
+        posts = pd.read_csv(posts) if posts.endswith(".csv") else read_table(posts)
+    posts = posts.assign(created_utc=pd.to_datetime(posts['created_utc'], utc=True)).sort_values('created_utc')
+    previous = None
+    for i, row in enumerate(posts.to_dict("records")):
+        if speed is not None and previous is not None:
+            time.sleep(max((row['created_utc'] - previous).total_seconds(), 0) / speed)
+        previous = row['created_utc']
+        row['date'] = row['created_utc'].date()
+        yield row
+        if pause_every and (i + 1) % pause_every == 0:
+            yield None
+
+
+class StreamScorer:
+    """
+    FinBERT kept loaded between micro-batches, with an optional SentimentCache.
+
+    Calling it with a list of texts returns (labels, confidences).
+    """
+
+    def __init__(self, backend="torch", pooling="mean", batch_size=32, cache_path=None):
+        from transformers import AutoConfig
+        from src.finbert_sentiment import FINBERT_MODEL, finbert_revision, load_finbert_pipeline
+        from src.sentiment_cache import SentimentCache
+
+        config = AutoConfig.from_pretrained(FINBERT_MODEL)
+        self.id2label = config.id2label
+        self.num_labels = config.num_labels
+        self.pipe = load_finbert_pipeline(backend=backend)
+        self.pooling = pooling
+        self.batch_size = batch_size
+        self.cache = None
+        if cache_path is not None:
+            self.cache = SentimentCache(cache_path, f"{FINBERT_MODEL}:{backend}:{pooling}", finbert_revision(config))
+
+    def __call__(self, texts):
+        from src.finbert_sentiment import predict_sentiment_batched, probs_to_labels
+
+        cached = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        probs = np.zeros((len(texts), self.num_labels), dtype=np.float32)
+        miss = [i for i, p in enumerate(cached) if p is None]
+        for i, p in enumerate(cached):
+            if p is not None:
+                probs[i] = p
+        if miss:
+            probs[miss] = predict_sentiment_batched(self.pipe, [texts[i] for i in miss], batch_size=self.batch_size,
+                                                    pooling=self.pooling, progress=False)
+            if self.cache is not None:
+                self.cache.put_many([texts[i] for i in miss], probs[miss])
+        return probs_to_labels(probs, self.id2label)
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+
+class RollingSentiment:
+    """
+    Incremental per-bucket (e.g. daily or hourly) sentiment aggregates.
+
+    Every post updates a fixed-size counter vector of its time bucket, plus
+    running totals over the last `window` buckets, in O(1). The derived
+    columns match aggregate_daily_sentiment: sentiment_avg, sentiment_std,
+    post_count, finbert_confidence, label counts, %pos/%neg/%neu and
+    sentiment_momentum.
+
+    Args:
+        freq: Bucket length as a pandas offset alias ('D', 'h', '15min', ...)
+        window: Buckets covered by rolling()
+        keep: Buckets retained for buckets()/momentum; older ones are dropped
+    """
+
+    def __init__(self, freq="D", window=7, keep=400):
+        self.freq = freq
+        self.bucket_seconds = pd.Timedelta(freq if freq[0].isdigit() else "1" + freq).total_seconds()
+        self.window = window
+        self.keep = max(keep, window + 1)
+        self._buckets = OrderedDict()
+        self._window_totals = np.zeros(7)
+        self.latest = None
+
+    def _bucket(self, created_utc):
+        ts = created_utc.timestamp() if hasattr(created_utc, "timestamp") else float(created_utc)
+        return int(ts // self.bucket_seconds)
+
+    def update(self, created_utc, label, confidence):
+        """Add one scored post; returns its bucket id (or None when it is too old to keep)."""
+        slot = _LABEL_SLOT.get(str(label).lower())
+        if slot is None:
+            return None
+        bucket = self._bucket(created_utc)
+        if self.latest is not None and bucket <= self.latest - self.keep:
+            return None
+
+        if self.latest is None or bucket > self.latest:
+            # Buckets leaving the rolling window are subtracted once each, so advancing is amortized O(1).
+            if self.latest is not None and bucket - self.window >= self.latest:
+                self._window_totals[:] = 0
+            elif self.latest is not None:
+                for old in range(self.latest - self.window + 1, bucket - self.window + 1):
+                    if old in self._buckets:
+                        self._window_totals -= self._buckets[old]
+            self.latest = bucket
+            while self._buckets and next(iter(self._buckets)) <= bucket - self.keep:
+                self._buckets.popitem(last=False)
+
+        counters = self._buckets.get(bucket)
+        if counters is None:
+            in_order = not self._buckets or bucket > next(reversed(self._buckets))
+            counters = self._buckets[bucket] = np.zeros(7)
+            if not in_order:
+                # A late post opened an older bucket: keep the dict in time order.
+                self._buckets = OrderedDict(sorted(self._buckets.items()))
+        value = SENTIMENT_MAPPING[LABELS[slot - _POS]]
+        delta = np.zeros(7)
+        delta[[_N, slot, _SUM, _SQ, _CONF]] = (1, 1, value, value * value, confidence)
+        counters += delta
+        if bucket > self.latest - self.window:
+            self._window_totals += delta
+        return bucket
+
+    @staticmethod
+    def _stats(counters):
+        n = counters[_N]
+        if n == 0:
+            return None
+        mean = counters[_SUM] / n
+        var = (counters[_SQ] - n * mean * mean) / (n - 1) if n > 1 else 0.0
+        return {
+            'sentiment_avg': mean,
+            'sentiment_std': float(np.sqrt(max(var, 0.0))),
+            'post_count': int(n),
+            'finbert_confidence': counters[_CONF] / n,
+            'positive_count': int(counters[_POS]),
+            'negative_count': int(counters[_NEG]),
+            'neutral_count': int(counters[_NEU]),
+            'total_posts': int(n),
+            '%pos': counters[_POS] / n,
+            '%neg': counters[_NEG] / n,
+            '%neu': counters[_NEU] / n,
+        }
+
+    def bucket_start(self, bucket):
+        return pd.Timestamp(bucket * self.bucket_seconds, unit='s', tz='UTC')
+
+    def current(self):
+        """Stats of the newest bucket, with momentum against the bucket before it."""
+        if self.latest is None:
+            return None
+        stats = self._stats(self._buckets[self.latest])
+        previous = self._buckets.get(self.latest - 1)
+        stats['sentiment_momentum'] = (stats['sentiment_avg'] - previous[_SUM] / previous[_N]
+                                       if previous is not None and previous[_N] else np.nan)
+        stats['bucket_start'] = self.bucket_start(self.latest)
+        return stats
+
+    def rolling(self):
+        """Stats over the last `window` buckets, from the running totals."""
+        stats = self._stats(self._window_totals)
+        if stats is not None:
+            stats['bucket_start'] = self.bucket_start(self.latest - self.window + 1)
+        return stats
+
+    def buckets(self):
+        """All retained buckets as a DataFrame in aggregate_daily_sentiment's layout."""
+        rows, previous = [], None
+        for bucket, counters in self._buckets.items():
+            stats = self._stats(counters)
+            stats['sentiment_momentum'] = (stats['sentiment_avg'] - previous[1]
+                                           if previous is not None and previous[0] == bucket - 1 else np.nan)
+            rows.append({'bucket_start': self.bucket_start(bucket), **stats})
+            previous = (bucket, stats['sentiment_avg'])
+        return pd.DataFrame(rows)
+
+
+class BufferedPartitionWriter:
+    """
+    Buffer of scored posts appended to a date-partitioned dataset in few, large files.
+
+    Rows are written (one file per touched date, see append_partitioned)
+    once max_rows are buffered, once the oldest buffered row is max_age_s
+    old (checked by extend() and poll()), and by close(). Rows still
+    buffered when the process dies are lost, so the two limits bound what a
+    crash costs as well as how many files the dataset grows by.
+    """
+
+    def __init__(self, dataset_dir, max_rows=5000, max_age_s=300.0, clock=time.perf_counter):
+        self.dataset_dir = dataset_dir
+        self.max_rows = max_rows
+        self.max_age_s = max_age_s
+        self.clock = clock
+        self.rows = []
+        self.files = 0
+        self._since = None
+
+    def extend(self, records):
+        if not records:
+            return
+        if not self.rows:
+            self._since = self.clock()
+        self.rows.extend(records)
+        if len(self.rows) >= self.max_rows:
+            self.flush()
+        else:
+            self.poll()
+
+    def poll(self):
+        """Write the buffer if its oldest row has waited max_age_s."""
+        if self.rows and self.clock() - self._since >= self.max_age_s:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.files += len(append_partitioned(self.rows, self.dataset_dir))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+
+
+def run_stream(source, scorer, aggregates, max_batch=32, max_wait_s=2.0, dataset_dir=STREAM_DIR,
+               snapshot_dir=None, max_posts=None, on_batch=None, rollover_rows=5000, rollover_s=300.0,
+               snapshot_every_s=30.0):
+    """
+    Score a post stream in micro-batches and keep rolling sentiment aggregates current.
+
+    A batch is flushed when it holds max_batch posts, when its oldest post
+    has waited max_wait_s, or when the source pauses (yields None). Each
+    flush scores the batch in one call and updates every aggregate. Scored
+    posts are buffered and appended to dataset_dir in files of up to
+    rollover_rows posts, or after rollover_s (see BufferedPartitionWriter).
+    When snapshot_dir is set, one small Parquet file per aggregate is
+    rewritten at most every snapshot_every_s, and once more at the end.
+
+    Args:
+        source: Iterable of post records (praw_submission_stream, replay_source)
+        scorer: Callable texts -> (labels, confidences), e.g. StreamScorer
+        aggregates: Dict name -> RollingSentiment, e.g. {'daily': ..., 'hourly': ...}
+        max_batch, max_wait_s: Micro-batch limits
+        dataset_dir: Date-partitioned dataset the scored posts are appended to (None to skip)
+        snapshot_dir: Directory for <name>.parquet aggregate snapshots (None to skip)
+        max_posts: Stop after this many posts (None runs until the source ends)
+        on_batch: Optional callback(batch_records, aggregates) after every flush
+        rollover_rows, rollover_s: Limits of the dataset write buffer
+        snapshot_every_s: Minimum seconds between aggregate snapshots
+
+    Returns:
+        Dict with posts, batches, dataset files and snapshots written and the
+        p50/p99 arrival-to-aggregate latency in seconds
+    """
+    pending, arrived = [], []
+    latencies, posts, batches = [], 0, 0
+    writer = (BufferedPartitionWriter(dataset_dir, rollover_rows, rollover_s) if dataset_dir is not None else None)
+    snapshots, last_snapshot, stale = 0, time.perf_counter(), False
+
+    def snapshot():
+        nonlocal snapshots, last_snapshot, stale
+        for name, agg in aggregates.items():
+            write_table(agg.buckets(), os.path.join(snapshot_dir, f"{name}.parquet"))
+        snapshots += 1
+        last_snapshot, stale = time.perf_counter(), False
+
+    def flush():
+        nonlocal batches, stale
+        texts = [f"{r.get('title') or ''} {r.get('selftext') or ''}" for r in pending]
+        labels, confidences = scorer(texts)
+        for record, label, confidence in zip(pending, labels, confidences):
+            record['label'], record['finbert_score'] = label, float(confidence)
+            for agg in aggregates.values():
+                agg.update(record['created_utc'], label, confidence)
+        done = time.perf_counter()
+        latencies.extend(done - t for t in arrived)
+        if writer is not None:
+            writer.extend(list(pending))
+        stale = True
+        if on_batch is not None:
+            on_batch(list(pending), aggregates)
+        batches += 1
+        pending.clear()
+        arrived.clear()
+
+    try:
+        for record in source:
+            now = time.perf_counter()
+            if record is not None:
+                pending.append(record)
+                arrived.append(now)
+                posts += 1
+            if pending and (record is None or len(pending) >= max_batch or now - arrived[0] >= max_wait_s
+                            or (max_posts is not None and posts >= max_posts)):
+                flush()
+            if writer is not None:
+                writer.poll()
+            if snapshot_dir is not None and stale and time.perf_counter() - last_snapshot >= snapshot_every_s:
+                snapshot()
+            if max_posts is not None and posts >= max_posts:
+                break
+        if pending:
+            flush()
+    finally:
+        # Also on KeyboardInterrupt: keep what was scored.
+        if writer is not None:
+            writer.close()
+        if snapshot_dir is not None and stale:
+            snapshot()
+
+    result = {"posts": posts, "batches": batches, "files": writer.files if writer is not None else 0,
+              "snapshots": snapshots}
+    if latencies:
+        result["p50_latency_s"] = float(np.percentile(latencies, 50))
+        result["p99_latency_s"] = float(np.percentile(latencies, 99))
+    return result
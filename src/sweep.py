@@ -0,0 +1,257 @@
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from src.backtest import FEATURES, TARGET
+from src.cpu import core_slices, init_tf_worker
+from src.sequences import create_sequences
+
+SWEEP_DB = "data/cache/sweep.sqlite"
+DATASET_CACHE = "data/cache/sweep_datasets"
+
+DEFAULT_SPACE = {
+    "window_size": [5, 10, 20],
+    "units": [(32, 16), (64, 32), (128, 64)],
+    "dropout": [0.1, 0.2, 0.3],
+    "learning_rate": [1e-3, 3e-4],
+    "features": [FEATURES, ['sentiment_avg', '%pos', '%neg', 'daily_return'],
+                 ['volatility', 'volume_spike', 'daily_return']],
+}
+
+
+class SweepStore:
+    """SQLite store of every trial's parameters and its validation loss at each rung."""
+
+    def __init__(self, path=SWEEP_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS trials (
+                sweep TEXT NOT NULL,
+                trial INTEGER NOT NULL,
+                rung INTEGER NOT NULL,
+                params TEXT NOT NULL,
+                epochs INTEGER NOT NULL,
+                val_loss REAL,
+                status TEXT NOT NULL,
+                wall_s REAL,
+                finished_at REAL NOT NULL,
+                PRIMARY KEY (sweep, trial, rung)
+            );
+        """)
+
+    def record(self, sweep, result):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO trials (sweep, trial, rung, params, epochs, val_loss, status, wall_s, "
+                "finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sweep, result["trial"], result["rung"], json.dumps(result["params"]), result["epochs"],
+                 result["val_loss"], result["status"], result["wall_s"], time.time()),
+            )
+
+    def results(self, sweep):
+        df = pd.read_sql_query("SELECT * FROM trials WHERE sweep = ? ORDER BY trial, rung", self.conn,
+                               params=(sweep,))
+        df['params'] = df['params'].map(json.loads)
+        return df
+
+    def close(self):
+        self.conn.close()
+
+
+def sample_trials(space=DEFAULT_SPACE, n_trials=None, seed=0):
+    """The full grid of `space`, or a random sample of n_trials points from it."""
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if n_trials is not None and n_trials < len(grid):
+        grid = random.Random(seed).sample(grid, n_trials)
+    return grid
+
+
+def _dataset_key(data_path, columns, features, window_size, val_start):
+    payload = json.dumps([os.path.abspath(data_path), os.path.getmtime(data_path), list(columns), list(features),
+                          TARGET, window_size, val_start])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def validation_rows(df, trials, val_fraction=0.2):
+    """
+    The rows every trial of a sweep trains and validates on, and the first validation row.
+
+    Rows with a NaN in any trial's features or the target are dropped for
+    all trials, and the last val_fraction of the remaining rows are the
+    validation targets of every trial, whatever its window_size or feature
+    set, so their validation losses are comparable.
+
+    Returns:
+        (rows sorted by date, index of the first validation target)
+    """
+    columns = sorted({f for params in trials for f in params["features"]} | {TARGET})
+    rows = df.sort_values('date', kind='stable').dropna(subset=columns).reset_index(drop=True)
+    val_start = len(rows) - int(len(rows) * val_fraction)
+    longest = max(params["window_size"] for params in trials)
+    if val_start >= len(rows) or val_start - longest < 1:
+        raise ValueError(f"{len(rows)} rows are too few for window_size={longest} and val_fraction={val_fraction}")
+    return rows, val_start
+
+
+def prepare_dataset(rows, data_path, features, window_size, val_start, cache_dir=DATASET_CACHE):
+    """
+    Scale one feature set once and cache the rows on disk; trials only build window views of them.
+
+    Windows whose target is before rows[val_start] train, the others
+    validate (see validation_rows). Scalers are fitted on the rows before
+    val_start, so the target scaler is the same for every trial; its range
+    is stored to report losses in target units. Returns the cache file path.
+    """
+    key = _dataset_key(data_path, rows.columns, features, window_size, val_start)
+    path = os.path.join(cache_dir, f"{key}.npz")
+    if os.path.exists(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    X, y = rows[list(features)].to_numpy(np.float32), rows[[TARGET]].to_numpy(np.float32)
+    scaler_X = MinMaxScaler().fit(X[:val_start])
+    scaler_y = MinMaxScaler().fit(y[:val_start])
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, X=scaler_X.transform(X).astype(np.float32), y=scaler_y.transform(y).astype(np.float32),
+             n_train=val_start - window_size, window_size=window_size, y_range=scaler_y.data_range_[0])
+    os.replace(tmp, path)
+    return path
+
+
+@lru_cache(maxsize=8)
+def _load_dataset(path):
+    """Train/validation windows and the target range of a cached dataset; loaded once per worker process."""
+    data = np.load(path)
+    window_size, n_train = int(data["window_size"]), int(data["n_train"])
+    X_seq, y_seq = create_sequences(data["X"], data["y"], window_size)
+    return X_seq[:n_train], y_seq[:n_train], X_seq[n_train:], y_seq[n_train:], float(data["y_range"])
+
+
+def _run_rung(task):
+    """Train one trial up to this rung's epoch budget, resuming from its previous rung's weights."""
+    from src.lstm_model import build_lstm_model
+
+    start = time.perf_counter()
+    params = task["params"]
+    X_train, y_train, X_val, y_val, y_range = _load_dataset(task["dataset"])
+    model = build_lstm_model((params["window_size"], len(params["features"])), units=tuple(params["units"]),
+                             dropout=params["dropout"], learning_rate=params["learning_rate"])
+    if task["initial_epoch"] > 0:
+        # Build the optimizer first so its moments are restored along with the weights.
+        model.optimizer.build(model.trainable_variables)
+        model.load_weights(task["weights"])
+    try:
+        history = model.fit(X_train, y_train, validation_data=(X_val, y_val), epochs=task["epochs"],
+                            initial_epoch=task["initial_epoch"], batch_size=task["batch_size"], verbose=0)
+        # The last epoch's loss: the weights saved here, which the next rung resumes from, are that epoch's.
+        # MSE on the scaled target, back in target units.
+        val_loss = float(history.history["val_loss"][-1]) * y_range ** 2
+        status = "ok" if np.isfinite(val_loss) else "diverged"
+        model.save_weights(task["weights"])
+    except Exception as e:
+        val_loss, status = None, f"failed: {e}"
+    return {"trial": task["trial"], "rung": task["rung"], "params": params, "epochs": task["epochs"],
+            "val_loss": val_loss, "status": status, "wall_s": time.perf_counter() - start}
+
+
+def successive_halving(df, data_path, trials, sweep="sweep", min_epochs=3, max_epochs=27, eta=3, batch_size=32,
+                       val_fraction=0.2, workers=1, store_path=SWEEP_DB, cache_dir=DATASET_CACHE):
+    """
+    Hyperparameter sweep that prunes poor trials early (successive halving).
+
+    Every trial first trains for min_epochs. After each rung only the best
+    1/eta of the trials by validation loss continue, with eta times the
+    epoch budget, resuming from their saved weights, until max_epochs.
+    Trials of a rung run concurrently on a spawn process pool, each worker
+    pinned to its own cores with a matching TensorFlow thread budget.
+    Scaled feature rows are cached per (features, window_size) and shared
+    by all trials using them. Every rung result is written to a SweepStore.
+
+    Trials are ranked on their last epoch's validation MSE in target units,
+    computed on the same validation rows for every trial (see
+    validation_rows), so different window sizes and feature sets compete
+    on equal terms.
+
+    Args:
+        df: Merged sentiment/stock frame
+        data_path: File df was read from (part of the dataset cache key)
+        trials: Parameter dicts (see sample_trials); keys window_size, units,
+            dropout, learning_rate and features
+        sweep: Sweep name in the results store
+        min_epochs, max_epochs, eta: Successive-halving schedule
+        batch_size: Training batch size
+        val_fraction: Share of rows whose targets are held out for validation
+        workers: Number of worker processes
+        store_path: SQLite results store
+        cache_dir: Dataset and weight cache directory
+
+    Returns:
+        DataFrame of the final rung result of every trial, best first
+    """
+    weights_dir = os.path.join(cache_dir, "weights", sweep)
+    os.makedirs(weights_dir, exist_ok=True)
+    rows, val_start = validation_rows(df, trials, val_fraction)
+    datasets = {}
+    for params in trials:
+        key = (tuple(params["features"]), params["window_size"])
+        if key not in datasets:
+            datasets[key] = prepare_dataset(rows, data_path, params["features"], params["window_size"],
+                                            val_start, cache_dir)
+
+    store = SweepStore(store_path)
+    pool = None
+    if workers > 1:
+        ctx = mp.get_context("spawn")
+        slice_queue = ctx.Queue()
+        for cores in core_slices(workers):
+            slice_queue.put(cores)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_tf_worker,
+                                   initargs=(slice_queue,))
+
+    latest = {}
+    alive = list(range(len(trials)))
+    rung, epochs, done_epochs = 0, min_epochs, 0
+    try:
+        while alive:
+            tasks = [{"trial": t, "rung": rung, "params": trials[t], "epochs": epochs, "initial_epoch": done_epochs,
+                      "batch_size": batch_size,
+                      "dataset": datasets[(tuple(trials[t]["features"]), trials[t]["window_size"])],
+                      "weights": os.path.join(weights_dir, f"trial-{t}.weights.h5")} for t in alive]
+            print(f"Rung {rung}: {len(tasks)} trial(s) to {epochs} epochs")
+            if pool is None:
+                results = map(_run_rung, tasks)
+            else:
+                results = (f.result() for f in as_completed([pool.submit(_run_rung, task) for task in tasks]))
+            for result in results:
+                store.record(sweep, result)
+                latest[result["trial"]] = result
+                loss = f"{result['val_loss']:.4g}" if result["val_loss"] is not None else result["status"]
+                print(f"  trial {result['trial']}: val_loss={loss} ({result['wall_s']:.1f}s)")
+
+            if epochs >= max_epochs:
+                break
+            ranked = sorted((t for t in alive if latest[t]["status"] == "ok"), key=lambda t: latest[t]["val_loss"])
+            alive = ranked[:max(1, len(alive) // eta)] if ranked else []
+            rung, done_epochs, epochs = rung + 1, epochs, min(epochs * eta, max_epochs)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        store.close()
+
+    final = pd.DataFrame(latest.values())
+    final = final.sort_values(["epochs", "val_loss"], ascending=[False, True], na_position="last")
+    return final.reset_index(drop=True)
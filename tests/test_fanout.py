@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+import src.fanout as fanout
+from src.storage import read_table, write_table
+
+
+def test_fetch_stocks_without_any_bars_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(fanout, "get_stock_data_bulk",
+                        lambda tickers, days, store_path: {t: pd.DataFrame() for t in tickers})
+
+    with pytest.raises(RuntimeError, match="any of the 2 tickers"):
+        fanout.fetch_stocks(["TSLA", "AAPL"], 30, str(tmp_path / "stocks"))
+
+
+def write_inputs(tmp_path, daily_dates, stock_dates, stock_tickers=("TSLA", "AAPL")):
+    daily = pd.DataFrame([{"ticker": t, "config": "default", "date": d, "avg_sentiment": 0.1}
+                          for t in ("TSLA", "AAPL") for d in daily_dates])
+    stock = pd.DataFrame([{"ticker": t, "date": d, "Open": 10.0, "Close": 11.0, "High": 12.0, "Low": 9.0,
+                           "Volume": 1000.0} for t in stock_tickers for d in stock_dates])
+    write_table(daily, str(tmp_path / "daily.parquet"))
+    write_table(stock, str(tmp_path / "stocks"), partition_cols=["ticker"])
+    return str(tmp_path / "daily.parquet"), str(tmp_path / "stocks")
+
+
+@pytest.mark.parametrize("stock_tickers", [("TSLA", "AAPL"), ("MSFT",)])
+def test_merge_configs_without_overlap_raises(tmp_path, stock_tickers):
+    dates = pd.bdate_range("2024-03-04", periods=5).date
+    daily_path, stock_path = write_inputs(tmp_path, dates[:2], dates[2:], stock_tickers)
+
+    with pytest.raises(RuntimeError, match="any of the 2 tickers"):
+        fanout.merge_configs(daily_path, stock_path, str(tmp_path / "merged"),
+                             feature_cache=str(tmp_path / "features"))
+
+
+def test_merge_configs_merges_overlapping_dates(tmp_path):
+    dates = pd.bdate_range("2024-03-04", periods=5).date
+    daily_path, stock_path = write_inputs(tmp_path, dates, dates[2:])
+
+    fanout.merge_configs(daily_path, stock_path, str(tmp_path / "merged"), feature_cache=str(tmp_path / "features"))
+
+    merged = read_table(str(tmp_path / "merged"))
+    assert len(merged) == 6 and set(merged["ticker"]) == {"TSLA", "AAPL"}
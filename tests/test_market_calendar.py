@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from src.market_calendar import align_posts, assign_sessions, next_boundary, trading_bars
+from src.stock_data import get_intraday_bars
+
+
+def utc(*stamps):
+    return pd.to_datetime(list(stamps), utc=True)
+
+
+def test_missing_timestamps_get_no_session():
+    created = pd.Series(utc("2024-03-05 15:00", None, "2024-03-09 12:00"))  # Tue 10:00 ET, NaT, Saturday
+
+    sessions = assign_sessions(created)
+
+    assert list(pd.to_datetime(sessions).date.astype(str)[[0, 2]]) == ["2024-03-05", "2024-03-11"]
+    assert np.isnat(sessions[1])
+    assert next_boundary(created, utc("2024-03-05 21:00"))[1] == -1
+
+
+def test_align_posts_hourly_bars():
+    # 2024-03-05 (EST): bars open at 14:30, 15:30, ... 20:30 UTC; the last one ends at the 21:00 close.
+    posts = pd.DataFrame({"created_utc": utc("2024-03-05 14:00", "2024-03-05 14:45", "2024-03-05 20:45",
+                                             "2024-03-05 22:00", None)})
+
+    out = align_posts(posts, freq="1h")
+
+    # A post counts toward the first bar opening after it; after the last bar it rolls to the next session.
+    assert list(out["bar_start"][:4]) == list(utc("2024-03-05 14:30", "2024-03-05 15:30", "2024-03-06 14:30",
+                                                  "2024-03-06 14:30"))
+    assert out["bar_start"].isna().tolist() == [False] * 4 + [True]
+    assert out["session"].isna().tolist() == [False] * 4 + [True]
+
+
+def test_intraday_bars_line_up_with_the_calendar():
+    bars = trading_bars("2024-03-05", "2024-03-05")
+    index = pd.DatetimeIndex(bars["bar_start"].dt.tz_convert("America/New_York"), name="Datetime")
+
+    def downloader(ticker, start, end, interval):
+        assert interval == "1h"
+        n = len(index)
+        return pd.DataFrame({"Open": np.ones(n), "High": np.ones(n), "Low": np.ones(n), "Close": np.ones(n),
+                             "Volume": np.ones(n)}, index=index)
+
+    intraday = get_intraday_bars("TSLA", days=5, downloader=downloader)
+    posts = align_posts(pd.DataFrame({"created_utc": utc("2024-03-05 15:10", "2024-03-05 17:59")}), freq="1h")
+
+    assert len(bars) == 7 and bars["bar_end"].iloc[-1] == pd.Timestamp("2024-03-05 21:00", tz="UTC")
+    merged = posts.merge(intraday, on="bar_start", how="inner")
+    assert list(merged["bar_start"]) == list(utc("2024-03-05 15:30", "2024-03-05 18:30"))
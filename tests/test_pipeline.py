@@ -0,0 +1,42 @@
+import importlib
+
+from src.pipeline import Stage, _package_digest, fingerprint
+
+
+def make_package(root):
+    package = root / "stagepkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "helpers.py").write_text("def scale(x):\n    return x * 2\n")
+    (package / "stages.py").write_text(
+        "def run(output):\n"
+        "    from stagepkg.helpers import scale\n"
+        "    open(output, 'w').write(str(scale(1)))\n"
+    )
+    return package
+
+
+def test_fingerprint_changes_with_helper_module(tmp_path, monkeypatch):
+    package = make_package(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    stage = Stage("run", importlib.import_module("stagepkg.stages").run, params={"output": "out.txt"})
+    before = fingerprint(stage)
+
+    (package / "helpers.py").write_text("def scale(x):\n    return x * 3\n")
+    _package_digest.cache_clear()
+
+    assert fingerprint(stage) != before
+
+
+def test_fingerprint_changes_with_params_and_inputs(tmp_path, monkeypatch):
+    make_package(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    run = importlib.import_module("stagepkg.stages").run
+    source = tmp_path / "input.txt"
+    source.write_text("a")
+    stage = Stage("run", run, inputs=[str(source)], params={"output": "out.txt"})
+    before = fingerprint(stage)
+
+    assert fingerprint(Stage("run", run, inputs=[str(source)], params={"output": "other.txt"})) != before
+    source.write_text("b")
+    assert fingerprint(stage) != before
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from benchmarks.fake_reddit import FakeReddit, client_kwargs, serve  # noqa: E402
+from src.reddit_async import AsyncRedditClient, TokenBucket, collect_posts_async  # noqa: E402
+
+
+def collect(fake, **kwargs):
+    async def run():
+        async with serve(fake) as (_, base_url):
+            async with AsyncRedditClient(bucket=kwargs.pop("bucket", TokenBucket(rate=1000, capacity=100)),
+                                         **client_kwargs(base_url)) as client:
+                df, stats = await collect_posts_async(client=client, **kwargs)
+                return df, stats, client
+    return asyncio.run(run())
+
+
+def test_listings_are_deduplicated():
+    fake = FakeReddit(posts_per_listing=150, latency=0.0)
+    df, stats, _ = collect(fake, subreddits=["teslamotors"], days=None, limit=450)
+
+    # new/hot/top draw from the same id space, so many raw posts are repeats.
+    assert stats["raw_posts"] == 450
+    assert df["id"].is_unique
+    assert stats["posts"] == len(df) < stats["raw_posts"]
+    assert df["created_utc"].is_monotonic_decreasing
+
+
+def test_pagination_follows_after_until_limit():
+    fake = FakeReddit(posts_per_listing=1000, latency=0.0)
+    df, stats, _ = collect(fake, subreddits="teslamotors", days=None, limit=250, sorts=("new",))
+
+    assert len(df) == 250
+    assert stats["requests"] == 3  # pages of 100, 100 and 50
+    assert sorted(df["id"]) == [f"teslamotors{i:06x}" for i in range(250)]
+
+
+def test_pagination_stops_at_end_of_listing():
+    fake = FakeReddit(posts_per_listing=120, latency=0.0)
+    df, stats, _ = collect(fake, subreddits="teslamotors", days=None, limit=500, sorts=("new",))
+
+    assert len(df) == 120
+    assert stats["requests"] == 2
+
+
+def test_ratelimit_headers_pause_before_the_quota_runs_out():
+    fake = FakeReddit(posts_per_listing=1000, latency=0.0, quota=2, window=1.0)
+    df, stats, client = collect(fake, subreddits="teslamotors", days=None, limit=300, sorts=("new",))
+
+    assert len(df) == 300
+    assert fake.throttled == 0
+    assert client.bucket.waited >= 0.5
+
+
+def test_backs_off_after_429_and_retries():
+    # Both listings request at once, so the second one hits the exhausted quota.
+    fake = FakeReddit(posts_per_listing=1000, latency=0.0, quota=1, window=1.0)
+    start = time.perf_counter()
+    df, stats, client = collect(fake, subreddits="teslamotors", days=None, limit=200, sorts=("new", "hot"))
+
+    assert fake.throttled >= 1
+    assert stats["raw_posts"] == 200
+    assert stats["requests"] == 2 + fake.throttled
+    assert time.perf_counter() - start >= 0.9
+
+
+def test_token_bucket_limits_rate():
+    async def acquire(bucket, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    bucket = TokenBucket(rate=20, capacity=2)
+    elapsed = asyncio.run(acquire(bucket, 6))
+
+    # The burst of 2 is free; the other 4 tokens refill at 20/s.
+    assert elapsed >= 0.18
+    assert bucket.waited >= 0.18
+
+
+def test_token_bucket_pauses_on_exhausted_quota():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.update_from_headers({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "0.2"})
+    start = time.perf_counter()
+    asyncio.run(bucket.acquire())
+    assert time.perf_counter() - start >= 0.15
@@ -0,0 +1,37 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sentiment_aggregation import aggregate_daily_sentiment, finbert_confidence
+
+
+def scored_posts():
+    return pd.DataFrame({
+        "date": [date(2024, 3, 4), date(2024, 3, 4), date(2024, 3, 5), None],
+        "subreddit": ["stocks", None, "stocks", "stocks"],
+        "label": ["positive", "negative", "neutral", "positive"],
+        "score": [1200, 5, 40, 7],  # Reddit upvotes
+        "finbert_score": [0.9, 0.7, 0.6, 0.8],
+    })
+
+
+def test_confidence_uses_finbert_score_not_upvotes():
+    out = aggregate_daily_sentiment(scored_posts().iloc[:3])
+    np.testing.assert_allclose(out["finbert_confidence"], [0.8, 0.6])
+
+
+def test_confidence_reads_legacy_score_1():
+    legacy = scored_posts().rename(columns={"finbert_score": "score.1"})
+    np.testing.assert_allclose(finbert_confidence(legacy), legacy["score.1"])
+    with pytest.raises(KeyError, match="finbert_score"):
+        finbert_confidence(legacy.drop(columns="score.1"))
+
+
+def test_missing_keys_are_left_out_of_every_group():
+    out = aggregate_daily_sentiment(scored_posts(), keys=("subreddit", "date"))
+
+    assert out[["subreddit", "date"]].values.tolist() == [["stocks", date(2024, 3, 4)], ["stocks", date(2024, 3, 5)]]
+    assert out["post_count"].tolist() == [1, 1]
+    np.testing.assert_allclose(out["finbert_confidence"], [0.9, 0.6])
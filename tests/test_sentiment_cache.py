@@ -0,0 +1,81 @@
+import numpy as np
+
+from src.sentiment_cache import SentimentCache
+
+
+def test_models_share_a_cache_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    texts = ["Deliveries beat estimates", "Recall announced"]
+    probs = np.array([[0.8, 0.1, 0.1], [0.1, 0.7, 0.2]], dtype=np.float32)
+
+    torch_cache = SentimentCache(path, "ProsusAI/finbert:torch:mean", "abc")
+    torch_cache.put_many(texts, probs)
+    torch_cache.close()
+
+    int8_cache = SentimentCache(path, "ProsusAI/finbert:int8:mean", "abc")
+    assert int8_cache.get_many(texts) == [None, None]
+    int8_cache.put_many(texts[:1], probs[:1] * 0.5)
+    int8_cache.close()
+
+    reopened = SentimentCache(path, "ProsusAI/finbert:torch:mean", "abc")
+    np.testing.assert_array_equal(np.stack(reopened.get_many(texts)), probs)
+    assert len(reopened) == 3
+    reopened.close()
+
+
+
+class Clock:
+    """Deterministic time.time() replacement so last_used ordering never ties."""
+
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.sentiment_cache.time.time", Clock())
+    cache = SentimentCache(str(tmp_path / "cache.sqlite"), "m", "r", max_entries=2)
+    cache.put_many(["a"], [[1, 0, 0]])
+    cache.put_many(["b"], [[0, 1, 0]])
+    cache.get_many(["a"])  # refreshes a's last_used, so b is now the oldest
+    cache.put_many(["c"], [[0, 0, 1]])
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert b is None
+    np.testing.assert_array_equal(a, [1, 0, 0])
+    np.testing.assert_array_equal(c, [0, 0, 1])
+    assert len(cache) == 2
+    cache.close()
+
+
+def test_stats_count_hits_misses_and_evictions(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.sentiment_cache.time.time", Clock())
+    cache = SentimentCache(str(tmp_path / "cache.sqlite"), "m", "r", max_entries=3)
+    cache.put_many(["a", "b"], [[1, 0, 0], [0, 1, 0]])
+    cache.get_many(["a", "b", "x"])
+    cache.put_many(["c", "d", "e"], [[0, 0, 1]] * 3)
+
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "evictions": 2, "entries": 3}
+    cache.close()
+
+
+def test_text_normalization_shares_a_key(tmp_path):
+    cache = SentimentCache(str(tmp_path / "cache.sqlite"), "m", "r")
+    cache.put_many(["Deliveries  beat\nestimates"], [[1, 0, 0]])
+    assert cache.get_many(["Deliveries beat estimates"])[0] is not None
+    cache.close()
+
+
+def test_new_revision_misses_old_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    old = SentimentCache(path, "ProsusAI/finbert", "rev1")
+    old.put_many(["Recall announced"], [[0.1, 0.7, 0.2]])
+    old.close()
+
+    new = SentimentCache(path, "ProsusAI/finbert", "rev2")
+    assert new.get_many(["Recall announced"]) == [None]
+    assert new.stats()["misses"] == 1
+    new.close()
@@ -0,0 +1,223 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.price_store import PriceStore
+from src.stock_data import OHLCV_COLUMNS, get_stock_data_bulk, split_bulk_download
+
+
+def bars(start, end, seed=0):
+    """yfinance-style single-ticker frame: DatetimeIndex 'Date', one column per price field."""
+    index = pd.bdate_range(start, end, name='Date')
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.random(len(index))
+    return pd.DataFrame({'Open': close - 1, 'High': close + 1, 'Low': close - 2, 'Close': close,
+                         'Volume': rng.integers(1_000, 2_000, len(index)).astype(float)}, index=index)
+
+
+def bulk_frame(frames, group_by_ticker=True):
+    """Combine per-ticker frames into yfinance's (Ticker, Price) or (Price, Ticker) column layout."""
+    df = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+    return df if group_by_ticker else df.swaplevel(axis=1).sort_index(axis=1)
+
+
+def utc_today():
+    return datetime.now(timezone.utc).date()
+
+
+class FakeDownloader:
+    """
+    yf.download stand-in that records its calls; `empty` makes it answer like a failed request.
+
+    `splits` maps a ticker to the date of a 2:1 split: with auto_adjust the
+    bars before that date come back halved, and with actions the split shows
+    up in a 'Stock Splits' column.
+    """
+
+    def __init__(self, empty=False, omit=(), splits=None):
+        self.calls = []
+        self.empty = empty
+        self.omit = set(omit)
+        self.splits = splits or {}
+
+    def __call__(self, tickers, start, end, group_by='column', auto_adjust=False, actions=False, progress=True):
+        group = [tickers] if isinstance(tickers, str) else list(tickers)
+        self.calls.append((tuple(group), start, end))
+        if self.empty:
+            return pd.DataFrame()
+        last = end - timedelta(days=1)  # end is exclusive
+        frames = {}
+        for i, ticker in enumerate(group):
+            if ticker in self.omit:
+                continue
+            df = bars(start, last, seed=i)
+            split = pd.Timestamp(self.splits[ticker]) if ticker in self.splits else None
+            if split is not None and auto_adjust:
+                df.loc[df.index < split, ['Open', 'High', 'Low', 'Close']] /= 2
+            if actions:
+                df['Dividends'] = 0.0
+                df['Stock Splits'] = np.where(df.index == split, 2.0, 0.0)
+            frames[ticker] = df
+        return bulk_frame(frames, group_by_ticker=group_by == 'ticker')
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PriceStore(str(tmp_path / "prices.sqlite"))
+    yield store
+    store.close()
+
+
+def test_missing_ranges_extend_existing_coverage(store):
+    start, end = date(2024, 3, 4), date(2024, 3, 29)
+    assert store.missing_ranges("TSLA", start, end) == [(start, end)]
+
+    store.write("TSLA", split_bulk_download(bars(start, end), ["TSLA"])["TSLA"], start, end)
+    assert store.coverage("TSLA") == (start, end)
+    assert store.missing_ranges("TSLA", start + timedelta(days=3), end - timedelta(days=3)) == []
+    assert store.missing_ranges("TSLA", date(2024, 2, 26), date(2024, 4, 5)) == [
+        (date(2024, 2, 26), date(2024, 3, 3)),
+        (date(2024, 3, 30), date(2024, 4, 5)),
+    ]
+
+
+def test_write_read_round_trip(store):
+    start, end = date(2024, 3, 4), date(2024, 3, 15)
+    df = split_bulk_download(bars(start, end), ["TSLA"])["TSLA"]
+    store.write("TSLA", df, start, end)
+
+    out = store.read("TSLA", start, end)
+    assert list(out.columns) == OHLCV_COLUMNS
+    pd.testing.assert_frame_equal(out, df.reset_index(drop=True), check_dtype=False)
+    assert store.read("TSLA", date(2024, 3, 11), date(2024, 3, 12))["date"].tolist() == [
+        date(2024, 3, 11), date(2024, 3, 12)]
+
+
+def test_write_rewrites_revised_bars(store):
+    start, end = date(2024, 3, 4), date(2024, 3, 8)
+    df = split_bulk_download(bars(start, end), ["TSLA"])["TSLA"]
+    store.write("TSLA", df, start, end)
+    store.write("TSLA", df.assign(Close=df["Close"] / 2), start, end)
+    np.testing.assert_allclose(store.read("TSLA", start, end)["Close"], df["Close"] / 2)
+
+
+def test_empty_write_only_covers_ranges_without_sessions(store):
+    store.write("TSLA", pd.DataFrame(), date(2024, 3, 4), date(2024, 3, 8))
+    assert store.coverage("TSLA") is None
+
+    # A weekend followed by the Good Friday holiday: nothing to download.
+    store.write("TSLA", pd.DataFrame(), date(2024, 3, 29), date(2024, 3, 31))
+    assert store.coverage("TSLA") == (date(2024, 3, 29), date(2024, 3, 31))
+
+
+def test_write_never_covers_today(store):
+    today = utc_today()
+    start = today - timedelta(days=10)
+    store.write("TSLA", split_bulk_download(bars(start, today), ["TSLA"])["TSLA"], start, today)
+    assert store.coverage("TSLA")[1] == today - timedelta(days=1)
+
+
+@pytest.mark.parametrize("group_by_ticker", [True, False])
+def test_split_bulk_download_layouts(group_by_ticker):
+    frames = {"TSLA": bars("2024-03-04", "2024-03-08", seed=0), "AAPL": bars("2024-03-04", "2024-03-06", seed=1)}
+    df = bulk_frame(frames, group_by_ticker=group_by_ticker)
+
+    out = split_bulk_download(df, ["TSLA", "AAPL", "MSFT"])
+
+    assert set(out) == {"TSLA", "AAPL"}
+    for ticker, expected in frames.items():
+        assert list(out[ticker].columns) == OHLCV_COLUMNS
+        assert out[ticker]["date"].tolist() == list(expected.index.date)
+        np.testing.assert_allclose(out[ticker]["Close"], expected["Close"])
+
+
+def test_split_bulk_download_single_ticker_flat_columns():
+    out = split_bulk_download(bars("2024-03-04", "2024-03-08"), ["TSLA"])
+    assert list(out) == ["TSLA"] and len(out["TSLA"]) == 5
+    with pytest.raises(ValueError):
+        split_bulk_download(bars("2024-03-04", "2024-03-08"), ["TSLA", "AAPL"])
+
+
+def test_bulk_groups_tickers_and_fetches_only_missing_ranges(tmp_path):
+    path = str(tmp_path / "prices.sqlite")
+    downloader = FakeDownloader()
+    first = get_stock_data_bulk(["TSLA", "AAPL", "MSFT"], days=30, store_path=path, downloader=downloader)
+
+    assert len(downloader.calls) == 1
+    assert set(downloader.calls[0][0]) == {"TSLA", "AAPL", "MSFT"}
+    assert all(len(df) > 0 for df in first.values())
+
+    downloader.calls.clear()
+    second = get_stock_data_bulk(["TSLA", "AAPL", "MSFT", "NVDA"], days=30, store_path=path, downloader=downloader)
+
+    today = utc_today()
+    known = [call for call in downloader.calls if "TSLA" in call[0]]
+    new = [call for call in downloader.calls if "NVDA" in call[0]]
+    # Covered tickers only re-fetch the still-open current day, in one call.
+    assert len(known) == 1 and set(known[0][0]) == {"TSLA", "AAPL", "MSFT"}
+    assert known[0][1] >= today - timedelta(days=1)
+    assert len(new) == 1 and new[0][0] == ("NVDA",) and new[0][1] == today - timedelta(days=30)
+    for ticker in first:
+        assert len(second[ticker]) >= len(first[ticker])
+
+
+def test_bulk_retries_after_empty_download(tmp_path):
+    path = str(tmp_path / "prices.sqlite")
+    failed = FakeDownloader(empty=True)
+    assert get_stock_data_bulk(["TSLA"], days=30, store_path=path, downloader=failed)["TSLA"].empty
+
+    retry = FakeDownloader()
+    out = get_stock_data_bulk(["TSLA"], days=30, store_path=path, downloader=retry)["TSLA"]
+
+    assert retry.calls[0][1] == utc_today() - timedelta(days=30)
+    assert len(out) >= 15
+
+
+def test_bulk_leaves_tickers_missing_from_result_uncovered(tmp_path):
+    path = str(tmp_path / "prices.sqlite")
+    get_stock_data_bulk(["TSLA", "DELISTED"], days=30, store_path=path, downloader=FakeDownloader(omit={"DELISTED"}))
+
+    store = PriceStore(path)
+    try:
+        assert store.coverage("TSLA") is not None
+        assert store.coverage("DELISTED") is None
+    finally:
+        store.close()
+
+
+def test_bulk_redownloads_history_after_a_split(tmp_path):
+    path = str(tmp_path / "prices.sqlite")
+    get_stock_data_bulk(["TSLA", "AAPL"], days=30, store_path=path, downloader=FakeDownloader())
+
+    # A split on the first session after the cached coverage.
+    today = utc_today()
+    split = next(d.date() for d in pd.bdate_range(today - timedelta(days=3), today))
+    store = PriceStore(path)
+    try:
+        store.conn.execute("UPDATE coverage SET end = ? WHERE ticker = 'TSLA'",
+                           ((split - timedelta(days=1)).isoformat(),))
+        store.conn.execute("DELETE FROM prices WHERE ticker = 'TSLA' AND date >= ?", (split.isoformat(),))
+        store.conn.commit()
+    finally:
+        store.close()
+
+    downloader = FakeDownloader(splits={"TSLA": split})
+    out = get_stock_data_bulk(["TSLA", "AAPL"], days=30, store_path=path, downloader=downloader)
+
+    # TSLA's whole window is fetched again; AAPL keeps its cache.
+    assert downloader.calls[-1] == (("TSLA",), today - timedelta(days=30), today + timedelta(days=1))
+    assert not any(call[1] == today - timedelta(days=30) and "AAPL" in call[0] for call in downloader.calls)
+    expected = bars(today - timedelta(days=30), today, seed=0)
+    expected.loc[expected.index < pd.Timestamp(split), 'Close'] /= 2
+    np.testing.assert_allclose(out["TSLA"]["Close"], expected["Close"])
+
+
+def test_split_on_the_open_day_waits_for_the_next_run(tmp_path):
+    path = str(tmp_path / "prices.sqlite")
+    get_stock_data_bulk(["TSLA"], days=30, store_path=path, downloader=FakeDownloader())
+
+    downloader = FakeDownloader(splits={"TSLA": utc_today()})
+    get_stock_data_bulk(["TSLA"], days=30, store_path=path, downloader=downloader)
+    assert len(downloader.calls) == 1
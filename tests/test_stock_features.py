@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from src.stock_features import STOCK_FEATURES, compute_stock_features, incremental_stock_features
+
+
+def long_bars(n_tickers=3, days=40, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_tickers, days)), axis=1)).ravel()
+    open_ = close * (1 + rng.normal(0, 0.01, close.size))
+    return pd.DataFrame({
+        "ticker": np.repeat([f"T{i}" for i in range(n_tickers)], days),
+        "date": np.tile(dates.date, n_tickers),
+        "Open": open_,
+        "Close": close,
+        "High": np.maximum(open_, close) * 1.01,
+        "Low": np.minimum(open_, close) * 0.99,
+        "Volume": rng.integers(1_000, 1_000_000, close.size).astype(np.float64),
+    })
+
+
+def assert_features_equal(actual, expected):
+    actual = actual.sort_values(["ticker", "date"]).reset_index(drop=True)
+    expected = expected.sort_values(["ticker", "date"]).reset_index(drop=True)
+    assert actual["date"].tolist() == expected["date"].tolist()
+    np.testing.assert_allclose(actual[STOCK_FEATURES].to_numpy(), expected[STOCK_FEATURES].to_numpy(),
+                               rtol=1e-9, equal_nan=True)
+
+
+def test_incremental_matches_full_recompute(tmp_path):
+    bars = long_bars()
+    cutoff = bars["date"].unique()[30]
+    incremental_stock_features(bars[bars["date"] < cutoff], str(tmp_path))
+
+    out = incremental_stock_features(bars, str(tmp_path))
+
+    assert_features_equal(out, compute_stock_features(bars))
+
+
+def test_incremental_recomputes_revised_history(tmp_path):
+    bars = long_bars()
+    cutoff = bars["date"].unique()[30]
+    incremental_stock_features(bars[bars["date"] < cutoff], str(tmp_path))
+
+    # A 2:1 split: the provider re-issues every past price adjusted by 0.5.
+    adjusted = bars.assign(**{c: bars[c] * 0.5 for c in ("Open", "Close", "High", "Low")})
+    out = incremental_stock_features(adjusted, str(tmp_path))
+
+    assert_features_equal(out, compute_stock_features(adjusted))
+    first_new = out[out["date"] == cutoff]
+    assert (first_new["price_change"].abs() < 0.2).all()
+
+
+def test_incremental_appends_a_part_per_run_and_compacts(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.stock_features.COMPACT_PARTS", 3)
+    bars = long_bars()
+    dates = bars["date"].unique()
+    parts = tmp_path / "features"
+    for n, cutoff in enumerate(dates[30:36]):
+        incremental_stock_features(bars[bars["date"] <= cutoff], str(tmp_path))
+        assert len(list(parts.glob("part-*.parquet"))) == n % 3 + 1
+
+    assert_features_equal(incremental_stock_features(bars, str(tmp_path)), compute_stock_features(bars))
+
+
+def test_incremental_serves_a_trailing_window_and_new_tickers(tmp_path):
+    bars = long_bars(n_tickers=4)
+    dates = bars["date"].unique()
+    incremental_stock_features(bars[(bars["date"] < dates[30]) & (bars["ticker"] != "T3")], str(tmp_path))
+
+    # A later run only asks for the last 20 days, and T3 is new.
+    window = bars[bars["date"] >= dates[20]]
+    out = incremental_stock_features(window, str(tmp_path))
+
+    full = compute_stock_features(bars)
+    expected = full[full["date"] >= dates[20]]
+    new_ticker = compute_stock_features(window[window["ticker"] == "T3"])
+    expected = pd.concat([expected[expected["ticker"] != "T3"], new_ticker])
+    assert_features_equal(out, expected)
+
+
+def test_incremental_recomputes_backfilled_history(tmp_path):
+    bars = long_bars()
+    dates = bars["date"].unique()
+    incremental_stock_features(bars[bars["date"] >= dates[10]], str(tmp_path))
+
+    out = incremental_stock_features(bars, str(tmp_path))
+
+    assert_features_equal(out, compute_stock_features(bars))
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from src.reddit_incremental import load_posts_dataset
+from src.streaming import BufferedPartitionWriter, RollingSentiment, run_stream
+from src.storage import read_table
+
+
+def posts(n, start="2024-03-04 10:00"):
+    created = pd.date_range(start, periods=n, freq="min", tz="UTC")
+    return [{"id": f"p{i}", "created_utc": t, "date": t.date(), "title": f"post {i}", "selftext": "",
+             "subreddit": "stocks", "fetched_at": t} for i, t in enumerate(created)]
+
+
+def scorer(texts):
+    return ["positive"] * len(texts), [0.9] * len(texts)
+
+
+def files(dataset_dir):
+    return sorted(dataset_dir.rglob("*.csv"))
+
+
+def test_micro_batches_are_written_in_large_files(tmp_path):
+    aggregates = {"daily": RollingSentiment("D")}
+    result = run_stream(iter(posts(100)), scorer, aggregates, max_batch=5, dataset_dir=str(tmp_path / "stream"),
+                        snapshot_dir=str(tmp_path / "snapshots"), rollover_rows=40, snapshot_every_s=3600)
+
+    assert result["batches"] == 20
+    # 40 + 40 + the 20 left at the end, instead of a file per batch.
+    assert result["files"] == len(files(tmp_path / "stream")) == 3
+    assert len(load_posts_dataset(str(tmp_path / "stream"))) == 100
+    # The timer never fired; the final snapshot still holds every post.
+    assert result["snapshots"] == 1
+    assert read_table(str(tmp_path / "snapshots" / "daily.parquet"))["post_count"].sum() == 100
+
+
+def test_writer_rolls_over_on_age(tmp_path):
+    now = [0.0]
+    writer = BufferedPartitionWriter(str(tmp_path), max_rows=1000, max_age_s=60, clock=lambda: now[0])
+    records = posts(3)
+
+    writer.extend(records[:1])
+    now[0] = 30
+    writer.extend(records[1:2])
+    assert files(tmp_path) == []
+
+    now[0] = 61
+    writer.poll()
+    assert len(files(tmp_path)) == 1
+
+    writer.extend(records[2:])
+    writer.close()
+    assert len(files(tmp_path)) == 2
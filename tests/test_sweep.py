@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import TARGET
+from src.sweep import _load_dataset, prepare_dataset, validation_rows
+
+
+def merged_frame(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "date": pd.bdate_range("2024-01-02", periods=n).date,
+        "sentiment_avg": rng.normal(0, 1, n),
+        "volatility": rng.uniform(0, 0.05, n),
+        TARGET: rng.normal(0, 0.02, n),
+    })
+    df.loc[3, "volatility"] = np.nan
+    return df.sample(frac=1, random_state=seed)
+
+
+TRIALS = [{"window_size": 5, "features": ["sentiment_avg"]},
+          {"window_size": 20, "features": ["sentiment_avg", "volatility"]}]
+
+
+def test_trials_validate_on_the_same_targets(tmp_path):
+    data_path = tmp_path / "merged.arrow"
+    data_path.write_bytes(b"")
+    rows, val_start = validation_rows(merged_frame(), TRIALS, val_fraction=0.2)
+
+    # The NaN of one trial's feature drops the row for every trial.
+    assert len(rows) == 119 and rows["date"].is_monotonic_increasing
+    loaded = [_load_dataset(prepare_dataset(rows, str(data_path), t["features"], t["window_size"], val_start,
+                                            str(tmp_path))) for t in TRIALS]
+
+    (_, y_train_a, _, y_val_a, range_a), (_, y_train_b, _, y_val_b, range_b) = loaded
+    assert len(y_val_a) == len(rows) - val_start
+    np.testing.assert_array_equal(y_val_a, y_val_b)
+    assert range_a == range_b
+    assert len(y_train_a) == val_start - 5 and len(y_train_b) == val_start - 20
+
+
+def test_validation_rows_need_a_training_window():
+    with pytest.raises(ValueError, match="too few"):
+        validation_rows(merged_frame(n=24), TRIALS, val_fraction=0.2)